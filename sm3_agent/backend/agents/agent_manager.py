@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 
@@ -15,6 +16,7 @@ from backend.app.mcp_servers import get_mcp_server_manager, Customer, MCPServer
 from backend.agents.suggestions import get_suggestion_engine
 from backend.containers import get_container_manager, ContainerState, DOCKER_AVAILABLE
 from backend.schemas.models import AgentResult
+from backend.telemetry.metrics import session_message_count, session_messages_total, sessions_total
 from backend.tools.tool_wrappers import build_mcp_tools, build_mcp_tools_for_servers
 from backend.utils.logger import get_logger
 from backend.utils.prompts import SYSTEM_PROMPT, build_system_prompt
@@ -56,6 +58,10 @@ class AgentManager:
 
         # Store separate memory for each session
         self.session_memories: Dict[str, ConversationBufferMemory] = {}
+        # Messages seen per session, observed into a histogram when it closes
+        self.session_message_counts: Dict[str, int] = {}
+        # Monotonic time of each session's last message, for expiring idle sessions
+        self.session_last_active: Dict[str, float] = {}
 
         # Prompt will be built dynamically based on available MCPs
         self.prompt = None
@@ -333,8 +339,44 @@ class AgentManager:
                 return_messages=True,
                 output_key="output"
             )
+            self.session_last_active[session_id] = time.monotonic()
+            sessions_total.inc()
         return self.session_memories[session_id]
 
+    def _record_message(self, session_id: str) -> None:
+        """Count a message towards its session and the aggregate total."""
+        self.session_message_counts[session_id] = self.session_message_counts.get(session_id, 0) + 1
+        self.session_last_active[session_id] = time.monotonic()
+        session_messages_total.inc()
+
+    def close_session(self, session_id: str) -> bool:
+        """
+        Drop a session's memory and record how many messages it had.
+
+        Returns:
+            True if the session existed
+        """
+        memory = self.session_memories.pop(session_id, None)
+        count = self.session_message_counts.pop(session_id, 0)
+        self.session_last_active.pop(session_id, None)
+        if count:
+            session_message_count.observe(count)
+        return memory is not None
+
+    def expire_idle_sessions(self, max_idle: float) -> int:
+        """
+        Close every session without a message for more than max_idle seconds.
+
+        Returns:
+            Number of sessions closed
+        """
+        cutoff = time.monotonic() - max_idle
+        idle = [session_id for session_id, last in self.session_last_active.items() if last < cutoff]
+        for session_id in idle:
+            self.close_session(session_id)
+        if idle:
+            logger.info(f"Expired {len(idle)} idle chat sessions")
+        return len(idle)
 
     def create_agent_executor(self, memory: ConversationBufferMemory) -> AgentExecutor:
         """
@@ -384,6 +426,7 @@ class AgentManager:
 
         # Get session-specific memory
         memory = self.get_or_create_memory(session_id)
+        self._record_message(session_id)
 
         # Create agent executor with session-specific memory
         agent_executor = self.create_agent_executor(memory)
@@ -474,6 +517,7 @@ class AgentManager:
 
         # Get session-specific memory
         memory = self.get_or_create_memory(session_id)
+        self._record_message(session_id)
 
         # Create agent executor with session-specific memory
         agent_executor = self.create_agent_executor(memory)
@@ -71,7 +71,7 @@ async def list_webhooks():
     # Ensure initialized
     await manager.initialize()
     
-    webhooks = manager.get_all_webhooks()
+    webhooks = manager.iter_webhooks()
     
     webhook_list = [
         WebhookConfigResponse(
@@ -36,6 +36,61 @@ class Settings(BaseSettings):
         env="MCP_COMMAND_ALLOWLIST",
         description="Comma-separated allowlist for command execution tools"
     )
+    mcp_pool_min_size: int = Field(
+        1,
+        env="MCP_POOL_MIN_SIZE",
+        description="MCP sessions opened on connect and kept open while idle"
+    )
+    mcp_pool_max_size: int = Field(
+        4,
+        env="MCP_POOL_MAX_SIZE",
+        description="Most MCP sessions one client opens for concurrent tool calls"
+    )
+    mcp_pool_idle_timeout: float = Field(
+        300.0,
+        env="MCP_POOL_IDLE_TIMEOUT",
+        description="Seconds an MCP session above the minimum may sit idle before it is closed"
+    )
+    mcp_connect_timeout: float = Field(
+        10.0,
+        env="MCP_CONNECT_TIMEOUT",
+        description="Seconds to wait for one MCP session to connect and initialize"
+    )
+    mcp_call_timeout: float = Field(
+        60.0,
+        env="MCP_CALL_TIMEOUT",
+        description="Seconds to wait for one MCP tool call to answer"
+    )
+    mcp_call_budget: float = Field(
+        90.0,
+        env="MCP_CALL_BUDGET",
+        description="Total seconds one tool invocation may take, across its retries"
+    )
+    mcp_connect_max_retries: int = Field(
+        3,
+        env="MCP_CONNECT_MAX_RETRIES",
+        description="Connection attempts before giving up on an MCP server"
+    )
+    mcp_retry_backoff_base: float = Field(
+        0.5,
+        env="MCP_RETRY_BACKOFF_BASE",
+        description="Seconds of backoff after the first failed MCP connection attempt, doubling after each"
+    )
+    mcp_retry_backoff_cap: float = Field(
+        30.0,
+        env="MCP_RETRY_BACKOFF_CAP",
+        description="Longest backoff in seconds between MCP connection attempts"
+    )
+    tool_cache_max_size: int = Field(
+        1000,
+        env="TOOL_CACHE_MAX_SIZE",
+        description="Most tool results kept in the cache; least recently used ones are evicted"
+    )
+    tool_cache_default_ttl: int = Field(
+        300,
+        env="TOOL_CACHE_DEFAULT_TTL",
+        description="Seconds a tool result is cached when its tool has no TTL of its own"
+    )
     mcp_audit_dir: str = Field(
         "mcp-audit",
         env="MCP_AUDIT_DIR",
@@ -49,6 +104,11 @@ class Settings(BaseSettings):
         env="ENABLE_LANGCHAIN_TRACING",
         description="Enable LangChain tracing for debugging"
     )
+    session_idle_timeout: float = Field(
+        3600,
+        env="SESSION_IDLE_TIMEOUT",
+        description="Seconds without a message after which a chat session's memory is dropped (0 keeps sessions)"
+    )
 
     # Alert analysis storage
     kb_dir: str = Field(
@@ -1,5 +1,6 @@
-from fastapi import FastAPI, Response
+from fastapi import FastAPI, Header, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import StreamingResponse
 from backend.app.config import get_settings
 from backend.app.mcp_servers import get_mcp_server_manager
@@ -15,7 +16,7 @@ from backend.api.webhooks import router as webhooks_router
 from backend.services.webhook_manager import get_webhook_manager
 from backend.schemas.models import ChatRequest, ChatResponse
 from backend.telemetry.metrics import (
-    chat_requests_total,
+    chat_requests_by_status,
     chat_duration_seconds,
     active_sessions,
     get_metrics,
@@ -26,11 +27,14 @@ from backend.telemetry.metrics import (
 )
 from backend.tools.cache import get_cache
 from backend.tools.mcp_client import MCPClient
+from backend.tools.tool_wrappers import close_mcp_clients
 from backend.utils.logger import get_logger
 import json
 import asyncio
+import hashlib
 import time
-from pydantic import BaseModel
+import orjson
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 
@@ -38,6 +42,7 @@ settings = get_settings()
 logger = get_logger(__name__)
 agent_manager = AgentManager(settings=settings)
 server_manager = get_mcp_server_manager()
+container_manager = get_container_manager() if DOCKER_AVAILABLE else None
 
 # Store MCP client in app state
 mcp_client_instance = None
@@ -45,6 +50,9 @@ mcp_client_instance = None
 # Background task handle for idle cleanup
 _idle_cleanup_task: Optional[asyncio.Task] = None
 
+# Background task handle for expiring idle chat sessions
+_session_expiry_task: Optional[asyncio.Task] = None
+
 app = FastAPI(
     title="Grafana MCP Chat API",
     version="0.2.0",
@@ -60,6 +68,10 @@ app.add_middleware(
     allow_headers=["Content-Type", "Authorization"],
 )
 
+# Compress larger JSON payloads (customer lists, container health); SSE streams are left
+# uncompressed, as GZipMiddleware skips text/event-stream (starlette>=0.46, pinned in requirements)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=6)
+
 # Include routers
 app.include_router(monitoring_router)  # Legacy v1 monitoring
 app.include_router(monitoring_v2_router)  # New multi-customer monitoring (v2)
@@ -71,7 +83,7 @@ app.include_router(mcp_router)
 @app.on_event("startup")
 async def startup_event():
     """Initialize agent and proactive monitoring on startup."""
-    global _idle_cleanup_task
+    global _idle_cleanup_task, _session_expiry_task
     
     logger.info("Starting Grafana MCP Chat API v0.2.0")
     logger.info(f"CORS origins: {settings.cors_origins}")
@@ -87,6 +99,9 @@ async def startup_event():
         mcp_server=settings.mcp_server_url
     )
 
+    # Start the tool cache's background expiry sweep
+    get_cache().start_cleanup()
+
     # Initialize agent
     await agent_manager.initialize()
     logger.info("Agent initialized successfully")
@@ -96,6 +111,10 @@ async def startup_event():
         _idle_cleanup_task = asyncio.create_task(_idle_cleanup_loop())
         logger.info("Started idle container cleanup background task (30 min timeout)")
 
+    # Start expiring idle chat sessions
+    if settings.session_idle_timeout > 0:
+        _session_expiry_task = asyncio.create_task(_session_expiry_loop())
+
     # Initialize proactive monitoring (but don't start it yet)
     try:
         mcp_client = MCPClient(settings=settings)
@@ -121,7 +140,7 @@ async def startup_event():
     try:
         webhook_manager = get_webhook_manager()
         await webhook_manager.initialize()
-        webhooks = webhook_manager.get_all_webhooks()
+        webhooks = webhook_manager.iter_webhooks()
         logger.info(f"Webhook manager initialized with {len(webhooks)} customer webhooks")
         for wh in webhooks:
             logger.info(f"  - {wh.customer_name}: {wh.webhook_url}")
@@ -133,7 +152,7 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown."""
-    global _idle_cleanup_task
+    global _idle_cleanup_task, _session_expiry_task
     
     # Cancel idle cleanup task
     if _idle_cleanup_task:
@@ -143,6 +162,32 @@ async def shutdown_event():
         except asyncio.CancelledError:
             pass
         logger.info("Stopped idle cleanup background task")
+    
+    # Cancel session expiry task
+    if _session_expiry_task:
+        _session_expiry_task.cancel()
+        try:
+            await _session_expiry_task
+        except asyncio.CancelledError:
+            pass
+    
+    # Close the webhook manager's shared HTTP client
+    try:
+        await get_webhook_manager().aclose()
+    except Exception as e:
+        logger.error(f"Error closing webhook manager: {e}")
+    
+    # Stop the tool cache's background expiry sweep
+    try:
+        await get_cache().stop_cleanup()
+    except Exception as e:
+        logger.error(f"Error stopping tool cache sweep: {e}")
+    
+    # Close the MCP session pools shared by the agent's tools
+    try:
+        await close_mcp_clients()
+    except Exception as e:
+        logger.error(f"Error closing MCP clients: {e}")
 
 
 async def _idle_cleanup_loop():
@@ -152,7 +197,6 @@ async def _idle_cleanup_loop():
     
     while True:
         try:
-            container_manager = get_container_manager()
             result = await container_manager.cleanup_idle_containers()
             
             if result["removed_count"] > 0:
@@ -170,6 +214,18 @@ async def _idle_cleanup_loop():
         await asyncio.sleep(300)
 
 
+async def _session_expiry_loop():
+    """Background task to close chat sessions that have gone idle."""
+    interval = min(300, settings.session_idle_timeout / 2)
+    
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            agent_manager.expire_idle_sessions(settings.session_idle_timeout)
+        except Exception as e:
+            logger.error(f"Error in session expiry task: {e}")
+
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(payload: ChatRequest) -> ChatResponse:
     """
@@ -202,8 +258,8 @@ async def chat(payload: ChatRequest) -> ChatResponse:
         raise
     finally:
         duration = time.time() - start_time
-        chat_requests_total.labels(session_id=session_id, status=status).inc()
-        chat_duration_seconds.labels(session_id=session_id).observe(duration)
+        chat_requests_by_status[status].inc()
+        chat_duration_seconds.observe(duration)
         active_sessions.dec()
 
 
@@ -384,8 +440,8 @@ class SwitchServerResponse(BaseModel):
     server_url: Optional[str] = None
     message: str
     mcp_server_count: Optional[int] = None
-    connected_mcps: Optional[List[str]] = None
-    failed_mcps: Optional[List[str]] = None
+    connected_mcps: List[str] = Field(default_factory=list)
+    failed_mcps: List[str] = Field(default_factory=list)
     tool_count: Optional[int] = None
     is_starting: bool = False  # True if containers are still starting
 
@@ -406,8 +462,22 @@ class CustomerContainersHealth(BaseModel):
     containers: List[ContainerHealthStatus]
 
 
-@app.get("/api/customers", response_model=CustomersResponse)
-async def list_customers() -> CustomersResponse:
+def _json_response(payload: dict) -> Response:
+    """Serialize a plain payload straight to JSON, skipping response-model validation."""
+    return Response(content=orjson.dumps(payload), media_type="application/json")
+
+
+def _selection_payload() -> dict:
+    """Current and default customer names shared by both listing formats."""
+    default_customer = server_manager.get_default()
+    return {
+        "current": agent_manager.get_current_server_name(),
+        "default": default_customer.name if default_customer else None
+    }
+
+
+@app.get("/api/customers", responses={200: {"model": CustomersResponse}})
+async def list_customers() -> Response:
     """
     List all available customers with their MCP servers.
 
@@ -415,27 +485,20 @@ async def list_customers() -> CustomersResponse:
         List of configured customers with current selection
     """
     customers = [
-        CustomerInfo(
-            name=c.name,
-            description=c.description,
-            host=c.host,
-            mcp_servers=[MCPServerInfo(type=s.type, url=s.url) for s in c.mcp_servers]
-        )
+        {
+            "name": c.name,
+            "description": c.description,
+            "host": c.host,
+            "mcp_servers": [{"type": s.type, "url": s.url} for s in c.mcp_servers]
+        }
         for c in server_manager.config.customers
     ]
-    
-    default_customer = server_manager.get_default()
-    
-    return CustomersResponse(
-        customers=customers,
-        current=agent_manager.get_current_server_name(),
-        default=default_customer.name if default_customer else None
-    )
+    return _json_response({"customers": customers, **_selection_payload()})
 
 
 # Backwards compatibility endpoint
-@app.get("/api/grafana-servers", response_model=GrafanaServersResponse)
-async def list_grafana_servers() -> GrafanaServersResponse:
+@app.get("/api/grafana-servers", responses={200: {"model": GrafanaServersResponse}})
+async def list_grafana_servers() -> Response:
     """
     List all available Grafana servers (backwards compatibility).
     Use /api/customers for the new multi-MCP server format.
@@ -444,22 +507,15 @@ async def list_grafana_servers() -> GrafanaServersResponse:
         List of configured Grafana servers with current selection
     """
     servers = [
-        GrafanaServerInfo(
-            name=c.name,
-            url=c.get_server_by_type("grafana").url if c.get_server_by_type("grafana") else "",
-            description=c.description
-        )
+        {
+            "name": c.name,
+            "url": c._grafana_server.url,
+            "description": c.description
+        }
         for c in server_manager.config.customers
-        if c.get_server_by_type("grafana")
+        if c._grafana_server is not None
     ]
-    
-    default_customer = server_manager.get_default()
-    
-    return GrafanaServersResponse(
-        servers=servers,
-        current=agent_manager.get_current_server_name(),
-        default=default_customer.name if default_customer else None
-    )
+    return _json_response({"servers": servers, **_selection_payload()})
 
 
 @app.post("/api/customers/switch", response_model=SwitchServerResponse)
@@ -490,8 +546,8 @@ async def switch_customer(request: SwitchCustomerRequest) -> SwitchServerRespons
         grafana_server = customer.get_server_by_type("grafana")
         
         logger.info(
-            f"Switch to customer {request.customer_name}: success={result.success}, "
-            f"connected={result.connected_mcps}, failed={result.failed_mcps}, tools={result.tool_count}"
+            "Switch to customer %s: success=%s, connected=%s, failed=%s, tools=%s",
+            request.customer_name, result.success, result.connected_mcps, result.failed_mcps, result.tool_count
         )
         
         return SwitchServerResponse(
@@ -556,8 +612,8 @@ async def reconnect_customer(request: ReconnectCustomerRequest) -> SwitchServerR
         grafana_server = customer.get_server_by_type("grafana")
         
         logger.info(
-            f"Reconnect customer {customer_name}: success={result.success}, "
-            f"connected={result.connected_mcps}, failed={result.failed_mcps}, tools={result.tool_count}"
+            "Reconnect customer %s: success=%s, connected=%s, failed=%s, tools=%s",
+            customer_name, result.success, result.connected_mcps, result.failed_mcps, result.tool_count
         )
         
         return SwitchServerResponse(
@@ -600,7 +656,6 @@ async def get_customer_health(customer_name: str) -> CustomerContainersHealth:
         )
     
     try:
-        container_manager = get_container_manager()
         customer_status = container_manager.get_customer_status(customer_name)
         
         if not customer_status:
@@ -656,53 +711,54 @@ async def switch_grafana_server(request: SwitchServerRequest) -> SwitchServerRes
     Returns:
         Success status and new server details
     """
-    customer = server_manager.get_customer(request.server_name)
-    
-    if not customer:
-        return SwitchServerResponse(
-            success=False,
-            server_name=request.server_name,
-            message=f"Unknown server: {request.server_name}"
-        )
-    
-    try:
-        success = await agent_manager.switch_customer(request.server_name)
-        grafana_server = customer.get_server_by_type("grafana")
-        
-        if success:
-            logger.info(f"Switched to customer: {request.server_name} ({grafana_server.url if grafana_server else 'N/A'})")
-            return SwitchServerResponse(
-                success=True,
-                server_name=request.server_name,
-                server_url=grafana_server.url if grafana_server else None,
-                message=f"Successfully connected to {request.server_name}",
-                mcp_server_count=len(customer.mcp_servers)
-            )
-        else:
-            return SwitchServerResponse(
-                success=False,
-                server_name=request.server_name,
-                message=f"Failed to switch to {request.server_name}"
-            )
-            
-    except Exception as e:
-        logger.error(f"Error switching server: {e}", exc_info=True)
-        return SwitchServerResponse(
-            success=False,
-            server_name=request.server_name,
-            message=f"Error: {str(e)}"
-        )
+    return await switch_customer(SwitchCustomerRequest(customer_name=request.server_name))
 
 
 # =============================================================================
 # Container Health Endpoints
 # =============================================================================
 
+def _container_health_etag(customer_status) -> str:
+    """
+    Fingerprint the container states of a customer for conditional GETs.
+    
+    The ETag is weak: uptime_seconds keeps growing between identical states,
+    so matching responses are equivalent but not byte-for-byte identical.
+    It is a digest rather than hash(), whose string hashing is salted per
+    process, so every worker and restart tags the same states alike.
+    """
+    fingerprint = hashlib.blake2b(digest_size=8)
+    for mcp_type, status in sorted(customer_status.containers.items(), key=lambda item: item[0].value):
+        fingerprint.update(repr((
+            mcp_type.value, status.state.value, status.container_id, status.error_message, status.started_at
+        )).encode())
+    return f'W/"{fingerprint.hexdigest()}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag using weak comparison."""
+    if not if_none_match:
+        return False
+    opaque_tag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque_tag:
+            return True
+    return False
+
+
 @app.get("/api/containers/health/{customer_name}", response_model=CustomerContainersHealth)
-async def get_customer_container_health(customer_name: str) -> CustomerContainersHealth:
+async def get_customer_container_health(
+    customer_name: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+) -> CustomerContainersHealth:
     """
     Get health status of all MCP containers for a customer.
     
+    Responses carry a weak ETag derived from the container states, so
+    pollers sending If-None-Match get a 304 while nothing has changed.
+    
     Args:
         customer_name: Name of the customer
         
@@ -710,8 +766,6 @@ async def get_customer_container_health(customer_name: str) -> CustomerContainer
         Health status for each MCP container
     """
     try:
-        from backend.containers import get_container_manager, ContainerState, DOCKER_AVAILABLE
-        
         if not DOCKER_AVAILABLE:
             return CustomerContainersHealth(
                 customer_name=customer_name,
@@ -719,7 +773,6 @@ async def get_customer_container_health(customer_name: str) -> CustomerContainer
                 containers=[]
             )
         
-        container_manager = get_container_manager()
         customer_status = container_manager.get_customer_status(customer_name)
         
         if not customer_status:
@@ -729,6 +782,11 @@ async def get_customer_container_health(customer_name: str) -> CustomerContainer
                 containers=[]
             )
         
+        etag = _container_health_etag(customer_status)
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        
         container_statuses = [
             ContainerHealthStatus(
                 mcp_type=mcp_type.value,
@@ -764,33 +822,30 @@ async def get_active_containers():
         List of customer names with active containers
     """
     try:
-        from backend.containers import get_container_manager, DOCKER_AVAILABLE
-        
         if not DOCKER_AVAILABLE:
-            return {
+            return _json_response({
                 "active_customers": [],
                 "max_warm": 3,
                 "count": 0,
                 "docker_available": False
-            }
+            })
         
-        container_manager = get_container_manager()
         active_customers = container_manager.get_active_customers()
         
-        return {
+        return _json_response({
             "active_customers": active_customers,
             "max_warm": container_manager._max_warm,
             "count": len(active_customers)
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error getting active containers: {e}")
-        return {
+        return _json_response({
             "active_customers": [],
             "max_warm": 3,
             "count": 0,
             "error": str(e)
-        }
+        })
 
 
 @app.post("/api/containers/cleanup")
@@ -802,8 +857,6 @@ async def cleanup_orphaned_containers():
         Number of containers removed
     """
     try:
-        from backend.containers import get_container_manager, DOCKER_AVAILABLE
-        
         if not DOCKER_AVAILABLE:
             return {
                 "success": False,
@@ -811,8 +864,7 @@ async def cleanup_orphaned_containers():
                 "error": "Docker SDK not available"
             }
         
-        container_manager = get_container_manager()
-        removed = container_manager.cleanup_orphaned_containers()
+        removed = await container_manager.cleanup_orphaned_containers()
         
         return {
             "success": True,
@@ -845,7 +897,6 @@ async def cleanup_idle_containers():
                 "error": "Docker SDK not available"
             }
         
-        container_manager = get_container_manager()
         result = await container_manager.cleanup_idle_containers()
         
         return {
@@ -877,7 +928,6 @@ async def get_idle_status():
                 "error": "Docker SDK not available"
             }
         
-        container_manager = get_container_manager()
         status = container_manager.get_idle_status()
         
         return {
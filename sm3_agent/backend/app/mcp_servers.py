@@ -11,14 +11,25 @@ from __future__ import annotations
 import json
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from backend.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+_VALID_MCP_TYPES = frozenset({"grafana", "alertmanager", "genesys", "ssh", "linux"})
 
-@dataclass
+# Config file locations, checked in order
+_CONFIG_CANDIDATE_PATHS: Tuple[Path, ...] = (
+    Path(__file__).parent.parent.parent / "mcp_servers.json",  # sm3_agent/mcp_servers.json
+    Path.cwd() / "mcp_servers.json",  # Current working directory
+    Path.cwd() / "sm3_agent" / "mcp_servers.json",  # Subdirectory
+    # Fallback to old grafana_servers.json for backwards compatibility
+    Path(__file__).parent.parent.parent / "grafana_servers.json",
+)
+
+
+@dataclass(slots=True)
 class MCPServer:
     """Represents a single MCP server configuration."""
     type: str  # "grafana", "alertmanager", "genesys", "ssh", etc.
@@ -27,15 +38,14 @@ class MCPServer:
     
     def __post_init__(self):
         # Validate type
-        valid_types = {"grafana", "alertmanager", "genesys", "ssh", "linux"}
-        if self.type not in valid_types:
+        if self.type not in _VALID_MCP_TYPES:
             logger.warning(f"Unknown MCP server type: {self.type}")
         # Ensure config is a dict
         if self.config is None:
             self.config = {}
 
 
-@dataclass
+@dataclass(slots=True)
 class ContainerSettings:
     """Settings for dynamic container management."""
     max_warm_containers: int = 3
@@ -48,7 +58,7 @@ class ContainerSettings:
     images: Dict[str, str] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class Customer:
     """Represents a customer with one or more MCP servers."""
     name: str
@@ -58,6 +68,13 @@ class Customer:
     mcp_servers: List[MCPServer] = field(default_factory=list)
     # Raw server configs for container manager
     _raw_mcp_servers: List[Dict] = field(default_factory=list)
+    # Lookups resolved once, since the server list is fixed after parsing
+    _grafana_server: Optional[MCPServer] = field(default=None, init=False, repr=False, compare=False)
+    _server_types: Tuple[str, ...] = field(default=(), init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._grafana_server = self.get_server_by_type("grafana")
+        self._server_types = tuple(dict.fromkeys(s.type for s in self.mcp_servers))
     
     def get_servers_by_type(self, server_type: str) -> List[MCPServer]:
         """Get all MCP servers of a specific type for this customer."""
@@ -69,11 +86,11 @@ class Customer:
         return servers[0] if servers else None
     
     def get_server_types(self) -> List[str]:
-        """Get list of all server types available for this customer."""
-        return list(set(s.type for s in self.mcp_servers))
+        """Get list of all server types available for this customer, in config order."""
+        return list(self._server_types)
 
 
-@dataclass
+@dataclass(slots=True)
 class MCPServersConfig:
     """Configuration for all customers and their MCP servers."""
     customers: List[Customer] = field(default_factory=list)
@@ -133,24 +150,12 @@ class MCPServerManager:
     def _load_config(self) -> MCPServersConfig:
         """Load MCP servers configuration from JSON file."""
         # Look for config file in multiple locations
-        config_paths = [
-            Path(__file__).parent.parent.parent / "mcp_servers.json",  # sm3_agent/mcp_servers.json
-            Path.cwd() / "mcp_servers.json",  # Current working directory
-            Path.cwd() / "sm3_agent" / "mcp_servers.json",  # Subdirectory
-            # Fallback to old grafana_servers.json for backwards compatibility
-            Path(__file__).parent.parent.parent / "grafana_servers.json",
-        ]
-        
-        config_file = None
-        for path in config_paths:
-            if path.exists():
-                config_file = path
-                break
+        config_file = next((path for path in _CONFIG_CANDIDATE_PATHS if path.exists()), None)
         
         if not config_file:
             logger.warning(
                 "No mcp_servers.json found, using default configuration. "
-                f"Searched: {[str(p) for p in config_paths]}"
+                f"Searched: {[str(p) for p in _CONFIG_CANDIDATE_PATHS]}"
             )
             return self._default_config()
         
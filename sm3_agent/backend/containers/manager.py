@@ -8,12 +8,16 @@ to keep a configurable number of "warm" containers running.
 from __future__ import annotations
 
 import asyncio
+import heapq
 import os
+import re
 import time
-from collections import OrderedDict
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional, Tuple
+from functools import cached_property
+from typing import Any, Collection, Dict, List, Optional, Set, Tuple
+
+import aiohttp
 
 # Docker SDK is optional - container management won't work without it
 try:
@@ -33,6 +37,23 @@ from backend.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Number of host ports reserved per MCP type, starting at the type's base port
+PORTS_PER_TYPE = 100
+
+# Docker API connections kept per client, enough for parallel starts/stops running in worker threads
+DOCKER_MAX_POOL_SIZE = 32
+
+# First health probe retry delay in seconds, doubled per attempt up to the health interval
+HEALTH_PROBE_INITIAL_DELAY = 0.2
+
+# Static keyword arguments shared by every MCP container run (not mutated by the Docker SDK)
+CONTAINER_RUN_DEFAULTS: Dict[str, Any] = {
+    "detach": True,
+    "dns": ["8.8.8.8", "8.8.4.4"],  # Use Google DNS for external resolution
+    "extra_hosts": {"host.docker.internal": "host-gateway"},  # Allow access to host
+    "restart_policy": {"Name": "unless-stopped"},
+}
+
 
 class ContainerState(Enum):
     """Container lifecycle states."""
@@ -53,9 +74,23 @@ class MCPType(Enum):
     GENESYS = "genesys"
 
 
+# Server command per MCP type, completed with the listen address/port argument
+COMMAND_PREFIXES: Dict[MCPType, Tuple[str, ...]] = {
+    MCPType.GRAFANA: ("--transport", "streamable-http", "--address"),
+    MCPType.ALERTMANAGER: ("--transport", "http", "--port"),
+    MCPType.GENESYS: ("--transport", "http", "--port"),
+}
+
+
+def make_container_name(customer_name: str, mcp_type: MCPType) -> str:
+    """Build the Docker container name for a customer's MCP server."""
+    safe_name = customer_name.lower().replace(" ", "-").replace("[", "").replace("]", "")
+    return f"sm3-mcp-{mcp_type.value}-{safe_name}"
+
+
 @dataclass
 class ContainerConfig:
-    """Configuration for an MCP container."""
+    """Configuration for an MCP container (derived names and URLs are computed once)."""
     customer_name: str
     mcp_type: MCPType
     image: str
@@ -64,21 +99,39 @@ class ContainerConfig:
     internal_port: int
     health_endpoint: str = "/health"
     
-    @property
+    @cached_property
     def container_name(self) -> str:
         """Generate unique container name."""
-        safe_name = self.customer_name.lower().replace(" ", "-").replace("[", "").replace("]", "")
-        return f"sm3-mcp-{self.mcp_type.value}-{safe_name}"
+        return make_container_name(self.customer_name, self.mcp_type)
     
-    @property
+    @cached_property
     def url(self) -> str:
         """Get the MCP server URL (for client connections via container name on shared network)."""
         return f"http://{self.container_name}:{self.internal_port}/mcp"
     
-    @property
+    @cached_property
     def health_url(self) -> str:
         """Get the health check URL (via container name on shared network)."""
         return f"http://{self.container_name}:{self.internal_port}{self.health_endpoint}"
+    
+    @cached_property
+    def command(self) -> Optional[List[str]]:
+        """Get the server command (listening on the internal port)."""
+        prefix = COMMAND_PREFIXES.get(self.mcp_type)
+        if prefix is None:
+            return None
+        if self.mcp_type == MCPType.GRAFANA:
+            return [*prefix, f"0.0.0.0:{self.internal_port}"]
+        return [*prefix, str(self.internal_port)]
+    
+    @cached_property
+    def labels(self) -> Dict[str, str]:
+        """Get the Docker labels marking the container as sm3-managed."""
+        return {
+            "sm3.managed": "true",
+            "sm3.customer": self.customer_name,
+            "sm3.mcp_type": self.mcp_type.value,
+        }
 
 
 @dataclass
@@ -88,7 +141,7 @@ class ContainerStatus:
     state: ContainerState
     container_id: Optional[str] = None
     started_at: Optional[float] = None
-    last_accessed: float = field(default_factory=time.time)
+    last_accessed: float = field(default_factory=time.monotonic)
     error_message: Optional[str] = None
     
     @property
@@ -119,13 +172,14 @@ class CustomerContainers:
     """All containers for a customer."""
     customer_name: str
     containers: Dict[MCPType, ContainerStatus] = field(default_factory=dict)
-    last_accessed: float = field(default_factory=time.time)
+    last_accessed: float = field(default_factory=time.monotonic)
     
     def update_access_time(self) -> None:
         """Update the last access time."""
-        self.last_accessed = time.time()
+        now = time.monotonic()
+        self.last_accessed = now
         for status in self.containers.values():
-            status.last_accessed = time.time()
+            status.last_accessed = now
     
     def all_healthy(self) -> bool:
         """Check if all containers are healthy."""
@@ -147,34 +201,41 @@ class MCPContainerManager:
     - Automatic cleanup of stale containers
     """
     
-    _instance: Optional["MCPContainerManager"] = None
-    
-    def __new__(cls) -> "MCPContainerManager":
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
-    
     def __init__(self):
-        if self._initialized:
-            return
-            
         self._docker: Optional[docker.DockerClient] = None
-        self._customers: OrderedDict[str, CustomerContainers] = OrderedDict()
+        self._customers: Dict[str, CustomerContainers] = {}  # insertion order = LRU order
         self._max_warm: int = 3
         self._network_name: str = "sm3-mcp-network"
+        self._network_ready: bool = False
+        self._network_lock = asyncio.Lock()
+        self._local_images: Set[str] = set()  # images known to be present on the daemon
         self._health_timeout: int = 30
         self._health_interval: int = 2
         self._startup_timeout: int = 60
         self._idle_timeout: int = 1800  # 30 minutes default
         
+        # Shared HTTP session for health probes (created lazily on the running loop)
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        
+        # In-flight background health checks (container_name -> task)
+        self._health_tasks: Dict[str, asyncio.Task] = {}
+        # Health URLs whose server rejects HEAD, probed with GET instead
+        self._head_unsupported: Set[str] = set()
+        
+        # IDs of containers owned by tracked customers (anything else labelled sm3 is orphaned)
+        self._managed_ids: Set[str] = set()
+        
         # Port allocations (track which ports are in use)
         self._port_allocations: Dict[str, int] = {}  # container_name -> port
+        self._used_ports: Set[int] = set()
         self._port_ranges: Dict[MCPType, Tuple[int, int]] = {
             MCPType.GRAFANA: (3100, 8888),      # host_start, internal
             MCPType.ALERTMANAGER: (9100, 8080),
             MCPType.GENESYS: (9200, 8080),
         }
+        # Min-heaps of free host ports per type (used ports are skipped lazily on pop)
+        self._free_ports: Dict[MCPType, List[int]] = {}
+        self._rebuild_free_ports()
         
         # Image names
         self._images: Dict[MCPType, str] = {
@@ -183,7 +244,6 @@ class MCPContainerManager:
             MCPType.GENESYS: "sm3/genesys-mcp:latest",
         }
         
-        self._initialized = True
         logger.info("MCPContainerManager initialized")
     
     def configure(
@@ -199,19 +259,29 @@ class MCPContainerManager:
     ) -> None:
         """Configure manager settings from config file."""
         self._max_warm = max_warm
-        self._network_name = network_name
+        if network_name != self._network_name:
+            self._network_name = network_name
+            self._network_ready = False
         self._health_timeout = health_timeout
         self._health_interval = health_interval
         self._startup_timeout = startup_timeout
         self._idle_timeout = idle_timeout
         
         if port_ranges:
+            moved: List[MCPType] = []
             for type_name, ports in port_ranges.items():
                 try:
                     mcp_type = MCPType(type_name)
-                    self._port_ranges[mcp_type] = (ports["start"], ports["internal"])
+                    new_range = (ports["start"], ports["internal"])
                 except (ValueError, KeyError):
                     logger.warning(f"Invalid port range config for {type_name}")
+                    continue
+                if self._port_ranges.get(mcp_type, (None, None))[0] != new_range[0]:
+                    moved.append(mcp_type)
+                self._port_ranges[mcp_type] = new_range
+            # Only heaps whose base port moved need rebuilding (configure runs on every switch)
+            if moved:
+                self._rebuild_free_ports(moved)
         
         if images:
             for type_name, image in images.items():
@@ -234,65 +304,97 @@ class MCPContainerManager:
     @property
     def docker(self):
         """Get Docker client, connecting if needed."""
+        if self._docker is None:
+            self._connect_docker()
+        return self._docker
+    
+    def _connect_docker(self) -> None:
+        """Create the Docker client and check the daemon responds (blocking)."""
         if not DOCKER_AVAILABLE:
             raise RuntimeError("Docker SDK not installed. Install with: pip install docker")
+        try:
+            client = docker.from_env(max_pool_size=DOCKER_MAX_POOL_SIZE)
+            client.ping()
+            logger.info("Connected to Docker daemon")
+        except Exception as e:
+            logger.error(f"Failed to connect to Docker: {e}")
+            raise RuntimeError(f"Docker not available: {e}")
+        self._docker = client
+    
+    async def _ensure_docker(self) -> None:
+        """Connect to Docker in a worker thread so the first call doesn't block the event loop."""
         if self._docker is None:
-            try:
-                self._docker = docker.from_env()
-                self._docker.ping()
-                logger.info("Connected to Docker daemon")
-            except Exception as e:
-                logger.error(f"Failed to connect to Docker: {e}")
-                raise RuntimeError(f"Docker not available: {e}")
-        return self._docker
+            await self._run_docker(self._connect_docker)
+    
+    async def _run_docker(self, fn, *args, **kwargs):
+        """Run a blocking Docker SDK call in a worker thread so the event loop keeps serving."""
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    
+    async def _get_http(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session used for health probes, creating it if needed."""
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, enable_cleanup_closed=True),
+                timeout=aiohttp.ClientTimeout(total=5),
+            )
+        return self._http_session
     
     def _ensure_network(self) -> None:
-        """Ensure the Docker network exists."""
+        """Ensure the Docker network exists (checked once per process)."""
+        if self._network_ready:
+            return
         try:
             self.docker.networks.get(self._network_name)
         except NotFound:
             logger.info(f"Creating Docker network: {self._network_name}")
             self.docker.networks.create(self._network_name, driver="bridge")
-    
-    def _scan_existing_containers(self) -> None:
-        """Scan existing sm3-mcp containers and populate port allocations."""
-        try:
-            containers = self.docker.containers.list(
-                all=True,
-                filters={"name": "sm3-mcp-"}
-            )
-            for container in containers:
-                name = container.name
-                # Get port mappings
-                if container.status == "running":
-                    ports = container.attrs.get("NetworkSettings", {}).get("Ports", {})
-                    for internal_port, bindings in ports.items():
-                        if bindings:
-                            host_port = int(bindings[0].get("HostPort", 0))
-                            if host_port and name not in self._port_allocations:
-                                self._port_allocations[name] = host_port
-                                logger.debug(f"Discovered existing container {name} using port {host_port}")
-            logger.info(f"Scanned {len(containers)} existing containers, {len(self._port_allocations)} port allocations")
-        except Exception as e:
-            logger.warning(f"Failed to scan existing containers: {e}")
+        self._network_ready = True
+    
+    def _pull_image(self, image: str) -> None:
+        """Pull an image, streaming progress events from the daemon (blocking)."""
+        logger.info(f"Pulling image: {image}")
+        for event in self.docker.api.pull(image, stream=True, decode=True):
+            if "error" in event:
+                raise RuntimeError(f"Failed to pull {image}: {event['error']}")
+            logger.debug(f"Pulling {image}: {event.get('status', '')} {event.get('progress', '')}")
+        logger.info(f"Pulled image: {image}")
+    
+    def _scan_existing_containers(self, containers: Collection[Container]) -> None:
+        """Populate port allocations from the host ports of existing sm3-mcp containers."""
+        for container in containers:
+            name = container.name
+            # Get port mappings
+            if container.status == "running":
+                ports = container.attrs.get("NetworkSettings", {}).get("Ports", {})
+                for internal_port, bindings in ports.items():
+                    if bindings:
+                        host_port = int(bindings[0].get("HostPort", 0))
+                        if host_port and name not in self._port_allocations:
+                            self._port_allocations[name] = host_port
+                            self._used_ports.add(host_port)
+                            logger.debug(f"Discovered existing container {name} using port {host_port}")
+        logger.info(f"Scanned {len(containers)} existing containers, {len(self._port_allocations)} port allocations")
+    
+    def _rebuild_free_ports(self, mcp_types: Optional[List[MCPType]] = None) -> None:
+        """Rebuild the free-port heaps from the configured port ranges (all types by default)."""
+        for mcp_type in self._port_ranges if mcp_types is None else mcp_types:
+            base_port = self._port_ranges[mcp_type][0]
+            heap = [p for p in range(base_port, base_port + PORTS_PER_TYPE) if p not in self._used_ports]
+            heapq.heapify(heap)
+            self._free_ports[mcp_type] = heap
     
     def _allocate_port(self, mcp_type: MCPType, container_name: str) -> int:
-        """Allocate a port for a container."""
-        # Ensure we know about existing containers first
-        if not self._port_allocations:
-            self._scan_existing_containers()
-        
+        """Allocate a port for a container (existing containers must have been scanned first)."""
         # Check if already allocated
         if container_name in self._port_allocations:
             return self._port_allocations[container_name]
         
-        base_port, _ = self._port_ranges[mcp_type]
-        used_ports = set(self._port_allocations.values())
-        
-        # Find next available port in range
-        for offset in range(100):  # Allow 100 ports per type
-            port = base_port + offset
-            if port not in used_ports:
+        # Take the lowest free port in range, dropping entries taken since they were pushed
+        heap = self._free_ports[mcp_type]
+        while heap:
+            port = heapq.heappop(heap)
+            if port not in self._used_ports:
+                self._used_ports.add(port)
                 self._port_allocations[container_name] = port
                 return port
         
@@ -300,7 +402,13 @@ class MCPContainerManager:
     
     def _release_port(self, container_name: str) -> None:
         """Release a port allocation."""
-        self._port_allocations.pop(container_name, None)
+        port = self._port_allocations.pop(container_name, None)
+        if port is None:
+            return
+        self._used_ports.discard(port)
+        for mcp_type, (base_port, _) in self._port_ranges.items():
+            if base_port <= port < base_port + PORTS_PER_TYPE:
+                heapq.heappush(self._free_ports[mcp_type], port)
     
     def _build_container_config(
         self,
@@ -342,18 +450,8 @@ class MCPContainerManager:
             if client_secret_env:
                 environment["GENESYSCLOUD_OAUTHCLIENT_SECRET"] = os.environ.get(client_secret_env, "")
         
-        # Create config
-        temp_config = ContainerConfig(
-            customer_name=customer_name,
-            mcp_type=mcp_type,
-            image=image,
-            environment=environment,
-            port=0,  # Will be set below
-            internal_port=internal_port,
-        )
-        
         # Allocate port
-        port = self._allocate_port(mcp_type, temp_config.container_name)
+        port = self._allocate_port(mcp_type, make_container_name(customer_name, mcp_type))
         
         # Set health endpoint based on MCP type
         health_endpoint = "/health"
@@ -370,44 +468,75 @@ class MCPContainerManager:
             health_endpoint=health_endpoint,
         )
     
-    async def _start_container(self, config: ContainerConfig) -> ContainerStatus:
-        """Start a single MCP container."""
+    async def _list_existing_containers(self) -> Optional[Dict[str, Container]]:
+        """List existing sm3-managed containers, by name, in a single Docker call."""
+        try:
+            await self._ensure_docker()
+            containers = await self._run_docker(
+                self.docker.containers.list,
+                all=True,
+                filters={"label": "sm3.managed=true"}
+            )
+        except Exception as e:
+            logger.warning(f"Failed to list existing containers, checking each one instead: {e}")
+            return None
+        return {c.name: c for c in containers}
+    
+    async def _start_container(
+        self,
+        config: ContainerConfig,
+        existing_containers: Optional[Dict[str, Container]] = None,
+    ) -> ContainerStatus:
+        """
+        Start a single MCP container.
+        
+        Args:
+            config: Container configuration
+            existing_containers: Pre-fetched sm3-mcp containers by name; when
+                omitted the container is looked up individually
+        """
         status = ContainerStatus(config=config, state=ContainerState.STARTING)
         
         try:
+            await self._ensure_docker()
+            
             # Check if container already exists
-            try:
-                existing = self.docker.containers.get(config.container_name)
+            if existing_containers is not None:
+                existing = existing_containers.get(config.container_name)
+            else:
+                # Exact-name list query returns [] for a fresh container instead of raising a 404
+                matches = await self._run_docker(
+                    self.docker.containers.list,
+                    all=True,
+                    filters={"name": f"^/?{re.escape(config.container_name)}$"}
+                )
+                existing = matches[0] if matches else None
+            
+            if existing is not None:
                 if existing.status == "running":
                     logger.info(f"Container {config.container_name} already running")
                     status.state = ContainerState.RUNNING
                     status.container_id = existing.id
+                    self._managed_ids.add(existing.id)
                     status.started_at = time.time()
                     return status
                 else:
                     # Remove stopped container
-                    existing.remove(force=True)
-            except NotFound:
-                pass
+                    self._managed_ids.discard(existing.id)
+                    await self._run_docker(existing.remove, force=True)
             
-            # Ensure network exists
-            self._ensure_network()
+            # Ensure network exists (serialized so parallel starts don't each create it)
+            if not self._network_ready:
+                async with self._network_lock:
+                    await self._run_docker(self._ensure_network)
             
-            # Pull image if needed
-            try:
-                self.docker.images.get(config.image)
-            except ImageNotFound:
-                logger.info(f"Pulling image: {config.image}")
-                self.docker.images.pull(config.image)
-            
-            # Build command based on MCP type (use config.port for host network)
-            command = None
-            if config.mcp_type == MCPType.GRAFANA:
-                command = ["--transport", "streamable-http", "--address", f"0.0.0.0:{config.internal_port}"]
-            elif config.mcp_type == MCPType.ALERTMANAGER:
-                command = ["--transport", "http", "--port", str(config.internal_port)]
-            elif config.mcp_type == MCPType.GENESYS:
-                command = ["--transport", "http", "--port", str(config.internal_port)]
+            # Pull image if needed (images seen locally once aren't looked up again)
+            if config.image not in self._local_images:
+                try:
+                    await self._run_docker(self.docker.images.get, config.image)
+                except ImageNotFound:
+                    await self._run_docker(self._pull_image, config.image)
+                self._local_images.add(config.image)
             
             # Start container with bridge network and DNS configured
             logger.info(
@@ -415,25 +544,20 @@ class MCPContainerManager:
                 f"(image={config.image}, port={config.port})"
             )
             
-            container = self.docker.containers.run(
+            container = await self._run_docker(
+                self.docker.containers.run,
                 config.image,
-                command=command,
+                command=config.command,
                 name=config.container_name,
-                detach=True,
                 environment=config.environment,
                 ports={f"{config.internal_port}/tcp": config.port},  # Expose port on host
                 network=self._network_name,  # Connect to shared network
-                dns=["8.8.8.8", "8.8.4.4"],  # Use Google DNS for external resolution
-                extra_hosts={"host.docker.internal": "host-gateway"},  # Allow access to host
-                restart_policy={"Name": "unless-stopped"},
-                labels={
-                    "sm3.managed": "true",
-                    "sm3.customer": config.customer_name,
-                    "sm3.mcp_type": config.mcp_type.value,
-                },
+                labels=config.labels,
+                **CONTAINER_RUN_DEFAULTS,
             )
             
             status.container_id = container.id
+            self._managed_ids.add(container.id)
             status.started_at = time.time()
             status.state = ContainerState.RUNNING
             
@@ -456,24 +580,34 @@ class MCPContainerManager:
             return status
         
         timeout = timeout or self._health_timeout
-        start_time = time.time()
+        deadline = time.monotonic() + timeout
+        url = status.config.health_url
+        probe_timeout = aiohttp.ClientTimeout(total=self._health_interval)
+        session = await self._get_http()
         
         logger.info(f"Waiting for {status.config.container_name} to become healthy...")
         
-        while time.time() - start_time < timeout:
+        attempt = 0
+        while time.monotonic() < deadline:
             try:
-                # Try to connect to the health endpoint
-                import aiohttp
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(status.config.health_url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                        if resp.status in (200, 405):  # 405 = Method Not Allowed (but endpoint exists)
-                            status.state = ContainerState.HEALTHY
-                            logger.info(f"Container {status.config.container_name} is healthy")
-                            return status
+                # Try to connect to the health endpoint (HEAD avoids reading a body or SSE stream)
+                use_head = url not in self._head_unsupported
+                request = session.head if use_head else session.get
+                async with request(url, allow_redirects=False, timeout=probe_timeout) as resp:
+                    if use_head and resp.status in (404, 405, 501):
+                        # Server doesn't allow or route HEAD for this endpoint, fall back to GET
+                        self._head_unsupported.add(url)
+                        continue
+                    if resp.status in (200, 405):  # 405 = Method Not Allowed (but endpoint exists)
+                        status.state = ContainerState.HEALTHY
+                        logger.info(f"Container {status.config.container_name} is healthy")
+                        return status
             except Exception as e:
                 logger.debug(f"Health check failed for {status.config.container_name}: {e}")
             
-            await asyncio.sleep(self._health_interval)
+            # Probe quickly right after start, then back off towards the configured interval
+            await asyncio.sleep(min(self._health_interval, HEALTH_PROBE_INITIAL_DELAY * (2 ** attempt)))
+            attempt = min(attempt + 1, 16)
         
         status.state = ContainerState.UNHEALTHY
         status.error_message = f"Health check timeout after {timeout}s"
@@ -481,18 +615,68 @@ class MCPContainerManager:
         
         return status
     
+    async def _start_then_check(
+        self,
+        config: ContainerConfig,
+        existing_containers: Optional[Dict[str, Container]] = None,
+    ) -> ContainerStatus:
+        """Start a container and begin its health check without waiting for its siblings."""
+        status = await self._start_container(config, existing_containers)
+        if status.state == ContainerState.RUNNING:
+            self._schedule_health_check(status)
+        return status
+    
+    def _schedule_health_check(self, status: ContainerStatus) -> None:
+        """Run the health check for a started container as a background task."""
+        name = status.config.container_name
+        existing = self._health_tasks.get(name)
+        if existing is not None:
+            existing.cancel()
+        
+        task = asyncio.create_task(self._wait_for_healthy(status))
+        self._health_tasks[name] = task
+        
+        def _discard(done: asyncio.Task) -> None:
+            if self._health_tasks.get(name) is done:
+                del self._health_tasks[name]
+        
+        task.add_done_callback(_discard)
+    
+    def _has_pending_health_checks(self, customer: CustomerContainers) -> bool:
+        """Check if any of a customer's containers still has a health check running."""
+        return any(s.config.container_name in self._health_tasks for s in customer.containers.values())
+    
+    async def _await_health_checks(self, customer: CustomerContainers) -> None:
+        """Wait for the in-flight health checks of a customer's containers to settle."""
+        tasks = [
+            self._health_tasks[s.config.container_name]
+            for s in customer.containers.values()
+            if s.config.container_name in self._health_tasks
+        ]
+        if tasks:
+            # Shield the shared tasks so a cancelled caller doesn't abort checks others wait on
+            await asyncio.gather(*(asyncio.shield(t) for t in tasks), return_exceptions=True)
+    
     async def _stop_container(self, status: ContainerStatus) -> None:
         """Stop and remove a container."""
+        health_task = self._health_tasks.pop(status.config.container_name, None)
+        if health_task is not None:
+            health_task.cancel()
+        
         if not status.container_id:
             return
         
+        # No longer tracked by a customer; if stopping fails, orphan cleanup picks it up
+        self._managed_ids.discard(status.container_id)
+        
         try:
             status.state = ContainerState.STOPPING
-            container = self.docker.containers.get(status.container_id)
+            await self._ensure_docker()
+            container = await self._run_docker(self.docker.containers.get, status.container_id)
             
             logger.info(f"Stopping container {status.config.container_name}")
-            container.stop(timeout=10)
-            container.remove()
+            await self._run_docker(container.stop, timeout=10)
+            await self._run_docker(container.remove)
             
             self._release_port(status.config.container_name)
             status.state = ContainerState.STOPPED
@@ -516,8 +700,10 @@ class MCPContainerManager:
             logger.info(f"Evicting LRU customer containers: {oldest_name}")
             
             # Stop all containers for this customer
-            for status in oldest.containers.values():
-                await self._stop_container(status)
+            await asyncio.gather(
+                *(self._stop_container(status) for status in oldest.containers.values()),
+                return_exceptions=True,
+            )
     
     async def start_customer_containers(
         self,
@@ -528,6 +714,10 @@ class MCPContainerManager:
         """
         Start all MCP containers for a customer.
         
+        Health checks always run in the background and update the cached
+        container states; wait_for_healthy only controls whether this call
+        waits for them to settle.
+        
         Args:
             customer_name: Name of the customer
             mcp_servers: List of MCP server configs from mcp_servers.json
@@ -546,10 +736,24 @@ class MCPContainerManager:
             if customer.all_healthy():
                 logger.info(f"Customer {customer_name} containers already healthy")
                 return customer
+            
+            # Containers started by an earlier call are still being health-checked
+            if self._has_pending_health_checks(customer):
+                logger.info(f"Customer {customer_name} containers still starting")
+                if wait_for_healthy:
+                    await self._await_health_checks(customer)
+                return customer
         
         # Create new customer containers
         customer = CustomerContainers(customer_name=customer_name)
         
+        # Look up existing containers once, for the port scan and for every MCP server
+        existing_containers = await self._list_existing_containers()
+        
+        # Ensure we know which ports existing containers hold before allocating
+        if not self._port_allocations and existing_containers is not None:
+            self._scan_existing_containers(existing_containers.values())
+        
         # Start containers in parallel
         start_tasks = []
         for server_config in mcp_servers:
@@ -561,29 +765,24 @@ class MCPContainerManager:
                 continue
             
             config = self._build_container_config(customer_name, mcp_type, server_config)
-            start_tasks.append(self._start_container(config))
+            start_tasks.append(self._start_then_check(config, existing_containers))
         
-        # Wait for all containers to start
+        # Wait for all containers to start (each one's health check is already under way)
         statuses = await asyncio.gather(*start_tasks)
         
         for status in statuses:
             customer.containers[status.config.mcp_type] = status
         
-        # Wait for health checks
-        if wait_for_healthy:
-            health_tasks = [
-                self._wait_for_healthy(status)
-                for status in customer.containers.values()
-                if status.state == ContainerState.RUNNING
-            ]
-            await asyncio.gather(*health_tasks)
-        
-        # Add to LRU cache
+        # Add to LRU cache (health checks keep updating the cached statuses in the background)
         self._customers[customer_name] = customer
         
         # Enforce LRU limit
         await self._enforce_lru_limit()
         
+        # Wait for health checks
+        if wait_for_healthy:
+            await self._await_health_checks(customer)
+        
         return customer
     
     async def stop_customer_containers(self, customer_name: str) -> None:
@@ -593,13 +792,25 @@ class MCPContainerManager:
         
         customer = self._customers.pop(customer_name)
         
-        for status in customer.containers.values():
-            await self._stop_container(status)
+        await asyncio.gather(
+            *(self._stop_container(status) for status in customer.containers.values()),
+            return_exceptions=True,
+        )
     
     async def stop_all_containers(self) -> None:
         """Stop all managed containers."""
-        for customer_name in list(self._customers.keys()):
-            await self.stop_customer_containers(customer_name)
+        await asyncio.gather(
+            *(self.stop_customer_containers(name) for name in list(self._customers)),
+            return_exceptions=True,
+        )
+        
+        for task in self._health_tasks.values():
+            task.cancel()
+        self._health_tasks.clear()
+        
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
     
     def get_customer_status(self, customer_name: str) -> Optional[CustomerContainers]:
         """Get status of containers for a customer."""
@@ -621,30 +832,34 @@ class MCPContainerManager:
             if status.state == ContainerState.HEALTHY
         }
     
-    def cleanup_orphaned_containers(self) -> int:
+    async def cleanup_orphaned_containers(self) -> int:
         """Find and remove orphaned SM3 containers."""
-        removed = 0
         try:
-            containers = self.docker.containers.list(
+            await self._ensure_docker()
+            containers = await self._run_docker(
+                self.docker.containers.list,
                 all=True,
                 filters={"label": "sm3.managed=true"}
             )
-            
-            managed_ids = {
-                s.container_id
-                for c in self._customers.values()
-                for s in c.containers.values()
-                if s.container_id
-            }
-            
-            for container in containers:
-                if container.id not in managed_ids:
-                    logger.info(f"Removing orphaned container: {container.name}")
-                    container.remove(force=True)
-                    removed += 1
-                    
         except Exception as e:
             logger.error(f"Error cleaning up orphaned containers: {e}")
+            return 0
+        
+        orphans = [c for c in containers if c.id not in self._managed_ids]
+        for container in orphans:
+            logger.info(f"Removing orphaned container: {container.name}")
+        
+        results = await asyncio.gather(
+            *(self._run_docker(c.remove, force=True) for c in orphans),
+            return_exceptions=True,
+        )
+        
+        removed = 0
+        for container, result in zip(orphans, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error removing orphaned container {container.name}: {result}")
+            else:
+                removed += 1
         
         return removed
 
@@ -659,7 +874,7 @@ class MCPContainerManager:
             Dict with cleanup results
         """
         timeout = idle_timeout or self._idle_timeout
-        now = time.time()
+        now = time.monotonic()
         removed_customers = []
         
         # Find idle customers
@@ -694,7 +909,7 @@ class MCPContainerManager:
     
     def get_idle_status(self) -> Dict[str, Any]:
         """Get idle status for all customers."""
-        now = time.time()
+        now = time.monotonic()
         status = {}
         for customer_name, customer in self._customers.items():
             idle_seconds = now - customer.last_accessed
@@ -710,7 +925,13 @@ class MCPContainerManager:
         }
 
 
-# Singleton accessor
+# Global singleton
+_container_manager: Optional[MCPContainerManager] = None
+
+
 def get_container_manager() -> MCPContainerManager:
-    """Get the singleton container manager instance."""
-    return MCPContainerManager()
+    """Get or create the global container manager."""
+    global _container_manager
+    if _container_manager is None:
+        _container_manager = MCPContainerManager()
+    return _container_manager
@@ -0,0 +1,154 @@
+"""
+Numeric kernels for the anomaly detectors.
+
+The scan kernel computes, in one call over a 1-D array of values, the
+statistics and per-point scores every requested detector needs; the
+detectors then only compare scores against their thresholds. The batch
+kernel Z-scores many series at once, spreading them across cores. The
+kernels are compiled with Numba when it is installed; without it the same
+functions run as plain NumPy array code (the batch loop serially).
+
+The per-point score passes read a float32 copy of the values, halving the
+memory they scan; the statistics that get reported (mean, stdev, quartiles,
+MAD) come from the float64 values. The batch kernel takes float32 rows and
+still accumulates sums and variances in float64.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+# Numba is optional - the kernels run as NumPy code without it
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    njit = None  # type: ignore
+    prange = range
+    NUMBA_AVAILABLE = False
+
+
+def _jit(fn):
+    """Compile a kernel with Numba (cached on disk) when available."""
+    if NUMBA_AVAILABLE:
+        return njit(cache=True)(fn)
+    return fn
+
+
+def _jit_parallel(fn):
+    """Compile a kernel whose prange loops run in parallel, when Numba is available."""
+    if NUMBA_AVAILABLE:
+        return njit(parallel=True, cache=True)(fn)
+    return fn
+
+
+def _mean_stdev_two_pass(values):
+    """Return (mean, sample stdev) with NumPy reductions (mean first, then squared deviations)."""
+    mean = values.mean(dtype=np.float64)
+    return mean, np.sqrt(((values - mean) ** 2).sum(dtype=np.float64) / (values.shape[0] - 1))
+
+
+def _mean_stdev_welford(values):
+    """Return (mean, sample stdev) in one numerically stable pass (Welford's algorithm)."""
+    mean = 0.0
+    m2 = 0.0
+    for i in range(values.shape[0]):
+        delta = values[i] - mean
+        mean += delta / (i + 1)
+        m2 += delta * (values[i] - mean)
+    return mean, np.sqrt(m2 / (values.shape[0] - 1))
+
+
+# Welford's single loop only pays off compiled; NumPy's two reductions are faster interpreted
+mean_stdev = _jit(_mean_stdev_welford) if NUMBA_AVAILABLE else _mean_stdev_two_pass
+
+
+@_jit
+def scan_kernel(values, scan_values, zscore, quartiles, mad, rate_change):
+    """
+    Score a series for the requested detectors in one call.
+
+    values holds the points as float64 and scan_values the same points as
+    float32. Returns (stats, z_scores, mad_scores, rate_changes), where
+    stats holds [mean, stdev, q1, median, q3, mad]. The score arrays of
+    detectors that were not requested, or whose spread is zero, are empty;
+    z_scores and rate_changes are float32. rate_changes[i] compares point
+    i + 1 with point i and is zero after a zero value.
+    """
+    stats = np.zeros(6)
+    z_scores = np.empty(0, dtype=np.float32)
+    mad_scores = np.empty(0)
+    rate_changes = np.empty(0, dtype=np.float32)
+
+    if zscore:
+        mean, stdev = mean_stdev(values)
+        stats[0] = mean
+        stats[1] = stdev
+        if stdev > 0:
+            z_scores = np.abs(scan_values - np.float32(mean)) / np.float32(stdev)
+
+    if quartiles or mad:
+        # Median and both quartiles from a single partial sort
+        q = np.quantile(values, np.array([0.25, 0.5, 0.75]))
+        stats[2] = q[0]
+        stats[3] = q[1]
+        stats[4] = q[2]
+        if mad:
+            deviations = np.abs(values - q[1])
+            spread = np.median(deviations)
+            if spread == 0:
+                # Fall back to the mean absolute deviation
+                spread = deviations.mean()
+            stats[5] = spread
+            if spread > 0:
+                mad_scores = 0.6745 * deviations / spread
+
+    if rate_change:
+        previous = scan_values[:-1]
+        nonzero = previous != 0
+        rate_changes = np.where(
+            nonzero,
+            np.abs(scan_values[1:] - previous) / np.where(nonzero, np.abs(previous), np.float32(1.0)),
+            np.float32(0.0)
+        )
+
+    return stats, z_scores, mad_scores, rate_changes
+
+
+@_jit_parallel
+def zscore_batch(values, lengths, threshold):
+    """
+    Z-score every row of a padded (series, points) matrix, one row per thread.
+
+    lengths[i] is the number of real points in row i; rows with fewer than
+    three points or no spread are skipped. Returns (series_idx, point_idx,
+    means, stdevs), the first two listing the points beyond threshold.
+    """
+    means = np.zeros(values.shape[0])
+    stdevs = np.zeros(values.shape[0])
+    hits = np.zeros(values.shape, dtype=np.bool_)
+
+    for i in prange(values.shape[0]):
+        n = lengths[i]
+        if n < 3:
+            continue
+        row = values[i, :n]
+        mean, stdev = mean_stdev(row)
+        means[i] = mean
+        stdevs[i] = stdev
+        if stdev > 0:
+            hits[i, :n] = np.abs(row.astype(np.float64) - mean) / stdev > threshold
+
+    series_idx, point_idx = np.nonzero(hits)
+    return series_idx, point_idx, means, stdevs
+
+
+def _warm_up() -> None:
+    """Compile the kernels once at import so the first detection isn't delayed."""
+    sample = np.array([1.0, 2.0, 3.0, 4.0])
+    scan_kernel(sample, sample.astype(np.float32), True, True, True, True)
+    zscore_batch(sample.astype(np.float32).reshape(1, -1), np.array([sample.shape[0]]), 3.0)
+    mean_stdev(sample)
+
+
+if NUMBA_AVAILABLE:
+    _warm_up()
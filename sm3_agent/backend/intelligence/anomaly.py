@@ -5,19 +5,28 @@ Provides multiple detection methods: statistical, pattern-based, and ML-based.
 """
 from __future__ import annotations
 
-import statistics
-from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone, tzinfo
+from itertools import groupby
+from operator import attrgetter
+from typing import Any, Collection, Dict, List, Optional, Tuple
 
 import numpy as np
 
+from backend.intelligence._anomaly_kernels import mean_stdev, scan_kernel, zscore_batch
 from backend.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Severity ordering: listing order (most severe first) and score (higher is more severe)
+_SEV_ORDER = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+_SEV_SCORE = {"critical": 4, "high": 3, "medium": 2, "low": 1}
 
-@dataclass
+# Share of the spectrum the dominant frequency needs to count as seasonal
+_SEASONALITY_MIN_CONFIDENCE = 0.1
+
+
+@dataclass(slots=True)
 class Anomaly:
     """Represents a detected anomaly."""
 
@@ -32,7 +41,7 @@ class Anomaly:
     confidence: float  # 0-1
 
 
-@dataclass
+@dataclass(slots=True)
 class TimeSeriesPoint:
     """Single time series data point."""
 
@@ -40,6 +49,66 @@ class TimeSeriesPoint:
     value: float
 
 
+@dataclass
+class TimeSeries:
+    """
+    Time series stored as parallel arrays (structure of arrays).
+
+    The detectors scan the contiguous values array without touching the
+    timestamps, which are only read for the points flagged as anomalies.
+    datetime64 has no time zone, so time zone aware timestamps are stored
+    in UTC and tz is put back on the ones reported.
+    """
+
+    timestamps: np.ndarray  # datetime64[ns], UTC when tz is set
+    values: np.ndarray  # float64, for the statistics and values reported
+    tz: Optional[tzinfo] = None
+    # float32 copy for the per-point score scans (thresholds don't need double precision)
+    scan_values: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.scan_values = self.values.astype(np.float32)
+
+    @classmethod
+    def from_points(cls, data: List[TimeSeriesPoint]) -> TimeSeries:
+        """Convert a list of time series points, copying each field once."""
+        tz = data[0].timestamp.tzinfo if data else None
+        if tz is None:
+            timestamps = [p.timestamp for p in data]
+        else:
+            timestamps = [p.timestamp.astimezone(timezone.utc).replace(tzinfo=None) for p in data]
+        return cls(
+            timestamps=np.array(timestamps, dtype="datetime64[ns]"),
+            values=np.fromiter((p.value for p in data), dtype=np.float64, count=len(data)),
+            tz=tz,
+        )
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def timestamp_at(self, index: int) -> datetime:
+        """Get the timestamp of one point as a datetime, in the series' time zone."""
+        timestamp = self.timestamps[index].astype("datetime64[us]").item()
+        if self.tz is None:
+            return timestamp
+        return timestamp.replace(tzinfo=timezone.utc).astimezone(self.tz)
+
+
+@dataclass
+class SeriesScan:
+    """Statistics and per-point scores from one scan of a series' values."""
+
+    mean: float
+    stdev: float
+    q1: float
+    median: float
+    q3: float
+    mad: float
+    z_scores: np.ndarray
+    mad_scores: np.ndarray
+    rate_changes: np.ndarray  # rate_changes[i] compares point i + 1 with point i
+
+
 class AnomalyDetector:
     """
     Multi-method anomaly detection for time series data.
@@ -75,39 +144,130 @@ class AnomalyDetector:
             logger.warning(f"Insufficient data for anomaly detection: {len(data) if data else 0} points")
             return []
 
+        return self.detect_anomalies_soa(TimeSeries.from_points(data), metric_name, methods)
+
+    def detect_anomalies_soa(
+        self,
+        data: TimeSeries,
+        metric_name: str,
+        methods: List[str] = None
+    ) -> List[Anomaly]:
+        """
+        Detect anomalies in a time series already held as parallel arrays.
+
+        Args:
+            data: Timestamps and values of the series
+            metric_name: Name of the metric being analyzed
+            methods: List of detection methods to use (default: all)
+
+        Returns:
+            List of detected anomalies
+        """
+        if len(data) < 3:
+            logger.warning(f"Insufficient data for anomaly detection: {len(data)} points")
+            return []
+
         if methods is None:
             methods = ["zscore", "iqr", "rate_change"]
 
-        all_anomalies = []
+        all_anomalies = self._detect_all(data, metric_name, methods)
+
+        # Deduplicate and sort by severity
+        all_anomalies = self._deduplicate_anomalies(all_anomalies)
+        all_anomalies.sort(key=lambda a: (_SEV_ORDER[a.severity], -a.confidence))
+
+        logger.info(f"Detected {len(all_anomalies)} anomalies in {metric_name}")
+        return all_anomalies
+
+    def detect_anomalies_batch(
+        self,
+        series: Dict[str, TimeSeries],
+        threshold: float = 3.0
+    ) -> Dict[str, List[Anomaly]]:
+        """
+        Detect Z-score anomalies in many metrics at once.
+
+        The series are padded into one matrix and scanned in parallel, one
+        metric per thread when Numba is installed. The statistics of metrics
+        with anomalies are then recomputed from their float64 values.
+
+        Args:
+            series: Time series in parallel-array form, by metric name
+            threshold: Number of standard deviations beyond which a point is anomalous
+
+        Returns:
+            Anomalies by metric name, most severe first
+        """
+        names = list(series)
+        results: Dict[str, List[Anomaly]] = {name: [] for name in names}
+        if not names:
+            return results
+
+        lengths = np.fromiter((len(series[name]) for name in names), dtype=np.int64, count=len(names))
+        values = np.zeros((len(names), int(lengths.max())), dtype=np.float32)
+        for row, name in enumerate(names):
+            values[row, :lengths[row]] = series[name].scan_values
+
+        series_idx, point_idx, _, _ = zscore_batch(values, lengths, threshold)
+
+        stats: Dict[int, Tuple[float, float]] = {}
+        for row, i in zip(series_idx.tolist(), point_idx.tolist()):
+            name = names[row]
+            if row not in stats:
+                mean, stdev = mean_stdev(series[name].values)
+                stats[row] = float(mean), float(stdev)
+            mean, stdev = stats[row]
+            results[name].append(self._zscore_anomaly(series[name], i, name, mean, stdev, threshold))
+
+        for anomalies in results.values():
+            anomalies.sort(key=lambda a: (_SEV_ORDER[a.severity], -a.confidence))
+
+        logger.info(f"Detected {len(series_idx)} anomalies across {len(names)} metrics")
+        return results
+
+    def _scan(self, data: TimeSeries, methods: Collection[str]) -> SeriesScan:
+        """Compute what the given detection methods need in a single kernel call."""
+        stats, z_scores, mad_scores, rate_changes = scan_kernel(
+            data.values,
+            data.scan_values,
+            "zscore" in methods,
+            "iqr" in methods,
+            "mad" in methods,
+            "rate_change" in methods,
+        )
+        mean, stdev, q1, median, q3, mad = stats.tolist()
+        return SeriesScan(mean, stdev, q1, median, q3, mad, z_scores, mad_scores, rate_changes)
+
+    def _detect_all(
+        self,
+        data: TimeSeries,
+        metric_name: str,
+        methods: Collection[str]
+    ) -> List[Anomaly]:
+        """Run the given detection methods against one shared scan of the values."""
+        scan = self._scan(data, methods)
+        anomalies = []
 
-        # Apply each detection method
         if "zscore" in methods:
-            all_anomalies.extend(self._detect_zscore(data, metric_name))
+            anomalies.extend(self._detect_zscore(data, metric_name, scan=scan))
 
         if "iqr" in methods:
-            all_anomalies.extend(self._detect_iqr(data, metric_name))
+            anomalies.extend(self._detect_iqr(data, metric_name, scan=scan))
 
         if "mad" in methods:
-            all_anomalies.extend(self._detect_mad(data, metric_name))
+            anomalies.extend(self._detect_mad(data, metric_name, scan=scan))
 
         if "rate_change" in methods:
-            all_anomalies.extend(self._detect_rate_change(data, metric_name))
+            anomalies.extend(self._detect_rate_change(data, metric_name, scan=scan))
 
-        # Deduplicate and sort by severity
-        all_anomalies = self._deduplicate_anomalies(all_anomalies)
-        all_anomalies.sort(key=lambda a: (
-            {"critical": 0, "high": 1, "medium": 2, "low": 3}[a.severity],
-            -a.confidence
-        ))
-
-        logger.info(f"Detected {len(all_anomalies)} anomalies in {metric_name}")
-        return all_anomalies
+        return anomalies
 
     def _detect_zscore(
         self,
-        data: List[TimeSeriesPoint],
+        data: TimeSeries,
         metric_name: str,
-        threshold: float = 3.0
+        threshold: float = 3.0,
+        scan: Optional[SeriesScan] = None
     ) -> List[Anomaly]:
         """
         Detect anomalies using Z-score method.
@@ -115,48 +275,61 @@ class AnomalyDetector:
         Points beyond threshold standard deviations are anomalies.
         """
         anomalies = []
-        values = [p.value for p in data]
 
-        if len(values) < 3:
+        if len(data) < 3:
             return anomalies
 
-        mean = statistics.mean(values)
-        stdev = statistics.stdev(values)
+        if scan is None:
+            scan = self._scan(data, ("zscore",))
+        mean, stdev = scan.mean, scan.stdev
 
         if stdev == 0:
             return anomalies
 
-        for point in data:
-            z_score = abs((point.value - mean) / stdev)
-
-            if z_score > threshold:
-                severity = self._calculate_severity(z_score, threshold, threshold * 2)
-                confidence = min(z_score / (threshold * 3), 1.0)
-
-                anomalies.append(Anomaly(
-                    timestamp=point.timestamp,
-                    metric_name=metric_name,
-                    value=point.value,
-                    expected_value=mean,
-                    deviation=point.value - mean,
-                    severity=severity,
-                    method="zscore",
-                    context={
-                        "z_score": z_score,
-                        "mean": mean,
-                        "stdev": stdev,
-                        "threshold": threshold
-                    },
-                    confidence=confidence
-                ))
+        # Build anomalies for the hits only
+        for i in np.flatnonzero(scan.z_scores > threshold).tolist():
+            anomalies.append(self._zscore_anomaly(data, i, metric_name, mean, stdev, threshold))
 
         return anomalies
 
+    def _zscore_anomaly(
+        self,
+        data: TimeSeries,
+        index: int,
+        metric_name: str,
+        mean: float,
+        stdev: float,
+        threshold: float
+    ) -> Anomaly:
+        """Build the anomaly for a point beyond the Z-score threshold."""
+        value = float(data.values[index])
+        z_score = abs(value - mean) / stdev
+        severity = self._calculate_severity(z_score, threshold, threshold * 2)
+        confidence = min(z_score / (threshold * 3), 1.0)
+
+        return Anomaly(
+            timestamp=data.timestamp_at(index),
+            metric_name=metric_name,
+            value=value,
+            expected_value=mean,
+            deviation=value - mean,
+            severity=severity,
+            method="zscore",
+            context={
+                "z_score": z_score,
+                "mean": mean,
+                "stdev": stdev,
+                "threshold": threshold
+            },
+            confidence=confidence
+        )
+
     def _detect_iqr(
         self,
-        data: List[TimeSeriesPoint],
+        data: TimeSeries,
         metric_name: str,
-        multiplier: float = 1.5
+        multiplier: float = 1.5,
+        scan: Optional[SeriesScan] = None
     ) -> List[Anomaly]:
         """
         Detect anomalies using Interquartile Range (IQR) method.
@@ -164,16 +337,14 @@ class AnomalyDetector:
         More robust to outliers than Z-score.
         """
         anomalies = []
-        values = sorted([p.value for p in data])
 
-        if len(values) < 4:
+        if len(data) < 4:
             return anomalies
 
-        # Calculate quartiles
-        q1_idx = len(values) // 4
-        q3_idx = (3 * len(values)) // 4
-        q1 = values[q1_idx]
-        q3 = values[q3_idx]
+        # Linearly interpolated quartiles (selected by partitioning, without a full sort)
+        if scan is None:
+            scan = self._scan(data, ("iqr",))
+        q1, q3, median = scan.q1, scan.q3, scan.median
         iqr = q3 - q1
 
         if iqr == 0:
@@ -182,51 +353,52 @@ class AnomalyDetector:
         lower_bound = q1 - (multiplier * iqr)
         upper_bound = q3 + (multiplier * iqr)
 
-        median = statistics.median(values)
-
-        for point in data:
-            if point.value < lower_bound or point.value > upper_bound:
-                # Calculate how far beyond bounds
-                if point.value < lower_bound:
-                    distance = lower_bound - point.value
-                    expected = lower_bound
-                else:
-                    distance = point.value - upper_bound
-                    expected = upper_bound
-
-                severity = self._calculate_severity(
-                    distance / iqr if iqr > 0 else 0,
-                    multiplier,
-                    multiplier * 2
-                )
-
-                confidence = min(distance / (iqr * 3), 1.0)
-
-                anomalies.append(Anomaly(
-                    timestamp=point.timestamp,
-                    metric_name=metric_name,
-                    value=point.value,
-                    expected_value=expected,
-                    deviation=point.value - median,
-                    severity=severity,
-                    method="iqr",
-                    context={
-                        "q1": q1,
-                        "q3": q3,
-                        "iqr": iqr,
-                        "lower_bound": lower_bound,
-                        "upper_bound": upper_bound
-                    },
-                    confidence=confidence
-                ))
+        # Compared in float64, so a flagged point is strictly beyond the bound reported
+        values = data.values
+        for i in np.flatnonzero((values < lower_bound) | (values > upper_bound)).tolist():
+            value = float(values[i])
+            # Calculate how far beyond bounds
+            if value < lower_bound:
+                distance = lower_bound - value
+                expected = lower_bound
+            else:
+                distance = value - upper_bound
+                expected = upper_bound
+
+            severity = self._calculate_severity(
+                distance / iqr if iqr > 0 else 0,
+                multiplier,
+                multiplier * 2
+            )
+
+            confidence = min(distance / (iqr * 3), 1.0)
+
+            anomalies.append(Anomaly(
+                timestamp=data.timestamp_at(i),
+                metric_name=metric_name,
+                value=value,
+                expected_value=expected,
+                deviation=value - median,
+                severity=severity,
+                method="iqr",
+                context={
+                    "q1": q1,
+                    "q3": q3,
+                    "iqr": iqr,
+                    "lower_bound": lower_bound,
+                    "upper_bound": upper_bound
+                },
+                confidence=confidence
+            ))
 
         return anomalies
 
     def _detect_mad(
         self,
-        data: List[TimeSeriesPoint],
+        data: TimeSeries,
         metric_name: str,
-        threshold: float = 3.5
+        threshold: float = 3.5,
+        scan: Optional[SeriesScan] = None
     ) -> List[Anomaly]:
         """
         Detect anomalies using Median Absolute Deviation (MAD).
@@ -234,57 +406,54 @@ class AnomalyDetector:
         Very robust to outliers.
         """
         anomalies = []
-        values = [p.value for p in data]
 
-        if len(values) < 3:
+        if len(data) < 3:
             return anomalies
 
-        median = statistics.median(values)
-        deviations = [abs(v - median) for v in values]
-        mad = statistics.median(deviations)
+        # The scan falls back to the mean absolute deviation when the MAD is zero
+        if scan is None:
+            scan = self._scan(data, ("mad",))
+        median, mad = scan.median, scan.mad
 
         if mad == 0:
-            # Use mean absolute deviation as fallback
-            mad = statistics.mean(deviations)
-            if mad == 0:
-                return anomalies
-
-        for point in data:
-            modified_z_score = 0.6745 * abs(point.value - median) / mad
-
-            if modified_z_score > threshold:
-                severity = self._calculate_severity(
-                    modified_z_score,
-                    threshold,
-                    threshold * 2
-                )
-
-                confidence = min(modified_z_score / (threshold * 2), 1.0)
-
-                anomalies.append(Anomaly(
-                    timestamp=point.timestamp,
-                    metric_name=metric_name,
-                    value=point.value,
-                    expected_value=median,
-                    deviation=point.value - median,
-                    severity=severity,
-                    method="mad",
-                    context={
-                        "modified_z_score": modified_z_score,
-                        "median": median,
-                        "mad": mad,
-                        "threshold": threshold
-                    },
-                    confidence=confidence
-                ))
+            return anomalies
+
+        for i in np.flatnonzero(scan.mad_scores > threshold).tolist():
+            value = float(data.values[i])
+            modified_z_score = float(scan.mad_scores[i])
+            severity = self._calculate_severity(
+                modified_z_score,
+                threshold,
+                threshold * 2
+            )
+
+            confidence = min(modified_z_score / (threshold * 2), 1.0)
+
+            anomalies.append(Anomaly(
+                timestamp=data.timestamp_at(i),
+                metric_name=metric_name,
+                value=value,
+                expected_value=median,
+                deviation=value - median,
+                severity=severity,
+                method="mad",
+                context={
+                    "modified_z_score": modified_z_score,
+                    "median": median,
+                    "mad": mad,
+                    "threshold": threshold
+                },
+                confidence=confidence
+            ))
 
         return anomalies
 
     def _detect_rate_change(
         self,
-        data: List[TimeSeriesPoint],
+        data: TimeSeries,
         metric_name: str,
-        threshold: float = 0.5
+        threshold: float = 0.5,
+        scan: Optional[SeriesScan] = None
     ) -> List[Anomaly]:
         """
         Detect anomalies based on rate of change.
@@ -296,36 +465,34 @@ class AnomalyDetector:
         if len(data) < 2:
             return anomalies
 
-        # Calculate rate of change between consecutive points
-        for i in range(1, len(data)):
-            prev_point = data[i - 1]
-            curr_point = data[i]
-
-            if prev_point.value == 0:
-                continue
-
-            # Percent change
-            pct_change = abs((curr_point.value - prev_point.value) / prev_point.value)
-
-            if pct_change > threshold:
-                severity = self._calculate_severity(pct_change, threshold, threshold * 3)
-                confidence = min(pct_change / (threshold * 5), 1.0)
-
-                anomalies.append(Anomaly(
-                    timestamp=curr_point.timestamp,
-                    metric_name=metric_name,
-                    value=curr_point.value,
-                    expected_value=prev_point.value,
-                    deviation=curr_point.value - prev_point.value,
-                    severity=severity,
-                    method="rate_change",
-                    context={
-                        "percent_change": pct_change * 100,
-                        "previous_value": prev_point.value,
-                        "threshold": threshold * 100
-                    },
-                    confidence=confidence
-                ))
+        # Percent change against the previous point, for all pairs at once
+        if scan is None:
+            scan = self._scan(data, ("rate_change",))
+
+        values = data.values
+        for pair in np.flatnonzero(scan.rate_changes > threshold).tolist():
+            i = pair + 1
+            prev_value = float(values[i - 1])
+            curr_value = float(values[i])
+            pct_change = abs(curr_value - prev_value) / abs(prev_value)
+            severity = self._calculate_severity(pct_change, threshold, threshold * 3)
+            confidence = min(pct_change / (threshold * 5), 1.0)
+
+            anomalies.append(Anomaly(
+                timestamp=data.timestamp_at(i),
+                metric_name=metric_name,
+                value=curr_value,
+                expected_value=prev_value,
+                deviation=curr_value - prev_value,
+                severity=severity,
+                method="rate_change",
+                context={
+                    "percent_change": pct_change * 100,
+                    "previous_value": prev_value,
+                    "threshold": threshold * 100
+                },
+                confidence=confidence
+            ))
 
         return anomalies
 
@@ -354,24 +521,11 @@ class AnomalyDetector:
         if not anomalies:
             return []
 
-        # Group by timestamp
-        grouped: Dict[datetime, List[Anomaly]] = {}
-        for anomaly in anomalies:
-            if anomaly.timestamp not in grouped:
-                grouped[anomaly.timestamp] = []
-            grouped[anomaly.timestamp].append(anomaly)
-
-        # Keep best anomaly for each timestamp
-        deduplicated = []
-        for timestamp, group in grouped.items():
-            # Sort by confidence and severity
-            best = max(group, key=lambda a: (
-                a.confidence,
-                {"critical": 4, "high": 3, "medium": 2, "low": 1}[a.severity]
-            ))
-            deduplicated.append(best)
+        # Order each timestamp's anomalies best first (highest confidence, then severity)
+        ordered = sorted(anomalies, key=lambda a: (a.timestamp, -a.confidence, -_SEV_SCORE[a.severity]))
 
-        return deduplicated
+        # Keep the best anomaly for each timestamp
+        return [next(group) for _, group in groupby(ordered, key=attrgetter("timestamp"))]
 
     def analyze_metric(
         self,
@@ -426,16 +580,16 @@ class PatternDetector:
         if len(data) < 3:
             return {"trend": "unknown", "confidence": 0}
 
-        values = [p.value for p in data]
+        y = np.fromiter((p.value for p in data), dtype=np.float64, count=len(data))
 
         # Simple linear regression
-        n = len(values)
-        x = list(range(n))
-        x_mean = sum(x) / n
-        y_mean = sum(values) / n
+        x = np.arange(len(y), dtype=np.float64)
+        x_dev = x - x.mean()
+        y_mean = y.mean()
+        y_dev = y - y_mean
 
-        numerator = sum((x[i] - x_mean) * (values[i] - y_mean) for i in range(n))
-        denominator = sum((x[i] - x_mean) ** 2 for i in range(n))
+        numerator = float(np.dot(x_dev, y_dev))
+        denominator = float(np.dot(x_dev, x_dev))
 
         if denominator == 0:
             slope = 0
@@ -451,9 +605,9 @@ class PatternDetector:
             trend = "decreasing"
 
         # Calculate confidence based on R-squared
-        y_pred = [slope * xi + (y_mean - slope * x_mean) for xi in x]
-        ss_tot = sum((values[i] - y_mean) ** 2 for i in range(n))
-        ss_res = sum((values[i] - y_pred[i]) ** 2 for i in range(n))
+        residuals = y_dev - slope * x_dev
+        ss_tot = float(np.dot(y_dev, y_dev))
+        ss_res = float(np.dot(residuals, residuals))
 
         r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
 
@@ -465,24 +619,30 @@ class PatternDetector:
 
     def detect_seasonality(self, data: List[TimeSeriesPoint]) -> Dict[str, Any]:
         """
-        Detect seasonality patterns.
+        Detect seasonality patterns from the dominant frequency of the series.
 
         Returns:
-            Seasonality information
+            Seasonality information, with the period in points
         """
-        # Simplified seasonality detection
-        # Would use FFT or autocorrelation in production
         if len(data) < 24:  # Need at least 24 points
             return {"has_seasonality": False, "period": None}
 
-        values = [p.value for p in data]
+        y = np.fromiter((p.value for p in data), dtype=np.float64, count=len(data))
+        y -= y.mean()
+
+        # Dominant frequency of the centred series, ignoring the DC bin
+        spectrum = np.abs(np.fft.rfft(y))
+        total = float(spectrum[1:].sum())
+        if total == 0:
+            return {"has_seasonality": False, "period": None, "confidence": 0}
+
+        peak = int(spectrum[1:].argmax()) + 1
+        confidence = float(spectrum[peak]) / total
 
-        # Check for repeating patterns
-        # This is a simplified version
         return {
-            "has_seasonality": False,
-            "period": None,
-            "confidence": 0
+            "has_seasonality": confidence > _SEASONALITY_MIN_CONFIDENCE,
+            "period": len(y) / peak,  # in points
+            "confidence": confidence
         }
 
 
@@ -2,21 +2,27 @@ from __future__ import annotations
 
 from typing import Any, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ChatRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     message: str = Field(..., description="User message")
     session_id: Optional[str] = Field(None, description="Conversation session identifier")
 
 
 class ChatResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     message: str
     tool_calls: List[Any] = Field(default_factory=list)
     suggestions: List[str] = Field(default_factory=list, description="Suggested follow-up questions")
 
 
 class AgentResult(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     message: str
     tool_calls: List[Any] = Field(default_factory=list)
     suggestions: List[str] = Field(default_factory=list, description="Suggested follow-up questions")
@@ -8,17 +8,25 @@ the expected configuration and validates connectivity.
 from __future__ import annotations
 
 import asyncio
+from collections import Counter
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, ValuesView
 from enum import Enum
 
+import httpx
+
 from backend.app.config import get_settings
 from backend.app.mcp_servers import get_mcp_server_manager
 from backend.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Shared client settings for AlertManager validation requests
+VALIDATION_TIMEOUT = 10.0
+VALIDATION_LIMITS = httpx.Limits(max_keepalive_connections=50)
+
 
 class WebhookStatus(Enum):
     """Webhook registration status."""
@@ -29,7 +37,7 @@ class WebhookStatus(Enum):
     NOT_CONFIGURED = "not_configured"  # Webhook not set up in AlertManager
 
 
-@dataclass
+@dataclass(slots=True)
 class CustomerWebhook:
     """Webhook configuration for a customer."""
     customer_name: str
@@ -43,7 +51,7 @@ class CustomerWebhook:
     config_instructions: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class WebhookValidationResult:
     """Result of webhook validation."""
     customer_name: str
@@ -72,6 +80,7 @@ class WebhookManager:
         self._settings = get_settings()
         self._initialized = False
         self._lock = asyncio.Lock()
+        self._http: Optional[httpx.AsyncClient] = None
     
     @classmethod
     def get_instance(cls) -> "WebhookManager":
@@ -91,8 +100,10 @@ class WebhookManager:
         base = self._get_webhook_base_url()
         return f"{base}/api/alerts/ingest/{customer_name}"
     
-    def _build_config_instructions(self, customer_name: str, webhook_url: str) -> str:
-        """Build AlertManager configuration instructions."""
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _build_config_instructions(customer_name: str, webhook_url: str) -> str:
+        """Build AlertManager configuration instructions (cached per customer and URL)."""
         return f"""# AlertManager Webhook Configuration for {customer_name}
 # Add this to your alertmanager.yml receivers section:
 
@@ -118,6 +129,23 @@ route:
       continue: true
 """
     
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it on first use."""
+        # No await between the check and the assignment, so no lock is needed
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=VALIDATION_TIMEOUT,
+                verify=False,
+                limits=VALIDATION_LIMITS
+            )
+        return self._http
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP client."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
     async def initialize(self) -> None:
         """Initialize webhook manager with all customer configurations."""
         async with self._lock:
@@ -168,11 +196,15 @@ route:
         """Get all webhook configurations."""
         return list(self._webhooks.values())
     
+    def iter_webhooks(self) -> ValuesView[CustomerWebhook]:
+        """Get a live view of all webhook configurations, without copying them."""
+        return self._webhooks.values()
+    
     def record_alert_received(self, customer_name: str) -> None:
         """Record that an alert was received for a customer."""
         webhook = self._webhooks.get(customer_name)
         if webhook:
-            webhook.last_alert_received = datetime.utcnow()
+            webhook.last_alert_received = datetime.now(timezone.utc)
             webhook.total_alerts_received += 1
             webhook.status = WebhookStatus.CONFIGURED
             webhook.last_error = None
@@ -202,51 +234,47 @@ route:
             )
         
         try:
-            import httpx
+            # Try to reach AlertManager status endpoint (API v2)
+            url = f"{webhook.alertmanager_url}/api/v2/status"
+            response = await self._get_http_client().get(url)
+            
+            webhook.last_check = datetime.now(timezone.utc)
             
-            # Try to reach AlertManager status endpoint
-            async with httpx.AsyncClient(timeout=10.0, verify=False) as client:
-                # AlertManager API v2 status endpoint
-                url = f"{webhook.alertmanager_url}/api/v2/status"
-                response = await client.get(url)
+            if response.status_code == 200:
+                # If we've received alerts, it's configured
+                is_configured = webhook.total_alerts_received > 0
+                webhook.status = WebhookStatus.CONFIGURED if is_configured else WebhookStatus.PENDING
+                
+                return WebhookValidationResult(
+                    customer_name=customer_name,
+                    is_valid=True,
+                    alertmanager_reachable=True,
+                    webhook_configured=is_configured
+                )
+            elif response.status_code in (401, 403):
+                # Auth required - AlertManager is reachable but we can't access API directly
+                # This is OK - the webhook works in the opposite direction (AM calls us)
+                is_configured = webhook.total_alerts_received > 0
+                webhook.status = WebhookStatus.CONFIGURED if is_configured else WebhookStatus.PENDING
                 
-                webhook.last_check = datetime.utcnow()
+                return WebhookValidationResult(
+                    customer_name=customer_name,
+                    is_valid=True,
+                    alertmanager_reachable=True,
+                    webhook_configured=is_configured,
+                    error=f"AlertManager reachable (auth required for API access)"
+                )
+            else:
+                webhook.status = WebhookStatus.ERROR
+                webhook.last_error = f"AlertManager returned {response.status_code}"
+                return WebhookValidationResult(
+                    customer_name=customer_name,
+                    is_valid=False,
+                    alertmanager_reachable=False,
+                    webhook_configured=False,
+                    error=f"AlertManager returned {response.status_code}"
+                )
                 
-                if response.status_code == 200:
-                    # If we've received alerts, it's configured
-                    is_configured = webhook.total_alerts_received > 0
-                    webhook.status = WebhookStatus.CONFIGURED if is_configured else WebhookStatus.PENDING
-                    
-                    return WebhookValidationResult(
-                        customer_name=customer_name,
-                        is_valid=True,
-                        alertmanager_reachable=True,
-                        webhook_configured=is_configured
-                    )
-                elif response.status_code in (401, 403):
-                    # Auth required - AlertManager is reachable but we can't access API directly
-                    # This is OK - the webhook works in the opposite direction (AM calls us)
-                    is_configured = webhook.total_alerts_received > 0
-                    webhook.status = WebhookStatus.CONFIGURED if is_configured else WebhookStatus.PENDING
-                    
-                    return WebhookValidationResult(
-                        customer_name=customer_name,
-                        is_valid=True,
-                        alertmanager_reachable=True,
-                        webhook_configured=is_configured,
-                        error=f"AlertManager reachable (auth required for API access)"
-                    )
-                else:
-                    webhook.status = WebhookStatus.ERROR
-                    webhook.last_error = f"AlertManager returned {response.status_code}"
-                    return WebhookValidationResult(
-                        customer_name=customer_name,
-                        is_valid=False,
-                        alertmanager_reachable=False,
-                        webhook_configured=False,
-                        error=f"AlertManager returned {response.status_code}"
-                    )
-                    
         except Exception as e:
             webhook.status = WebhookStatus.ERROR
             webhook.last_error = str(e)
@@ -259,26 +287,35 @@ route:
             )
     
     async def validate_all(self) -> List[WebhookValidationResult]:
-        """Validate all customer AlertManager connections."""
-        results = []
-        for customer_name in self._webhooks:
-            result = await self.validate_alertmanager(customer_name)
-            results.append(result)
-        return results
+        """Validate all customer AlertManager connections concurrently."""
+        customer_names = list(self._webhooks)
+        results = await asyncio.gather(
+            *(self.validate_alertmanager(name) for name in customer_names),
+            return_exceptions=True
+        )
+        return [
+            result if not isinstance(result, BaseException) else WebhookValidationResult(
+                customer_name=customer_name,
+                is_valid=False,
+                alertmanager_reachable=False,
+                webhook_configured=False,
+                error=str(result)
+            )
+            for customer_name, result in zip(customer_names, results)
+        ]
     
     def get_status_summary(self) -> Dict[str, Any]:
         """Get summary of all webhook statuses."""
         total = len(self._webhooks)
-        by_status = {}
-        for webhook in self._webhooks.values():
-            status = webhook.status.value
-            by_status[status] = by_status.get(status, 0) + 1
-        
-        recent_alerts = sum(1 for w in self._webhooks.values() if w.total_alerts_received > 0)
+        by_status: Counter[str] = Counter()
+        recent_alerts = 0
+        for webhook in self.iter_webhooks():
+            by_status[webhook.status.value] += 1
+            recent_alerts += webhook.total_alerts_received > 0
         
         return {
             "total_customers": total,
-            "by_status": by_status,
+            "by_status": dict(by_status),
             "customers_with_alerts": recent_alerts,
             "webhook_base_url": self._get_webhook_base_url()
         }
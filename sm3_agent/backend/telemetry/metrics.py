@@ -1,6 +1,8 @@
 """
 Prometheus metrics for monitoring agent performance and usage.
 """
+import time
+
 from prometheus_client import Counter, Histogram, Gauge, Info, generate_latest, CONTENT_TYPE_LATEST
 from backend.utils.logger import get_logger
 
@@ -10,16 +12,22 @@ logger = get_logger(__name__)
 # Chat Metrics
 # ============================================================================
 
+# Not labelled by session: one child per session would grow without bound
 chat_requests_total = Counter(
     'agent_chat_requests_total',
     'Total number of chat requests',
-    ['session_id', 'status']  # status: success, error
+    ['status']  # status: success, error
 )
 
+# Children for every status, resolved once instead of on each request
+chat_requests_by_status = {
+    status: chat_requests_total.labels(status=status)
+    for status in ('success', 'error')
+}
+
 chat_duration_seconds = Histogram(
     'agent_chat_duration_seconds',
     'Chat request processing time in seconds',
-    ['session_id'],
     buckets=(0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
 )
 
@@ -101,10 +109,17 @@ sessions_total = Counter(
     'Total number of sessions created'
 )
 
+# Aggregate across sessions: a session_id label would add a child per session
 session_messages_total = Counter(
     'agent_session_messages_total',
-    'Total messages per session',
-    ['session_id']
+    'Total chat messages across all sessions'
+)
+
+# Per-session message counts, observed once when a session is closed
+session_message_count = Histogram(
+    'agent_session_message_count',
+    'Number of messages in a session, observed when it closes',
+    buckets=(1, 10, 100, 1000)
 )
 
 # ============================================================================
@@ -187,11 +202,25 @@ errors_total = Counter(
 # Helper Functions
 # ============================================================================
 
+# Seconds a rendered scrape is reused; matches a typical scrape interval
+METRICS_CACHE_TTL = 5.0
+
+# (expires_at, payload) of the last rendered scrape
+_metrics_cache = (float("-inf"), b"")
+
+# Cache eviction count seen at the previous update
+_last_cache_evictions = 0
+
 def update_cache_metrics(cache_stats: dict):
     """Update cache metrics from cache stats."""
+    global _last_cache_evictions
     cache_size.set(cache_stats.get('size', 0))
     cache_hit_rate.set(cache_stats.get('hit_rate_percent', 0) / 100)
-    # Evictions are cumulative, so we track the delta
+    # Evictions are cumulative, so add the delta since the last update in one step
+    evictions = cache_stats.get('evictions', 0)
+    if evictions > _last_cache_evictions:
+        cache_evictions_total.inc(evictions - _last_cache_evictions)
+    _last_cache_evictions = evictions
 
 def update_monitoring_metrics(status: dict):
     """Update monitoring system metrics."""
@@ -207,8 +236,14 @@ def set_agent_info(version: str, model: str, mcp_server: str):
     })
 
 def get_metrics():
-    """Get metrics in Prometheus format."""
-    return generate_latest()
+    """Get metrics in Prometheus format, rendering at most once per METRICS_CACHE_TTL."""
+    global _metrics_cache
+    now = time.monotonic()
+    expires_at, payload = _metrics_cache
+    if now >= expires_at:
+        payload = generate_latest()
+        _metrics_cache = (now + METRICS_CACHE_TTL, payload)
+    return payload
 
 def get_content_type():
     """Get Prometheus content type."""
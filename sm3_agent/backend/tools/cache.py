@@ -5,32 +5,269 @@ Provides TTL-based caching to reduce redundant API calls and improve response ti
 """
 from __future__ import annotations
 
+import asyncio
 import hashlib
-import json
+import heapq
+import itertools
+import logging
+import threading
 import time
-from typing import Any, Callable, Dict, Optional
-from functools import wraps
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
 
+import orjson
+
+from backend.app.config import get_settings
 from backend.utils.logger import get_logger
 
+# xxhash is optional - keys fall back to the standard library's BLAKE2b
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    xxhash = None  # type: ignore
+    XXHASH_AVAILABLE = False
+
 logger = get_logger(__name__)
 
+# (tool name, sorted (name, type, value) argument triples) - or, when any
+# argument is a nested dict/list, (tool name, hash of the sorted JSON)
+CacheKey = Tuple[str, Any]
+
+# Argument types that can go into a key as they are
+_KEY_PRIMITIVES = (str, int, float, bool, type(None))
+
+# Canonical JSON for nested arguments: keys sorted at every level
+_KEY_JSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+
+def _hash_key(data: bytes) -> str:
+    """128-bit non-cryptographic hex digest of a cache key."""
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class CacheEntry(NamedTuple):
+    """
+    Single cache entry with TTL.
+
+    Times are time.monotonic() readings. A plain tuple is cheaper to build
+    and smaller than a class instance; entries are replaced, never updated.
+    """
+
+    expires_at: float
+    created_at: float
+    value: Any
+    tool_name: str
+    arguments: Optional[Dict[str, Any]] = None  # kept for predicate invalidation
 
-class CacheEntry:
-    """Single cache entry with TTL."""
 
-    def __init__(self, value: Any, ttl: int):
-        self.value = value
-        self.expires_at = time.time() + ttl
-        self.created_at = time.time()
+class CacheShard:
+    """
+    One partition of the tool cache, guarded by its own lock.
+
+    Keeps its entries in LRU order, an expiry heap and a per-tool key index,
+    and counts its own hits, misses and evictions. Once full, a new key is
+    only admitted (evicting the LRU entry) if a TinyLFU-style doorkeeper has
+    seen it before, so one-off results don't push out repeatedly used ones.
+    """
+
+    # Doorkeeper size in bits; it is cleared once half of them are set
+    DOORKEEPER_BITS = 4096
+
+    def __init__(self, max_size: int, write_seq: Iterator[int]):
+        self.lock = threading.Lock()
+        self.max_size = max_size
 
-    def is_expired(self) -> bool:
-        """Check if entry has expired."""
-        return time.time() > self.expires_at
+        # Least recently used first: hits and writes move an entry to the end
+        self.entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
 
-    def age(self) -> float:
-        """Get age of cache entry in seconds."""
-        return time.time() - self.created_at
+        # (expires_at, write number, key) per write, soonest first; may hold
+        # stale triples for keys since overwritten or removed. The write
+        # number (shared by all shards) breaks ties so keys are never compared.
+        self.expiry_heap: List[Tuple[float, int, CacheKey]] = []
+        self.write_seq = write_seq
+        self.last_cleanup = float("-inf")
+
+        # Keys of each tool's entries, for invalidating a whole tool
+        self.by_tool: Dict[str, Set[CacheKey]] = {}
+
+        # One bit per key hash: set on the first write attempt while full
+        self.doorkeeper = bytearray(self.DOORKEEPER_BITS // 8)
+        self.doorkeeper_marks = 0
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejections = 0
+
+    def get(self, key: CacheKey, tool_name: str, now: float) -> Optional[Any]:
+        """Get a live entry's value, dropping the entry if it has expired."""
+        with self.lock:
+            entry = self.entries.get(key)
+
+            # Debug messages are only formatted when they will be emitted
+            if entry is None:
+                self.misses += 1
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Cache miss: {tool_name}")
+                return None
+
+            if now > entry.expires_at:
+                self.entries.pop(key, None)
+                self._unindex(key, entry)
+                self.misses += 1
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Cache expired: {tool_name}")
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Cache hit: {tool_name} (age: {now - entry.created_at:.1f}s)")
+            return entry.value
+
+    def put(
+        self,
+        key: CacheKey,
+        value: Any,
+        ttl: int,
+        tool_name: str,
+        now: float,
+        arguments: Optional[Dict[str, Any]] = None
+    ):
+        """Store a value, evicting if full; expired entries are left to the background sweep."""
+        with self.lock:
+            # Evict least recently used if a new key would exceed capacity,
+            # unless this is the first time the key has been seen
+            if key not in self.entries and len(self.entries) >= self.max_size:
+                if not self._admit(key):
+                    self.rejections += 1
+                    logger.debug(f"Not admitted on first sighting: {tool_name}")
+                    return
+                self._evict_lru()
+
+            entry = CacheEntry(now + ttl, now, value, tool_name, arguments)
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            self.by_tool.setdefault(tool_name, set()).add(key)
+            self._push_expiry(entry.expires_at, key)
+
+    def remove(self, key: CacheKey) -> bool:
+        """Remove one entry; returns whether it was cached."""
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                return False
+            self._unindex(key, entry)
+            return True
+
+    def remove_tool(
+        self, tool_name: str, predicate: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> int:
+        """
+        Remove entries of a tool; returns how many.
+
+        With a predicate, only entries whose arguments it accepts are removed,
+        along with any stored without their arguments.
+        """
+        with self.lock:
+            if predicate is None:
+                keys = self.by_tool.pop(tool_name, set())
+                for key in keys:
+                    del self.entries[key]
+                return len(keys)
+
+            removed = 0
+            for key in list(self.by_tool.get(tool_name, ())):
+                entry = self.entries[key]
+                if entry.arguments is None or predicate(entry.arguments):
+                    del self.entries[key]
+                    self._unindex(key, entry)
+                    removed += 1
+            return removed
+
+    def sweep(self, now: float, resolution: float) -> int:
+        """Remove expired entries; returns how many."""
+        with self.lock:
+            return self._sweep(now, resolution)
+
+    def next_expiry(self) -> Optional[float]:
+        """When the earliest recorded entry expires, or None if there is none."""
+        with self.lock:
+            return self.expiry_heap[0][0] if self.expiry_heap else None
+
+    def clear(self) -> int:
+        """Remove all entries; returns how many there were."""
+        with self.lock:
+            count = len(self.entries)
+            self.entries.clear()
+            self.expiry_heap.clear()
+            self.by_tool.clear()
+            return count
+
+    def _admit(self, key: CacheKey) -> bool:
+        """Check the doorkeeper for a key, marking it as seen (lock held)."""
+        # High bits: the low ones pick the shard, so they are alike within one
+        bit = (hash(key) >> 20) & (self.DOORKEEPER_BITS - 1)
+        byte, mask = bit >> 3, 1 << (bit & 7)
+        if self.doorkeeper[byte] & mask:
+            return True
+
+        self.doorkeeper[byte] |= mask
+        self.doorkeeper_marks += 1
+        if self.doorkeeper_marks >= self.DOORKEEPER_BITS // 2:
+            # Forget old sightings so admission follows recent traffic
+            self.doorkeeper = bytearray(len(self.doorkeeper))
+            self.doorkeeper_marks = 0
+        return False
+
+    def _evict_lru(self):
+        """Evict the least recently used entry (lock held)."""
+        if not self.entries:
+            return
+
+        lru_key, entry = self.entries.popitem(last=False)
+        self._unindex(lru_key, entry)
+        self.evictions += 1
+        logger.debug(f"Evicted cache entry: {lru_key}")
+
+    def _sweep(self, now: float, resolution: float) -> int:
+        """Pop the due part of the expiry heap, at most once per resolution (lock held)."""
+        if now - self.last_cleanup < resolution:
+            return 0
+        self.last_cleanup = now
+
+        removed = 0
+        heap = self.expiry_heap
+        while heap and heap[0][0] < now:
+            expires_at, _, key = heapq.heappop(heap)
+            entry = self.entries.get(key)
+            # Skip triples left behind by an overwrite or removal
+            if entry is not None and entry.expires_at == expires_at:
+                self.entries.pop(key, None)
+                self._unindex(key, entry)
+                removed += 1
+        return removed
+
+    def _unindex(self, key: CacheKey, entry: CacheEntry):
+        """Drop a removed entry's key from its tool's index (lock held)."""
+        keys = self.by_tool.get(entry.tool_name)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.by_tool[entry.tool_name]
+
+    def _push_expiry(self, expires_at: float, key: CacheKey):
+        """Record when a written entry expires (lock held)."""
+        heapq.heappush(self.expiry_heap, (expires_at, next(self.write_seq), key))
+
+        # Overwrites and evictions leave stale triples; rebuild from the live entries
+        if len(self.expiry_heap) > 2 * self.max_size:
+            self.expiry_heap = [(e.expires_at, next(self.write_seq), k) for k, e in self.entries.items()]
+            heapq.heapify(self.expiry_heap)
 
 
 class ToolResultCache:
@@ -38,7 +275,8 @@ class ToolResultCache:
     LRU cache with TTL for tool results.
 
     Caches results of expensive MCP operations like dashboard fetches,
-    datasource lists, and alert rules.
+    datasource lists, and alert rules. Safe to use from several threads:
+    entries are split across shards, each with its own lock and LRU order.
     """
 
     # Default TTL values for different tool types (in seconds)
@@ -55,24 +293,38 @@ class ToolResultCache:
         "query_loki_logs": 0,
     }
 
-    def __init__(self, max_size: int = 1000, default_ttl: int = 300):
+    # Minimum seconds between expiry sweeps of a shard
+    CLEANUP_RESOLUTION = 1.0
+
+    # Longest the background sweep sleeps when nothing is due sooner
+    CLEANUP_INTERVAL = 10.0
+
+    # Number of independently locked partitions
+    DEFAULT_SHARDS = 16
+
+    def __init__(self, max_size: int = 1000, default_ttl: int = 300, shards: int = DEFAULT_SHARDS):
         """
         Initialize cache.
 
         Args:
-            max_size: Maximum number of entries to cache
+            max_size: Maximum number of entries to cache, split evenly across shards
             default_ttl: Default TTL in seconds for entries
+            shards: Number of partitions, each with its own lock and LRU order
         """
-        self.cache: Dict[str, CacheEntry] = {}
         self.max_size = max_size
         self.default_ttl = default_ttl
 
-        # Statistics
-        self.hits = 0
-        self.misses = 0
-        self.evictions = 0
+        # Keys are spread over shards by hash, so threads touching different
+        # keys rarely wait on the same lock
+        shard_count = max(1, min(shards, max_size))
+        shard_size = -(-max_size // shard_count)
+        write_seq = itertools.count()
+        self._shards = [CacheShard(shard_size, write_seq) for _ in range(shard_count)]
 
-    def _make_key(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+        # Expired entries are swept by a background task, off the request path
+        self._cleanup_task: Optional[asyncio.Task] = None
+
+    def make_key(self, tool_name: str, arguments: Dict[str, Any]) -> CacheKey:
         """
         Generate cache key from tool name and arguments.
 
@@ -81,39 +333,98 @@ class ToolResultCache:
             arguments: Tool arguments
 
         Returns:
-            Hex string cache key
+            Hashable cache key, independent of argument order
         """
-        # Sort arguments to ensure consistent key generation
-        args_str = json.dumps(arguments, sort_keys=True)
-        key_str = f"{tool_name}:{args_str}"
-        return hashlib.sha256(key_str.encode()).hexdigest()
+        if all(isinstance(v, _KEY_PRIMITIVES) for v in arguments.values()):
+            # The type keeps True apart from 1 and 1 apart from 1.0, as JSON would
+            return tool_name, tuple(sorted((k, type(v), v) for k, v in arguments.items()))
+
+        # Nested arguments: hash their canonical JSON
+        return tool_name, _hash_key(orjson.dumps(arguments, option=_KEY_JSON_OPTIONS))
 
     def _get_ttl(self, tool_name: str) -> int:
-        """Get TTL for a specific tool."""
-        return self.DEFAULT_TTLS.get(tool_name, self.default_ttl)
+        """Get TTL for a specific tool, ignoring a "server::" cache namespace."""
+        return self.DEFAULT_TTLS.get(tool_name.rpartition("::")[2], self.default_ttl)
 
-    def _should_cache(self, tool_name: str) -> bool:
+    def should_cache(self, tool_name: str) -> bool:
         """Check if tool results should be cached."""
         ttl = self._get_ttl(tool_name)
         return ttl > 0
 
-    def _evict_oldest(self):
-        """Evict oldest cache entry."""
-        if not self.cache:
-            return
-
-        oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k].created_at)
-        del self.cache[oldest_key]
-        self.evictions += 1
-        logger.debug(f"Evicted cache entry: {oldest_key}")
+    def _shard(self, key: CacheKey) -> CacheShard:
+        """Get the shard that holds a key."""
+        return self._shards[hash(key) % len(self._shards)]
 
     def _cleanup_expired(self):
-        """Remove expired entries."""
-        expired_keys = [k for k, v in self.cache.items() if v.is_expired()]
-        for key in expired_keys:
-            del self.cache[key]
-        if expired_keys:
-            logger.debug(f"Cleaned up {len(expired_keys)} expired cache entries")
+        """Remove expired entries from every shard."""
+        now = time.monotonic()
+        removed = sum(shard.sweep(now, self.CLEANUP_RESOLUTION) for shard in self._shards)
+        if removed:
+            logger.debug(f"Cleaned up {removed} expired cache entries")
+
+    def _next_cleanup_delay(self) -> float:
+        """Seconds until the earliest entry expires, kept between the resolution and the interval."""
+        due = [t for t in (shard.next_expiry() for shard in self._shards) if t is not None]
+        if not due:
+            return self.CLEANUP_INTERVAL
+        delay = min(due) - time.monotonic()
+        return min(max(delay, self.CLEANUP_RESOLUTION), self.CLEANUP_INTERVAL)
+
+    async def _cleanup_loop(self):
+        """Sweep expired entries whenever the earliest one falls due."""
+        while True:
+            await asyncio.sleep(self._next_cleanup_delay())
+            try:
+                self._cleanup_expired()
+            except Exception as e:
+                logger.error(f"Cache cleanup failed: {e}")
+
+    def start_cleanup(self):
+        """
+        Start the background sweep on the running event loop, if there is one and it isn't running.
+
+        A sweep left behind on another (e.g. closed) loop is replaced.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Not in async context; nothing to run the sweep on
+            return
+        task = self._cleanup_task
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return
+        self._cleanup_task = loop.create_task(self._cleanup_loop())
+
+    async def stop_cleanup(self):
+        """Cancel the background sweep and wait for it to finish."""
+        task, self._cleanup_task = self._cleanup_task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    @property
+    def hits(self) -> int:
+        """Total cache hits across shards."""
+        return sum(shard.hits for shard in self._shards)
+
+    @property
+    def misses(self) -> int:
+        """Total cache misses across shards."""
+        return sum(shard.misses for shard in self._shards)
+
+    @property
+    def evictions(self) -> int:
+        """Total LRU evictions across shards."""
+        return sum(shard.evictions for shard in self._shards)
+
+    @property
+    def rejections(self) -> int:
+        """Total writes turned away by the doorkeeper across shards."""
+        return sum(shard.rejections for shard in self._shards)
 
     def get(self, tool_name: str, arguments: Dict[str, Any]) -> Optional[Any]:
         """
@@ -126,26 +437,22 @@ class ToolResultCache:
         Returns:
             Cached result or None if not found/expired
         """
-        if not self._should_cache(tool_name):
+        if not self.should_cache(tool_name):
             return None
 
-        key = self._make_key(tool_name, arguments)
-        entry = self.cache.get(key)
+        return self.get_by_key(self.make_key(tool_name, arguments))
 
-        if entry is None:
-            self.misses += 1
-            logger.debug(f"Cache miss: {tool_name}")
-            return None
+    def get_by_key(self, key: CacheKey) -> Optional[Any]:
+        """
+        Get cached result for a key from make_key().
 
-        if entry.is_expired():
-            del self.cache[key]
-            self.misses += 1
-            logger.debug(f"Cache expired: {tool_name}")
+        Lets a caller that both reads and writes an entry build the key once.
+        """
+        tool_name = key[0]
+        if not self.should_cache(tool_name):
             return None
 
-        self.hits += 1
-        logger.debug(f"Cache hit: {tool_name} (age: {entry.age():.1f}s)")
-        return entry.value
+        return self._shard(key).get(key, tool_name, time.monotonic())
 
     def set(self, tool_name: str, arguments: Dict[str, Any], value: Any):
         """
@@ -156,50 +463,57 @@ class ToolResultCache:
             arguments: Tool arguments
             value: Result to cache
         """
-        if not self._should_cache(tool_name):
+        if not self.should_cache(tool_name):
             return
 
-        # Cleanup expired entries periodically
-        if len(self.cache) > self.max_size * 0.9:
-            self._cleanup_expired()
+        self.set_by_key(self.make_key(tool_name, arguments), value, arguments)
 
-        # Evict oldest if at capacity
-        if len(self.cache) >= self.max_size:
-            self._evict_oldest()
+    def set_by_key(self, key: CacheKey, value: Any, arguments: Optional[Dict[str, Any]] = None):
+        """
+        Store result in cache under a key from make_key().
+
+        Args:
+            key: Key built by make_key()
+            value: Result to cache
+            arguments: The key's tool arguments, for predicate invalidation
+        """
+        tool_name = key[0]
+        if not self.should_cache(tool_name):
+            return
 
-        key = self._make_key(tool_name, arguments)
         ttl = self._get_ttl(tool_name)
-        self.cache[key] = CacheEntry(value, ttl)
+        self._shard(key).put(key, value, ttl, tool_name, time.monotonic(), arguments)
 
-        logger.debug(f"Cached: {tool_name} (TTL: {ttl}s)")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Cached: {tool_name} (TTL: {ttl}s)")
 
-    def invalidate(self, tool_name: str, arguments: Optional[Dict[str, Any]] = None):
+    def invalidate(
+        self,
+        tool_name: str,
+        arguments: Optional[Dict[str, Any]] = None,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ):
         """
         Invalidate cache entries.
 
         Args:
             tool_name: Name of the tool
             arguments: Specific arguments to invalidate, or None for all
+            predicate: Invalidate only entries whose arguments it accepts
+                (used when no specific arguments are given)
         """
         if arguments is not None:
-            key = self._make_key(tool_name, arguments)
-            if key in self.cache:
-                del self.cache[key]
+            key = self.make_key(tool_name, arguments)
+            if self._shard(key).remove(key):
                 logger.debug(f"Invalidated: {tool_name}")
         else:
-            # Invalidate all entries for this tool
-            keys_to_delete = [
-                k for k in self.cache.keys()
-                if k.startswith(hashlib.sha256(f"{tool_name}:".encode()).hexdigest()[:8])
-            ]
-            for key in keys_to_delete:
-                del self.cache[key]
-            logger.debug(f"Invalidated {len(keys_to_delete)} entries for {tool_name}")
+            # Invalidate all (matching) entries for this tool
+            count = sum(shard.remove_tool(tool_name, predicate) for shard in self._shards)
+            logger.debug(f"Invalidated {count} entries for {tool_name}")
 
     def clear(self):
         """Clear all cache entries."""
-        count = len(self.cache)
-        self.cache.clear()
+        count = sum(shard.clear() for shard in self._shards)
         logger.info(f"Cleared {count} cache entries")
 
     def get_stats(self) -> Dict[str, Any]:
@@ -209,57 +523,36 @@ class ToolResultCache:
         Returns:
             Dictionary with cache stats
         """
-        total_requests = self.hits + self.misses
-        hit_rate = (self.hits / total_requests * 100) if total_requests > 0 else 0
+        hits, misses = self.hits, self.misses
+        total_requests = hits + misses
+        hit_rate = (hits / total_requests * 100) if total_requests > 0 else 0
 
         return {
-            "size": len(self.cache),
+            "size": sum(len(shard.entries) for shard in self._shards),
             "max_size": self.max_size,
-            "hits": self.hits,
-            "misses": self.misses,
+            "hits": hits,
+            "misses": misses,
             "evictions": self.evictions,
+            "rejections": self.rejections,
             "hit_rate_percent": round(hit_rate, 2),
             "total_requests": total_requests
         }
 
 
-# Global cache instance
+def _create_cache() -> ToolResultCache:
+    """Build the global cache with the size and default TTL from settings."""
+    settings = get_settings()
+    return ToolResultCache(max_size=settings.tool_cache_max_size, default_ttl=settings.tool_cache_default_ttl)
+
+
+# Global cache instance, created on first use so importing this module needs no settings
 _cache_instance: Optional[ToolResultCache] = None
 
 
 def get_cache() -> ToolResultCache:
-    """Get or create global cache instance."""
+    """Get the global cache instance; its background sweep is started by the app at startup."""
     global _cache_instance
     if _cache_instance is None:
-        _cache_instance = ToolResultCache()
-        logger.info("Initialized tool result cache")
+        _cache_instance = _create_cache()
     return _cache_instance
 
-
-def cached_tool(func: Callable) -> Callable:
-    """
-    Decorator to cache tool results.
-
-    Usage:
-        @cached_tool
-        async def my_tool(tool_name: str, arguments: dict):
-            return await expensive_operation()
-    """
-    @wraps(func)
-    async def wrapper(tool_name: str, arguments: Dict[str, Any], *args, **kwargs):
-        cache = get_cache()
-
-        # Try to get from cache
-        cached_result = cache.get(tool_name, arguments)
-        if cached_result is not None:
-            return cached_result
-
-        # Execute function
-        result = await func(tool_name, arguments, *args, **kwargs)
-
-        # Store in cache
-        cache.set(tool_name, arguments, result)
-
-        return result
-
-    return wrapper
@@ -1,27 +1,266 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict, List, Optional
-from contextlib import AsyncExitStack
+import random
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from contextlib import asynccontextmanager
 
+import httpx
 from mcp import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
 
 from backend.app.config import Settings
-from backend.tools.cache import get_cache
+from backend.tools.cache import CacheKey, get_cache
 from backend.utils.logger import get_logger
 
 
 logger = get_logger(__name__)
 
+# Client errors that a retry can fix: request timeout and rate limiting
+_RETRYABLE_4XX = {408, 429}
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """
+    Whether a failed connection attempt is worth retrying.
+
+    Refusals from the server such as 401/403/404 will fail the same way
+    again; timeouts, dropped connections and 5xx responses may not.
+    """
+    if isinstance(error, BaseExceptionGroup):
+        # The transport's task group wraps what went wrong
+        return all(_is_retryable(e) for e in error.exceptions)
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return not (400 <= status < 500) or status in _RETRYABLE_4XX
+    return True
+
+
+class _CallAbandoned(Exception):
+    """The in-flight call a caller joined was cancelled before it finished."""
+
+
+class _PooledSession:
+    """A pooled MCP session and the task that opened it and will close it."""
+
+    __slots__ = ("ready", "closing", "task", "session", "last_used")
+
+    def __init__(self, ready: asyncio.Future) -> None:
+        self.ready = ready
+        self.closing = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.session: Optional[ClientSession] = None
+        self.last_used = 0.0
+
+
+class MCPConnectionPool:
+    """
+    Pool of initialized MCP sessions to one server.
+
+    Each session is opened and closed by its own task, because the transport's
+    context managers must be exited by the task that entered them. Callers
+    borrow a session with ``async with pool.acquire() as session``; a session
+    whose call raised is closed and replaced rather than returned to the pool.
+    Callers waiting on a full pool are woken whenever a session is returned
+    or closed, so a closed session's slot is reused.
+    """
+
+    def __init__(
+        self,
+        server_url: str,
+        min_size: int = 1,
+        max_size: int = 4,
+        connect_timeout: float = 10,
+        idle_timeout: float = 300,
+    ) -> None:
+        self.server_url = server_url
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, self.min_size, max_size)
+        self.connect_timeout = connect_timeout
+        self.idle_timeout = idle_timeout
+        self._idle: asyncio.Queue[_PooledSession] = asyncio.Queue()
+        self._size = 0  # open or opening sessions, idle or in use
+        self._changed = asyncio.Condition()  # notified when a session is returned or closed
+        self._closed = False
+        self._reaper: Optional[asyncio.Task] = None
+
+    @property
+    def size(self) -> int:
+        """Number of sessions currently open or being opened."""
+        return self._size
+
+    async def start(self) -> None:
+        """
+        Open the minimum number of sessions concurrently and start the idle reaper.
+
+        Raises:
+            Exception: If any session fails to open; those that did are closed
+        """
+        self._size += self.min_size
+        results = await asyncio.gather(
+            *(self._open_one() for _ in range(self.min_size)),
+            return_exceptions=True
+        )
+        opened = [r for r in results if isinstance(r, _PooledSession)]
+        errors = [r for r in results if not isinstance(r, _PooledSession)]
+        if errors:
+            self._size -= len(errors)
+            for entry in opened:
+                await self._discard(entry)
+            raise errors[0]
+
+        for entry in opened:
+            self._idle.put_nowait(entry)
+        if self.idle_timeout > 0:
+            self._reaper = asyncio.create_task(self._reap_idle_loop())
+
+    @asynccontextmanager
+    async def acquire(self, timeout: Optional[float] = None) -> AsyncIterator[ClientSession]:
+        """
+        Borrow a session, opening a new one if none is idle and the pool has room.
+
+        Raises:
+            asyncio.TimeoutError: If no session could be had within timeout seconds
+        """
+        entry = await asyncio.wait_for(self._checkout(), timeout=timeout)
+        try:
+            yield entry.session
+        except BaseException:
+            # The session may be stale; don't hand it to the next caller
+            await self._discard(entry)
+            raise
+        else:
+            if self._closed:
+                await self._discard(entry)
+            else:
+                entry.last_used = asyncio.get_running_loop().time()
+                async with self._changed:
+                    self._idle.put_nowait(entry)
+                    self._changed.notify()
+
+    async def close(self) -> None:
+        """Close idle sessions now and the ones in use as they are released."""
+        self._closed = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+            await asyncio.gather(self._reaper, return_exceptions=True)
+            self._reaper = None
+
+        while not self._idle.empty():
+            await self._discard(self._idle.get_nowait())
+        async with self._changed:
+            self._changed.notify_all()  # Waiters fail instead of waiting on a closed pool
+
+    async def _checkout(self) -> _PooledSession:
+        """Take an idle live session, or open one, or wait for one to be released."""
+        while True:
+            async with self._changed:
+                while not self._closed and self._idle.empty() and self._size >= self.max_size:
+                    await self._changed.wait()
+                if self._closed:
+                    raise RuntimeError(f"Connection pool for {self.server_url} is closed")
+                try:
+                    entry = self._idle.get_nowait()
+                except asyncio.QueueEmpty:
+                    entry = None
+                    self._size += 1
+
+            if entry is None:
+                try:
+                    return await self._open_one()
+                except BaseException:
+                    await self._release_slot()
+                    raise
+
+            if not entry.task.done():
+                return entry
+            # The session's task ended on its own (e.g. the transport dropped)
+            await self._release_slot()
+
+    async def _release_slot(self) -> None:
+        """Give up a session's place in the pool and wake one waiter to reuse it."""
+        self._size -= 1
+        async with self._changed:
+            self._changed.notify()
+
+    async def _open_one(self) -> _PooledSession:
+        """Open one session in its own task, waiting up to connect_timeout for it."""
+        entry = _PooledSession(asyncio.get_running_loop().create_future())
+        entry.task = asyncio.create_task(self._hold(entry))
+        try:
+            entry.session = await asyncio.wait_for(entry.ready, timeout=self.connect_timeout)
+        except BaseException:
+            entry.task.cancel()
+            await asyncio.gather(entry.task, return_exceptions=True)
+            raise
+        return entry
+
+    async def _hold(self, entry: _PooledSession) -> None:
+        """Open a session, publish it, and keep it open until asked to close."""
+        try:
+            async with self._open_session() as session:
+                if entry.ready.done():
+                    return  # The opener gave up waiting
+                entry.ready.set_result(session)
+                await entry.closing.wait()
+        except Exception as e:
+            if not entry.ready.done():
+                entry.ready.set_exception(e)
+            else:
+                logger.warning(f"MCP session closed with error: {e}", extra={"url": self.server_url})
+
+    @asynccontextmanager
+    async def _open_session(self) -> AsyncIterator[ClientSession]:
+        """Transport, client session and initialize handshake for one session."""
+        logger.debug(f"Establishing transport to {self.server_url}")
+        async with streamablehttp_client(url=self.server_url) as (read, write, _):
+            async with ClientSession(read, write) as session:
+                logger.debug("Initializing MCP session")
+                await session.initialize()
+                yield session
+
+    async def _discard(self, entry: _PooledSession) -> None:
+        """Close a session, wait for its task to finish, and wake a waiter."""
+        await self._release_slot()
+        entry.closing.set()
+        await asyncio.gather(entry.task, return_exceptions=True)
+
+    async def _reap_idle_loop(self) -> None:
+        """Close sessions above min_size that have been idle longer than idle_timeout."""
+        while True:
+            await asyncio.sleep(self.idle_timeout / 2)
+            now = asyncio.get_running_loop().time()
+
+            # Most recently used sessions are kept; the queue is rebuilt without awaiting
+            idle = sorted(
+                (self._idle.get_nowait() for _ in range(self._idle.qsize())),
+                key=lambda e: e.last_used,
+                reverse=True
+            )
+            keep = max(0, self.min_size - (self._size - len(idle)))
+            stale = [e for i, e in enumerate(idle) if i >= keep and now - e.last_used > self.idle_timeout]
+            for entry in idle:
+                if entry not in stale:
+                    self._idle.put_nowait(entry)
+
+            for entry in stale:
+                await self._discard(entry)
+            if stale:
+                logger.debug(f"Closed {len(stale)} idle MCP sessions", extra={"url": self.server_url})
+
 
 class MCPClient:
     """
     MCP client wrapper for Grafana MCP server with proper lifecycle management.
 
-    Uses AsyncExitStack to properly manage async context managers.
+    Tool calls borrow sessions from an MCPConnectionPool, so concurrent calls
+    don't queue behind one session and a stale session is replaced on its own.
     """
 
+    # Running cacheable calls by cache key, shared by all clients so calls
+    # through different clients to the same server are joined too
+    _inflight: Dict[CacheKey, asyncio.Future] = {}
+
     def __init__(
         self,
         settings: Settings,
@@ -31,11 +270,15 @@ class MCPClient:
         self.settings = settings
         self.server_url = server_url or settings.mcp_server_url
         self.cache_namespace = cache_namespace
-        self.session: Optional[ClientSession] = None
-        self._exit_stack: Optional[AsyncExitStack] = None
+        self._cache = get_cache()
+        self._pool: Optional[MCPConnectionPool] = None
         self._connection_attempts = 0
-        self._max_retries = 3
-        self._connection_timeout = 10  # 10 second timeout per connection attempt
+        self._max_retries = settings.mcp_connect_max_retries
+        self._backoff_base = settings.mcp_retry_backoff_base
+        self._backoff_cap = settings.mcp_retry_backoff_cap
+        self._connection_timeout = settings.mcp_connect_timeout  # per session, per attempt
+        self._call_timeout = settings.mcp_call_timeout  # per tool call
+        self._call_budget = settings.mcp_call_budget  # per invoke_tool, across retries
 
     async def __aenter__(self) -> MCPClient:
         """Async context manager entry - establishes connection."""
@@ -46,32 +289,46 @@ class MCPClient:
         """Async context manager exit - ensures proper cleanup."""
         await self.disconnect()
 
+    @property
+    def connected(self) -> bool:
+        """Whether the session pool is open."""
+        return self._pool is not None
+
     async def connect(self) -> None:
         """
-        Establish a connection to the MCP server with retry logic and timeout.
+        Open the session pool with retry logic and a timeout per session.
+
+        Failed attempts are retried after an exponential backoff with full
+        jitter, so clients reconnecting to a restarted server spread out.
+        Errors the server will repeat, such as authentication failures, are
+        raised at once.
 
         Raises:
             Exception: If connection fails after max retries
         """
-        if self.session is not None:
+        if self._pool is not None:
             logger.debug("Already connected to MCP server")
             return
 
         last_error = None
         while self._connection_attempts < self._max_retries:
+            pool = MCPConnectionPool(
+                self.server_url,
+                min_size=self.settings.mcp_pool_min_size,
+                max_size=self.settings.mcp_pool_max_size,
+                connect_timeout=self._connection_timeout,
+                idle_timeout=self.settings.mcp_pool_idle_timeout
+            )
             try:
                 logger.info(
                     f"Connecting to MCP server (attempt {self._connection_attempts + 1}/{self._max_retries})",
                     extra={"url": self.server_url}
                 )
 
-                # Use timeout to prevent indefinite hangs
-                await asyncio.wait_for(
-                    self._connect_with_timeout(),
-                    timeout=self._connection_timeout
-                )
+                await pool.start()
 
                 logger.info("Successfully connected to MCP server", extra={"url": self.server_url})
+                self._pool = pool
                 self._connection_attempts = 0
                 return
 
@@ -88,14 +345,6 @@ class MCPClient:
                         "timeout_seconds": self._connection_timeout
                     }
                 )
-                # Clean up exit stack on timeout
-                if self._exit_stack:
-                    try:
-                        await self._exit_stack.__aexit__(None, None, None)
-                    except:
-                        pass
-                    self._exit_stack = None
-                    self.session = None
 
             except Exception as e:
                 last_error = e
@@ -108,81 +357,61 @@ class MCPClient:
                         "max_retries": self._max_retries
                     }
                 )
+                if not _is_retryable(e):
+                    self._connection_attempts = 0
+                    raise Exception(f"MCP server at {self.server_url} refused the connection: {e}") from e
 
-                # Clean up exit stack on error
-                if self._exit_stack:
-                    try:
-                        await self._exit_stack.__aexit__(None, None, None)
-                    except:
-                        pass
-                    self._exit_stack = None
-                    self.session = None
-
-                if self._connection_attempts >= self._max_retries:
-                    raise Exception(
-                        f"Failed to connect to MCP server after {self._max_retries} attempts: {last_error}"
-                    ) from last_error
-
-    async def _connect_with_timeout(self) -> None:
-        """Internal method to establish connection (used with wait_for timeout)."""
-        # Use AsyncExitStack to properly manage context managers
-        self._exit_stack = AsyncExitStack()
-        await self._exit_stack.__aenter__()
-
-        logger.debug(f"Establishing transport to {self.server_url}")
-        
-        # Enter transport context
-        try:
-            read, write, _ = await self._exit_stack.enter_async_context(
-                streamablehttp_client(url=self.server_url)
-            )
-        except Exception as e:
-            logger.error(f"Failed to establish transport: {e}", exc_info=True)
-            raise
-
-        logger.debug("Transport established, creating client session")
-        
-        # Enter session context
-        try:
-            self.session = await self._exit_stack.enter_async_context(
-                ClientSession(read, write)
-            )
-        except Exception as e:
-            logger.error(f"Failed to create session: {e}", exc_info=True)
-            raise
+            if self._connection_attempts < self._max_retries:
+                delay = random.uniform(
+                    0, min(self._backoff_cap, self._backoff_base * 2 ** (self._connection_attempts - 1))
+                )
+                logger.info(
+                    f"Retrying MCP connection in {delay:.2f}s",
+                    extra={"url": self.server_url, "attempt": self._connection_attempts, "waited_ms": round(delay * 1000)}
+                )
+                await asyncio.sleep(delay)
 
-        # Initialize session
-        logger.debug("Initializing MCP session")
-        try:
-            await self.session.initialize()
-        except Exception as e:
-            logger.error(f"Failed to initialize session: {e}", exc_info=True)
-            raise
+        self._connection_attempts = 0
+        raise Exception(
+            f"Failed to connect to MCP server after {self._max_retries} attempts: {last_error}"
+        ) from last_error
 
     async def disconnect(self) -> None:
         """Gracefully disconnect from the MCP server."""
+        pool, self._pool = self._pool, None
+        # Always reset state so the next call can reconnect cleanly.
+        self._connection_attempts = 0
+        if pool is None:
+            return
         try:
-            if self._exit_stack is not None:
-                logger.info("Disconnecting from MCP server")
-                await self._exit_stack.__aexit__(None, None, None)
+            logger.info("Disconnecting from MCP server")
+            await pool.close()
         except Exception as e:
             logger.warning(f"Error during disconnect: {e}")
-        finally:
-            # Always reset state so the next call can reconnect cleanly.
-            self._exit_stack = None
-            self.session = None
-            self._connection_attempts = 0
 
     async def ensure_connected(self) -> None:
         """Ensure connection is established, reconnect if needed."""
-        if self.session is None:
+        if self._pool is None:
             logger.warning("Connection lost, attempting to reconnect")
             await self.connect()
 
+    async def list_tools(self) -> Any:
+        """List the tools the MCP server offers."""
+        await self.ensure_connected()
+        async with self._pool.acquire(timeout=self._call_timeout) as session:
+            return await session.list_tools()
+
     async def invoke_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
         """
         Invoke an MCP tool by name with arguments (with caching).
 
+        This is the one place tool results are cached: a fresh cached result
+        is returned without calling the server, and new results are stored
+        under the client's cache namespace. A cacheable call made while an
+        identical one is still running waits for that call's result instead
+        of calling the server again; if that call is cancelled, the waiting
+        calls go ahead on their own. Error results are never cached.
+
         Args:
             name: Tool name to invoke
             arguments: Dictionary of arguments for the tool
@@ -193,28 +422,82 @@ class MCPClient:
         Raises:
             Exception: If tool invocation fails
         """
-        cache = get_cache()
+        cache = self._cache
         cache_name = f"{self.cache_namespace}::{name}" if self.cache_namespace else name
+        if not cache.should_cache(cache_name):
+            return await self._call_tool(name, arguments)
 
-        # Try to get from cache first
-        cached_result = cache.get(cache_name, arguments)
+        # Try to get from cache first; the key is built once for the lookup and the store
+        cache_key = cache.make_key(cache_name, arguments)
+        cached_result = cache.get_by_key(cache_key)
         if cached_result is not None:
             logger.info(f"Cache hit for tool: {name}")
             return cached_result
 
+        pending = self._inflight.get(cache_key)
+        if pending is not None:
+            logger.info(f"Joining in-flight call for tool: {name}")
+            try:
+                # Shielded so a cancelled follower doesn't cancel the shared result
+                return await asyncio.shield(pending)
+            except _CallAbandoned:
+                logger.info(f"In-flight call for tool {name} was cancelled, calling again")
+                return await self.invoke_tool(name, arguments)
+
+        pending = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = pending
+        try:
+            result = await self._call_tool(name, arguments, cache_key)
+        except asyncio.CancelledError:
+            # Only this caller was cancelled; let the ones that joined call again
+            pending.set_exception(_CallAbandoned())
+            pending.exception()
+            raise
+        except Exception as e:
+            pending.set_exception(e)
+            pending.exception()  # Retrieved here, so no warning when nobody joined
+            raise
+        else:
+            pending.set_result(result)
+            return result
+        finally:
+            del self._inflight[cache_key]
+
+    async def _call_tool(self, name: str, arguments: Dict[str, Any], cache_key: Optional[CacheKey] = None) -> Any:
+        """
+        Call a tool on the server, retrying once, and cache a good result under cache_key.
+
+        Each call to the server is limited to the call timeout, and the
+        whole invocation, retry included, to the call budget.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._call_budget
         last_error: Exception | None = None
         for attempt in range(2):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                last_error = asyncio.TimeoutError(f"Call budget of {self._call_budget}s used up")
+                break
+            timeout = min(self._call_timeout, remaining)
+
             try:
                 await self.ensure_connected()
 
                 logger.debug(f"Invoking tool: {name}", extra={"arguments": arguments})
-                response = await self.session.call_tool(name=name, arguments=arguments)
+                # A session that fails or times out here is dropped from the
+                # pool, so the retry runs on another (or freshly opened) session
+                async with self._pool.acquire(timeout=timeout) as session:
+                    response = await asyncio.wait_for(
+                        session.call_tool(name=name, arguments=arguments),
+                        timeout=timeout
+                    )
 
                 if response and hasattr(response, 'content'):
                     result = response.content
 
-                    # Store in cache
-                    cache.set(cache_name, arguments, result)
+                    # Store in cache, unless the tool reported an error
+                    if cache_key is not None and not getattr(response, 'isError', False):
+                        self._cache.set_by_key(cache_key, result, arguments)
 
                     return result
                 else:
@@ -222,20 +505,26 @@ class MCPClient:
                     return {"error": f"No response from tool {name}"}
 
             except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    e = asyncio.TimeoutError(f"Timed out after {timeout:.1f}s")
                 last_error = e
                 logger.error(
                     f"Tool invocation failed: {e}",
                     extra={"tool": name, "arguments": arguments, "attempt": attempt + 1}
                 )
-                # Retry once with a fresh connection in case the session is stale.
+                # Retry once in case the session was stale.
                 if attempt == 0:
-                    await self.disconnect()
                     continue
                 break
 
         raise Exception(f"Failed to invoke tool '{name}': {str(last_error)}") from last_error
 
-    def invalidate_cache(self, tool_name: str, arguments: Dict[str, Any] = None):
+    def invalidate_cache(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any] = None,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ):
         """
         Invalidate cache for a specific tool.
 
@@ -244,7 +533,10 @@ class MCPClient:
         Args:
             tool_name: Name of the tool to invalidate
             arguments: Specific arguments to invalidate, or None for all
+            predicate: Invalidate only entries whose arguments it accepts,
+                e.g. ``lambda args: args.get("uid") == uid``
         """
-        cache = get_cache()
-        cache.invalidate(tool_name, arguments)
+        cache = self._cache
+        cache_name = f"{self.cache_namespace}::{tool_name}" if self.cache_namespace else tool_name
+        cache.invalidate(cache_name, arguments, predicate)
         logger.info(f"Invalidated cache for: {tool_name}")
@@ -6,9 +6,87 @@ and useful for the LLM agent.
 """
 from __future__ import annotations
 
-import json
+import io
 import os
-from typing import Any, Dict, List
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+import orjson
+
+# Base for dashboard links with relative URLs, read from the environment once
+_GRAFANA_BASE = (
+    os.environ.get("GRAFANA_PUBLIC_URL")
+    or os.environ.get("GRAFANA_URL")
+    or "http://localhost:3000"
+).rstrip("/")
+
+# Tool results may have non-string keys (e.g. numeric bucket bounds)
+_JSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+# Most characters of JSON the generic formatter shows
+_GENERIC_OUTPUT_LIMIT = 2000
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize a result as indented JSON."""
+    return orjson.dumps(obj, option=_JSON_OPTIONS | orjson.OPT_INDENT_2).decode()
+
+
+def _dumps_compact(obj: Any) -> str:
+    """Serialize a value as single-line JSON."""
+    return orjson.dumps(obj, option=_JSON_OPTIONS).decode()
+
+
+def _json_key(key: Any) -> str:
+    """Serialize a dict key the way orjson does with non-string keys allowed."""
+    if isinstance(key, str):
+        return _dumps_compact(key)
+    # Let orjson stringify the key: '{"1":null}' -> '"1"'
+    return _dumps_compact({key: None})[1:-6]
+
+
+def _iter_json(obj: Any, depth: int = 0) -> Iterator[str]:
+    """Yield the same indented JSON as _dumps() piece by piece, leaves serialized by orjson."""
+    if isinstance(obj, dict):
+        if not obj:
+            yield "{}"
+            return
+        pad = "\n" + "  " * (depth + 1)
+        sep = "{"
+        for key, value in obj.items():
+            yield f"{sep}{pad}{_json_key(key)}: "
+            sep = ","
+            yield from _iter_json(value, depth + 1)
+        yield "\n" + "  " * depth + "}"
+    elif isinstance(obj, (list, tuple)):
+        if not obj:
+            yield "[]"
+            return
+        pad = "\n" + "  " * (depth + 1)
+        sep = "["
+        for value in obj:
+            yield sep + pad
+            sep = ","
+            yield from _iter_json(value, depth + 1)
+        yield "\n" + "  " * depth + "]"
+    else:
+        yield _dumps_compact(obj)
+
+
+def _dumps_truncated(obj: Any, limit: int) -> Tuple[str, bool]:
+    """
+    Serialize a result as indented JSON, stopping once it exceeds limit characters.
+
+    Returns the JSON (cut to limit) and whether it was cut, so the work done
+    follows the size of the output rather than of the result.
+    """
+    buf = io.StringIO()
+    size = 0
+    for chunk in _iter_json(obj):
+        size += buf.write(chunk)
+        if size > limit:
+            return buf.getvalue()[:limit], True
+    return buf.getvalue(), False
 
 
 class ToolResultFormatter:
@@ -31,22 +109,25 @@ class ToolResultFormatter:
             return f"❌ Error: {result['error']}"
 
         # Route to specific formatters based on tool name
-        if tool_name == "search_dashboards":
-            return ToolResultFormatter._format_dashboard_search(result)
-        if "prometheus" in tool_name.lower():
-            return ToolResultFormatter._format_prometheus(result)
-        elif "loki" in tool_name.lower():
-            return ToolResultFormatter._format_loki(result)
-        elif "dashboard" in tool_name.lower():
-            return ToolResultFormatter._format_dashboard(result)
-        elif "alert" in tool_name.lower():
-            return ToolResultFormatter._format_alert(result)
-        elif "datasource" in tool_name.lower():
-            return ToolResultFormatter._format_datasource(result)
-        elif "search" in tool_name.lower():
-            return ToolResultFormatter._format_search(result)
-        else:
-            return ToolResultFormatter._format_generic(result)
+        return _formatter_for(tool_name)(result)
+
+    @staticmethod
+    def _is_text_items(result: List[Any]) -> bool:
+        """Check whether a list holds MCP content items, judging by its first item."""
+        if not result:
+            return False
+        first = result[0]
+        return hasattr(first, 'text') or (isinstance(first, dict) and "text" in first)
+
+    @staticmethod
+    def _join_text_items(result: List[Any]) -> str:
+        """Join the text of MCP content items (TextContent objects or dicts), one per line."""
+        return "\n".join(
+            item.text if hasattr(item, 'text')
+            else item["text"] if isinstance(item, dict) and "text" in item
+            else str(item)
+            for item in result
+        )
 
     @staticmethod
     def _format_prometheus(result: Any) -> str:
@@ -56,15 +137,7 @@ class ToolResultFormatter:
 
         # Handle list of content items from MCP (TextContent objects or dicts)
         if isinstance(result, list):
-            formatted_parts = []
-            for item in result:
-                if hasattr(item, 'text'):
-                    formatted_parts.append(item.text)
-                elif isinstance(item, dict) and "text" in item:
-                    formatted_parts.append(item["text"])
-                else:
-                    formatted_parts.append(str(item))
-            return "\n".join(formatted_parts)
+            return ToolResultFormatter._join_text_items(result)
 
         # Handle dict results
         if "data" in result:
@@ -78,7 +151,7 @@ class ToolResultFormatter:
             elif result_type == "scalar":
                 return f"Scalar value: {data.get('result', 'N/A')}"
 
-        return json.dumps(result, indent=2)
+        return _dumps(result)
 
     @staticmethod
     def _format_prometheus_matrix(results: List[Dict]) -> str:
@@ -86,26 +159,28 @@ class ToolResultFormatter:
         if not results:
             return "No data found"
 
-        output = []
+        # Each line is written with the newline that separates it from the previous one
+        buf = io.StringIO()
+        w = buf.write
         for idx, series in enumerate(results[:5], 1):  # Limit to 5 series
             metric = series.get("metric", {})
             values = series.get("values", [])
 
-            metric_str = json.dumps(metric)
-            output.append(f"\n📊 Series {idx}: {metric_str}")
-            output.append(f"   Data points: {len(values)}")
+            metric_str = _dumps_compact(metric)
+            if idx > 1:
+                w("\n")
+            w(f"\n📊 Series {idx}: {metric_str}\n   Data points: {len(values)}")
 
             if values:
                 # Show first and last values
                 first_val = values[0]
                 last_val = values[-1]
-                output.append(f"   First: [{first_val[0]}] = {first_val[1]}")
-                output.append(f"   Last:  [{last_val[0]}] = {last_val[1]}")
+                w(f"\n   First: [{first_val[0]}] = {first_val[1]}\n   Last:  [{last_val[0]}] = {last_val[1]}")
 
         if len(results) > 5:
-            output.append(f"\n... and {len(results) - 5} more series")
+            w(f"\n\n... and {len(results) - 5} more series")
 
-        return "\n".join(output)
+        return buf.getvalue()
 
     @staticmethod
     def _format_prometheus_vector(results: List[Dict]) -> str:
@@ -115,12 +190,14 @@ class ToolResultFormatter:
 
         output = ["📈 Instant Query Results:\n"]
         for series in results[:10]:  # Limit to 10 series
-            metric = series.get("metric", {})
+            # Skip series without a sample before building their label string
             value = series.get("value", [])
+            if not (value and len(value) >= 2):
+                continue
 
-            metric_str = ", ".join(f"{k}={v}" for k, v in metric.items())
-            if value and len(value) >= 2:
-                output.append(f"  • {metric_str}: {value[1]}")
+            metric = series.get("metric", {})
+            metric_str = ", ".join(map("=".join, ((k, str(v)) for k, v in metric.items())))
+            output.append(f"  • {metric_str}: {value[1]}")
 
         if len(results) > 10:
             output.append(f"\n... and {len(results) - 10} more results")
@@ -135,15 +212,7 @@ class ToolResultFormatter:
 
         # Handle list of content items from MCP (TextContent objects or dicts)
         if isinstance(result, list):
-            formatted_parts = []
-            for item in result:
-                if hasattr(item, 'text'):
-                    formatted_parts.append(item.text)
-                elif isinstance(item, dict) and "text" in item:
-                    formatted_parts.append(item["text"])
-                else:
-                    formatted_parts.append(str(item))
-            return "\n".join(formatted_parts)
+            return ToolResultFormatter._join_text_items(result)
 
         # Handle dict results
         if "data" in result:
@@ -156,7 +225,7 @@ class ToolResultFormatter:
             elif result_type == "matrix" or result_type == "vector":
                 return f"Loki metric query returned {len(results)} series"
 
-        return json.dumps(result, indent=2)
+        return _dumps(result)
 
     @staticmethod
     def _format_loki_streams(results: List[Dict]) -> str:
@@ -164,7 +233,10 @@ class ToolResultFormatter:
         if not results:
             return "No logs found"
 
-        output = ["📋 Log Entries:\n"]
+        # Each line after the header is written with the newline that separates it
+        buf = io.StringIO()
+        w = buf.write
+        w("📋 Log Entries:\n")
         total_entries = 0
 
         for stream in results[:5]:  # Limit to 5 streams
@@ -173,23 +245,23 @@ class ToolResultFormatter:
             total_entries += len(values)
 
             label_str = ", ".join(f"{k}={v}" for k, v in labels.items())
-            output.append(f"\nStream: {{{label_str}}}")
+            w(f"\n\nStream: {{{label_str}}}")
 
             # Show a few log lines
             for ts, line in values[:3]:
                 # Truncate long lines
                 display_line = line[:100] + "..." if len(line) > 100 else line
-                output.append(f"  [{ts}] {display_line}")
+                w(f"\n  [{ts}] {display_line}")
 
             if len(values) > 3:
-                output.append(f"  ... and {len(values) - 3} more log lines")
+                w(f"\n  ... and {len(values) - 3} more log lines")
 
-        output.append(f"\nTotal log entries: {total_entries}")
+        w(f"\n\nTotal log entries: {total_entries}")
 
         if len(results) > 5:
-            output.append(f"... and {len(results) - 5} more streams")
+            w(f"\n... and {len(results) - 5} more streams")
 
-        return "\n".join(output)
+        return buf.getvalue()
 
     @staticmethod
     def _format_dashboard(result: Any) -> str:
@@ -199,15 +271,7 @@ class ToolResultFormatter:
 
         # Handle list of content items from MCP (TextContent objects or dicts)
         if isinstance(result, list):
-            formatted_parts = []
-            for item in result:
-                if hasattr(item, 'text'):
-                    formatted_parts.append(item.text)
-                elif isinstance(item, dict) and "text" in item:
-                    formatted_parts.append(item["text"])
-                else:
-                    formatted_parts.append(str(item))
-            return "\n".join(formatted_parts)
+            return ToolResultFormatter._join_text_items(result)
 
         # For dashboard dict, extract key info
         output = []
@@ -220,25 +284,24 @@ class ToolResultFormatter:
             if "tags" in dash:
                 output.append(f"   Tags: {', '.join(dash['tags'])}")
 
-        return "\n".join(output) if output else json.dumps(result, indent=2)
+        return "\n".join(output) if output else _dumps(result)
 
     @staticmethod
     def _format_dashboard_search(result: Any) -> str:
         """Format search_dashboards result into a concise, Markdown-formatted list."""
         items: List[Dict[str, Any]] = []
 
-        # Handle MCP TextContent objects
-        if isinstance(result, list) and result and hasattr(result[0], 'text'):
+        # Handle MCP TextContent objects; a list of dashboard dicts needs no parsing
+        if isinstance(result, list) and result and not isinstance(result[0], dict) and hasattr(result[0], 'text'):
             # Parse JSON from TextContent
-            import json
             try:
                 text = result[0].text
-                parsed = json.loads(text) if isinstance(text, str) else text
+                parsed = orjson.loads(text) if isinstance(text, str) else text
                 if isinstance(parsed, list):
                     items = parsed
                 elif isinstance(parsed, dict):
                     result = parsed
-            except:
+            except ValueError:
                 pass
 
         if not items and isinstance(result, list):
@@ -252,11 +315,6 @@ class ToolResultFormatter:
         if not items:
             return "No dashboards found."
 
-        grafana_base = (
-            os.getenv("GRAFANA_PUBLIC_URL")
-            or os.getenv("GRAFANA_URL")
-            or "http://localhost:3000"
-        ).rstrip("/")
         lines = ["## Available Dashboards", ""]
         for idx, item in enumerate(items[:25], 1):  # cap output
             if not isinstance(item, dict):
@@ -276,7 +334,7 @@ class ToolResultFormatter:
                 if isinstance(url, str) and url.startswith("http"):
                     full_url = url
                 else:
-                    full_url = f"{grafana_base}{url}"
+                    full_url = f"{_GRAFANA_BASE}{url}"
                 lines.append(f"   - [View Dashboard]({full_url})")
             lines.append("")  # Add blank line between items
 
@@ -293,18 +351,9 @@ class ToolResultFormatter:
 
         # Handle list of content items from MCP (TextContent objects or dicts)
         if isinstance(result, list):
-            # Check if it's a list of MCP content items (TextContent objects)
-            if result and hasattr(result[0], 'text'):
-                formatted_parts = []
-                for item in result:
-                    formatted_parts.append(item.text)
-                return "\n".join(formatted_parts)
-            # Check if it's a list of MCP content items (dicts)
-            elif result and isinstance(result[0], dict) and "text" in result[0]:
-                formatted_parts = []
-                for item in result:
-                    formatted_parts.append(item["text"])
-                return "\n".join(formatted_parts)
+            # Check if it's a list of MCP content items
+            if ToolResultFormatter._is_text_items(result):
+                return ToolResultFormatter._join_text_items(result)
             else:
                 # List of alerts
                 output = [f"🔔 Found {len(result)} alert(s):\n"]
@@ -319,7 +368,7 @@ class ToolResultFormatter:
 
                 return "\n".join(output)
 
-        return json.dumps(result, indent=2)
+        return _dumps(result)
 
     @staticmethod
     def _format_datasource(result: Any) -> str:
@@ -329,17 +378,9 @@ class ToolResultFormatter:
 
         # Handle list of content items from MCP (TextContent objects or dicts)
         if isinstance(result, list):
-            # Check if it's MCP TextContent objects
-            if result and hasattr(result[0], 'text'):
-                formatted_parts = []
-                for item in result:
-                    formatted_parts.append(item.text)
-                return "\n".join(formatted_parts)
-            elif result and isinstance(result[0], dict) and "text" in result[0]:
-                formatted_parts = []
-                for item in result:
-                    formatted_parts.append(item["text"])
-                return "\n".join(formatted_parts)
+            # Check if it's a list of MCP content items
+            if ToolResultFormatter._is_text_items(result):
+                return ToolResultFormatter._join_text_items(result)
             else:
                 # List of datasources
                 output = [f"💾 Found {len(result)} datasource(s):\n"]
@@ -352,7 +393,7 @@ class ToolResultFormatter:
 
                 return "\n".join(output)
 
-        return json.dumps(result, indent=2)
+        return _dumps(result)
 
     @staticmethod
     def _format_search(result: Any) -> str:
@@ -362,16 +403,8 @@ class ToolResultFormatter:
 
         # Handle list of content items from MCP (TextContent objects or dicts)
         if isinstance(result, list):
-            if result and hasattr(result[0], 'text'):
-                formatted_parts = []
-                for item in result:
-                    formatted_parts.append(item.text)
-                return "\n".join(formatted_parts)
-            elif result and isinstance(result[0], dict) and "text" in result[0]:
-                formatted_parts = []
-                for item in result:
-                    formatted_parts.append(item["text"])
-                return "\n".join(formatted_parts)
+            if ToolResultFormatter._is_text_items(result):
+                return ToolResultFormatter._join_text_items(result)
             else:
                 # List of search results
                 output = [f"🔍 Found {len(result)} result(s):\n"]
@@ -387,7 +420,7 @@ class ToolResultFormatter:
 
                 return "\n".join(output)
 
-        return json.dumps(result, indent=2)
+        return _dumps(result)
 
     @staticmethod
     def _format_generic(result: Any) -> str:
@@ -396,34 +429,48 @@ class ToolResultFormatter:
             return "No result"
 
         # Handle list of content items from MCP (TextContent objects or dicts)
-        if isinstance(result, list):
-            if result and hasattr(result[0], 'text'):
-                formatted_parts = []
-                for item in result:
-                    if hasattr(item, 'text'):
-                        formatted_parts.append(item.text)
-                    else:
-                        formatted_parts.append(str(item))
-                return "\n".join(formatted_parts)
-            elif result and isinstance(result[0], dict) and "text" in result[0]:
-                formatted_parts = []
-                for item in result:
-                    if isinstance(item, dict) and "text" in item:
-                        formatted_parts.append(item["text"])
-                    else:
-                        formatted_parts.append(str(item))
-                return "\n".join(formatted_parts)
+        if isinstance(result, list) and ToolResultFormatter._is_text_items(result):
+            return ToolResultFormatter._join_text_items(result)
 
         # Handle simple types
         if isinstance(result, (str, int, float, bool)):
             return str(result)
 
-        # Handle complex types - format as JSON
+        # Handle complex types - format as JSON, serializing no more than is shown
         if isinstance(result, (dict, list)):
-            json_str = json.dumps(result, indent=2)
-            # Truncate if too long
-            if len(json_str) > 2000:
-                return json_str[:2000] + "\n\n... (truncated, result too large)"
+            json_str, truncated = _dumps_truncated(result, _GENERIC_OUTPUT_LIMIT)
+            if truncated:
+                return json_str + "\n\n... (truncated, result too large)"
             return json_str
 
         return str(result)
+
+
+# Formatters by exact tool name, checked first
+_EXACT_FORMATTERS: Dict[str, Callable[[Any], str]] = {
+    "search_dashboards": ToolResultFormatter._format_dashboard_search,
+}
+
+# Formatters by a substring of the lowercased tool name; the first match wins
+_SUBSTRING_FORMATTERS = (
+    ("prometheus", ToolResultFormatter._format_prometheus),
+    ("loki", ToolResultFormatter._format_loki),
+    ("dashboard", ToolResultFormatter._format_dashboard),
+    ("alert", ToolResultFormatter._format_alert),
+    ("datasource", ToolResultFormatter._format_datasource),
+    ("search", ToolResultFormatter._format_search),
+)
+
+
+@lru_cache(maxsize=256)
+def _formatter_for(tool_name: str) -> Callable[[Any], str]:
+    """Pick the formatter for a tool name, resolved once per name."""
+    exact = _EXACT_FORMATTERS.get(tool_name)
+    if exact is not None:
+        return exact
+
+    name = tool_name.lower()
+    return next(
+        (fn for sub, fn in _SUBSTRING_FORMATTERS if sub in name),
+        ToolResultFormatter._format_generic
+    )
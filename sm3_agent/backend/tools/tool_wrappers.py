@@ -5,7 +5,7 @@ import os
 import re
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Type
+from typing import Any, Dict, List, Optional, Tuple, Type
 
 import httpx
 
@@ -28,6 +28,10 @@ if TYPE_CHECKING:
 logger = get_logger(__name__)
 formatter = ToolResultFormatter()
 
+# One client, and so one session pool, per MCP server, shared by tool
+# discovery and every tool call; keyed by (server URL, cache namespace)
+_mcp_clients: Dict[Tuple[str, str], MCPClient] = {}
+
 _RELATIVE_TIME_RE = re.compile(r"^now(?:-(\d+)([smhd]))?$")
 
 
@@ -109,6 +113,27 @@ def _should_retry_query_error(error: Exception) -> bool:
     )
 
 
+def _get_mcp_client(settings: Settings, server_url: str, cache_namespace: str) -> MCPClient:
+    """Return the shared client for an MCP server, creating it on first use."""
+    key = (server_url, cache_namespace)
+    client = _mcp_clients.get(key)
+    if client is None:
+        client = _mcp_clients[key] = MCPClient(
+            settings=settings,
+            server_url=server_url,
+            cache_namespace=cache_namespace
+        )
+    return client
+
+
+async def close_mcp_clients() -> None:
+    """Disconnect every shared MCP client and forget it."""
+    clients = list(_mcp_clients.values())
+    _mcp_clients.clear()
+    for client in clients:
+        await client.disconnect()
+
+
 def _get_mcp_servers(settings: Settings) -> List[Dict[str, Any]]:
     urls = list(settings.mcp_server_urls) if settings.mcp_server_urls else []
     primary_url = settings.mcp_server_url
@@ -344,11 +369,7 @@ async def build_mcp_tools(settings: Settings) -> List[Tool]:
             server_url = server["url"]
             is_primary = server["primary"]
 
-            client = MCPClient(
-                settings=settings,
-                server_url=server_url,
-                cache_namespace=server_name
-            )
+            client = _get_mcp_client(settings, server_url, server_name)
 
             try:
                 await client.connect()
@@ -357,7 +378,7 @@ async def build_mcp_tools(settings: Settings) -> List[Tool]:
                     extra={"server": server_name, "url": server_url}
                 )
 
-                tools_response = await client.session.list_tools()
+                tools_response = await client.list_tools()
                 logger.info(
                     f"Discovered {len(tools_response.tools)} tools from MCP server",
                     extra={"server": server_name}
@@ -455,15 +476,9 @@ async def build_mcp_tools(settings: Settings) -> List[Tool]:
 
                             # Auto-select Prometheus datasource if missing (Grafana MCP only)
                             if is_primary and tool_name == "list_prometheus_metric_names" and "datasourceUid" not in arguments_dict:
-                                temp_client = MCPClient(
-                                    settings=settings,
-                                    server_url=server_url,
-                                    cache_namespace=server_name
+                                ds_result = await _get_mcp_client(settings, server_url, server_name).invoke_tool(
+                                    "list_datasources", {}
                                 )
-                                try:
-                                    ds_result = await temp_client.invoke_tool("list_datasources", {})
-                                finally:
-                                    await temp_client.disconnect()
                                 prom_uid = _extract_prometheus_uid(ds_result)
                                 if prom_uid:
                                     arguments_dict["datasourceUid"] = prom_uid
@@ -503,7 +518,7 @@ async def build_mcp_tools(settings: Settings) -> List[Tool]:
                                         f"Allowed commands: {', '.join(allowlist)}"
                                     )
 
-                                if get_execution_mode() == "suggest":
+                                if event["mode"] == "suggest":
                                     event["status"] = "suggested"
                                     _write_audit_event(settings, event)
                                     return (
@@ -516,31 +531,23 @@ async def build_mcp_tools(settings: Settings) -> List[Tool]:
                                 f"Invoking MCP tool: {display_name}",
                                 extra={"arguments": arguments_dict, "server": server_name}
                             )
-                            # Use a fresh MCP client per call to avoid cross-task teardown issues.
-                            call_client = MCPClient(
-                                settings=settings,
-                                server_url=server_url,
-                                cache_namespace=server_name
-                            )
+                            call_client = _get_mcp_client(settings, server_url, server_name)
                             try:
-                                try:
-                                    result = await call_client.invoke_tool(tool_name, arguments_dict)
-                                except Exception as e:
-                                    if _should_retry_query_error(e):
-                                        retry_args = _normalize_query_arguments(
-                                            tool_name,
-                                            arguments_dict,
-                                            force_step_seconds=True
-                                        )
-                                        logger.info(
-                                            "Retrying MCP tool with normalized arguments",
-                                            extra={"tool": tool_name, "arguments": retry_args}
-                                        )
-                                        result = await call_client.invoke_tool(tool_name, retry_args)
-                                    else:
-                                        raise
-                            finally:
-                                await call_client.disconnect()
+                                result = await call_client.invoke_tool(tool_name, arguments_dict)
+                            except Exception as e:
+                                if _should_retry_query_error(e):
+                                    retry_args = _normalize_query_arguments(
+                                        tool_name,
+                                        arguments_dict,
+                                        force_step_seconds=True
+                                    )
+                                    logger.info(
+                                        "Retrying MCP tool with normalized arguments",
+                                        extra={"tool": tool_name, "arguments": retry_args}
+                                    )
+                                    result = await call_client.invoke_tool(tool_name, retry_args)
+                                else:
+                                    raise
 
                             # Use structured formatter for better LLM comprehension
                             formatted_result = formatter.format(tool_name, result)
@@ -638,8 +645,6 @@ async def build_mcp_tools(settings: Settings) -> List[Tool]:
                     tool_kwargs["args_schema"] = args_schema
                 langchain_tools.append(StructuredTool.from_function(**tool_kwargs))
 
-            await client.disconnect()
-
         logger.info(f"Successfully created {len(langchain_tools)} LangChain tools")
         return langchain_tools
 
@@ -681,11 +686,7 @@ async def build_mcp_tools_for_servers(
         server_url = mcp_server.url
         is_primary = (server_type == "grafana" and server_url == primary_grafana_url)
         
-        client = MCPClient(
-            settings=settings,
-            server_url=server_url,
-            cache_namespace=server_type
-        )
+        client = _get_mcp_client(settings, server_url, server_type)
         
         try:
             await client.connect()
@@ -694,7 +695,7 @@ async def build_mcp_tools_for_servers(
                 extra={"type": server_type, "url": server_url}
             )
             
-            tools_response = await client.session.list_tools()
+            tools_response = await client.list_tools()
             logger.info(
                 f"Discovered {len(tools_response.tools)} tools from {server_type} MCP server"
             )
@@ -790,15 +791,9 @@ async def build_mcp_tools_for_servers(
 
                             # Auto-select Prometheus datasource if missing
                             if is_primary and tool_name == "list_prometheus_metric_names" and "datasourceUid" not in arguments_dict:
-                                temp_client = MCPClient(
-                                    settings=settings,
-                                    server_url=server_url,
-                                    cache_namespace=server_type
+                                ds_result = await _get_mcp_client(settings, server_url, server_type).invoke_tool(
+                                    "list_datasources", {}
                                 )
-                                try:
-                                    ds_result = await temp_client.invoke_tool("list_datasources", {})
-                                finally:
-                                    await temp_client.disconnect()
                                 prom_uid = _extract_prometheus_uid(ds_result)
                                 if prom_uid:
                                     arguments_dict["datasourceUid"] = prom_uid
@@ -842,7 +837,7 @@ async def build_mcp_tools_for_servers(
                                     f"Allowed commands: {', '.join(allowlist)}"
                                 )
 
-                            if get_execution_mode() == "suggest":
+                            if event["mode"] == "suggest":
                                 event["status"] = "suggested"
                                 _write_audit_event(settings, event)
                                 return (
@@ -855,31 +850,23 @@ async def build_mcp_tools_for_servers(
                             extra={"arguments": arguments_dict, "server_type": server_type}
                         )
                         
-                        # Use a fresh MCP client per call
-                        call_client = MCPClient(
-                            settings=settings,
-                            server_url=server_url,
-                            cache_namespace=server_type
-                        )
+                        call_client = _get_mcp_client(settings, server_url, server_type)
                         try:
-                            try:
-                                result = await call_client.invoke_tool(tool_name, arguments_dict)
-                            except Exception as e:
-                                if server_type == "grafana" and _should_retry_query_error(e):
-                                    retry_args = _normalize_query_arguments(
-                                        tool_name,
-                                        arguments_dict,
-                                        force_step_seconds=True
-                                    )
-                                    logger.info(
-                                        "Retrying MCP tool with normalized arguments",
-                                        extra={"tool": tool_name, "arguments": retry_args}
-                                    )
-                                    result = await call_client.invoke_tool(tool_name, retry_args)
-                                else:
-                                    raise
-                        finally:
-                            await call_client.disconnect()
+                            result = await call_client.invoke_tool(tool_name, arguments_dict)
+                        except Exception as e:
+                            if server_type == "grafana" and _should_retry_query_error(e):
+                                retry_args = _normalize_query_arguments(
+                                    tool_name,
+                                    arguments_dict,
+                                    force_step_seconds=True
+                                )
+                                logger.info(
+                                    "Retrying MCP tool with normalized arguments",
+                                    extra={"tool": tool_name, "arguments": retry_args}
+                                )
+                                result = await call_client.invoke_tool(tool_name, retry_args)
+                            else:
+                                raise
 
                         # Use structured formatter for better LLM comprehension
                         formatted_result = formatter.format(tool_name, result)
@@ -975,8 +962,6 @@ async def build_mcp_tools_for_servers(
             if args_schema is not None:
                 tool_kwargs["args_schema"] = args_schema
             langchain_tools.append(StructuredTool.from_function(**tool_kwargs))
-        
-        await client.disconnect()
     
     logger.info(
         f"Successfully created {len(langchain_tools)} LangChain tools from {len(mcp_servers)} MCP servers"
@@ -4,16 +4,17 @@ set -euo pipefail
 SERVICE=${SERVICE:-backend}
 BACKEND_PORT=${BACKEND_PORT:-8000}
 CHAINLIT_PORT=${CHAINLIT_PORT:-8001}
+UVICORN_OPTS=(--loop uvloop --http httptools)
 
 case "$SERVICE" in
   backend)
-    exec uvicorn backend.app.main:app --host 0.0.0.0 --port "$BACKEND_PORT"
+    exec uvicorn backend.app.main:app --host 0.0.0.0 --port "$BACKEND_PORT" "${UVICORN_OPTS[@]}"
     ;;
   chainlit)
     exec chainlit run frontend/chainlit_app.py -h 0.0.0.0 -p "$CHAINLIT_PORT"
     ;;
   all)
-    uvicorn backend.app.main:app --host 0.0.0.0 --port "$BACKEND_PORT" &
+    uvicorn backend.app.main:app --host 0.0.0.0 --port "$BACKEND_PORT" "${UVICORN_OPTS[@]}" &
     backend_pid=$!
 
     chainlit run frontend/chainlit_app.py -h 0.0.0.0 -p "$CHAINLIT_PORT" &
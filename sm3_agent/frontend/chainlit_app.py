@@ -93,6 +93,15 @@ What would you like to explore?"""
     await cl.Message(content=welcome_message).send()
 
 
+@cl.on_chat_end
+async def end():
+    """Release the session's memory when the user disconnects."""
+    session_id = cl.user_session.get("session_id")
+    if session_id is not None:
+        agent_manager.close_session(session_id)
+        logger.info(f"Chat session ended: {session_id}")
+
+
 @cl.on_settings_update
 async def on_settings_update(settings_dict):
     """Handle settings changes, particularly server selection."""
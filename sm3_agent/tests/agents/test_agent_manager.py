@@ -0,0 +1,78 @@
+"""
+Tests for the agent manager's session bookkeeping.
+
+Covers:
+- get_or_create_memory: one memory per session
+- close_session: per-session message counts observed into a histogram
+- expire_idle_sessions: closing sessions without recent messages
+"""
+import pytest
+from prometheus_client import REGISTRY
+
+from backend.agents.agent_manager import AgentManager
+from backend.app.config import Settings
+
+
+def sample(name, labels=None):
+    """Current value of a metric sample in the default registry."""
+    return REGISTRY.get_sample_value(name, labels or {})
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    """Agent manager that is never initialized, so no tools or servers are needed."""
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    return AgentManager(Settings())
+
+
+class TestSessions:
+    """Test per-session memory and message counting."""
+    
+    def test_memory_created_once_per_session(self, manager):
+        """Should reuse a session's memory and count only new sessions."""
+        before = sample("agent_sessions_total")
+        
+        first = manager.get_or_create_memory("s1")
+        
+        assert manager.get_or_create_memory("s1") is first
+        assert sample("agent_sessions_total") == before + 1
+    
+    def test_close_observes_message_count(self, manager):
+        """Should observe the session's message count once and forget the session."""
+        before = sample("agent_session_message_count_bucket", {"le": "10.0"})
+        total = sample("agent_session_messages_total")
+        manager.get_or_create_memory("s1")
+        for _ in range(3):
+            manager._record_message("s1")
+        
+        assert manager.close_session("s1") is True
+        
+        assert sample("agent_session_message_count_bucket", {"le": "10.0"}) == before + 1
+        assert sample("agent_session_messages_total") == total + 3
+        assert "s1" not in manager.session_memories
+        assert "s1" not in manager.session_message_counts
+    
+    def test_close_unknown_session(self, manager):
+        """Should report a session that was never opened without observing anything."""
+        before = sample("agent_session_message_count_count")
+        
+        assert manager.close_session("missing") is False
+        assert sample("agent_session_message_count_count") == before
+    
+    def test_expire_closes_only_idle_sessions(self, manager, monkeypatch):
+        """Should close sessions idle past the limit and keep recently active ones."""
+        now = [1000.0]
+        monkeypatch.setattr("backend.agents.agent_manager.time.monotonic", lambda: now[0])
+        before = sample("agent_session_message_count_count")
+        manager.get_or_create_memory("old")
+        manager._record_message("old")
+        now[0] += 50
+        manager.get_or_create_memory("new")
+        manager._record_message("new")
+        now[0] += 20
+        
+        assert manager.expire_idle_sessions(60) == 1
+        
+        assert list(manager.session_memories) == ["new"]
+        assert list(manager.session_last_active) == ["new"]
+        assert sample("agent_session_message_count_count") == before + 1
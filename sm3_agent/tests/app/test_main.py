@@ -0,0 +1,273 @@
+"""
+Tests for the customer and container API endpoints.
+
+Covers:
+- POST /api/chat: chat turns through the agent manager
+- POST /api/chat/stream: SSE stream left uncompressed
+- GET /api/customers and /api/grafana-servers: customer listings
+- POST /api/grafana-servers/switch: legacy switch delegating to the customer switch
+- GET /api/containers/health/{customer}: ETag and conditional requests
+- shutdown: every cleanup step runs even when an earlier one fails
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from backend.agents.agent_manager import CustomerSwitchResult
+from backend.app import main
+from backend.app.mcp_servers import Customer, MCPServer
+from backend.schemas.models import AgentResult, ChatRequest
+from backend.containers.manager import (
+    ContainerConfig,
+    ContainerState,
+    ContainerStatus,
+    CustomerContainers,
+    MCPType,
+)
+
+
+@pytest.fixture
+def client():
+    """Test client without running the startup hooks."""
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def customers(monkeypatch):
+    """Server and agent managers with a Grafana customer and an Alertmanager-only one."""
+    acme = Customer(
+        name="Acme",
+        description="Acme Corp",
+        mcp_servers=[
+            MCPServer(type="grafana", url="http://grafana:8888/mcp"),
+            MCPServer(type="alertmanager", url="http://am:8080/mcp"),
+        ],
+    )
+    globex = Customer(name="Globex", mcp_servers=[MCPServer(type="alertmanager", url="http://am:8080/mcp")])
+    
+    server_manager = MagicMock()
+    server_manager.config.customers = [acme, globex]
+    server_manager.get_default.return_value = acme
+    server_manager.get_customer.side_effect = {"Acme": acme, "Globex": globex}.get
+    agent_manager = MagicMock()
+    agent_manager.get_current_server_name.return_value = "Globex"
+    agent_manager.switch_customer = AsyncMock()
+    
+    monkeypatch.setattr(main, "server_manager", server_manager)
+    monkeypatch.setattr(main, "agent_manager", agent_manager)
+    return agent_manager
+
+
+@pytest.fixture
+def acme_containers(monkeypatch):
+    """Container manager reporting one healthy Grafana container for Acme."""
+    config = ContainerConfig(
+        customer_name="Acme",
+        mcp_type=MCPType.GRAFANA,
+        image="test/image:latest",
+        environment={},
+        port=3100,
+        internal_port=8888,
+    )
+    status = ContainerStatus(config=config, state=ContainerState.HEALTHY, container_id="abc123def4567890")
+    customer = CustomerContainers(customer_name="Acme", containers={MCPType.GRAFANA: status})
+    
+    manager = MagicMock()
+    manager.get_customer_status.return_value = customer
+    monkeypatch.setattr(main, "container_manager", manager)
+    monkeypatch.setattr(main, "DOCKER_AVAILABLE", True)
+    return customer
+
+
+class TestChat:
+    """Test the chat endpoint and its models."""
+    
+    def test_chat_returns_agent_result(self, client, monkeypatch):
+        """Should validate the request and answer with the agent's result."""
+        agent_manager = MagicMock()
+        agent_manager.run_chat = AsyncMock(return_value=AgentResult(message="hi", suggestions=["more"]))
+        monkeypatch.setattr(main, "agent_manager", agent_manager)
+        
+        body = client.post("/api/chat", json={"message": "hello", "session_id": "s1"}).json()
+        
+        agent_manager.run_chat.assert_awaited_once_with(message="hello", session_id="s1")
+        assert body == {"message": "hi", "tool_calls": [], "suggestions": ["more"]}
+    
+    def test_chat_counted_by_status_only(self, client, monkeypatch):
+        """Should count requests per status without a per-session series."""
+        agent_manager = MagicMock()
+        agent_manager.run_chat = AsyncMock(return_value=AgentResult(message="hi"))
+        monkeypatch.setattr(main, "agent_manager", agent_manager)
+        before = REGISTRY.get_sample_value("agent_chat_requests_total", {"status": "success"})
+        
+        client.post("/api/chat", json={"message": "hello", "session_id": "s2"})
+        
+        assert REGISTRY.get_sample_value("agent_chat_requests_total", {"status": "success"}) == before + 1
+        assert REGISTRY.get_sample_value(
+            "agent_chat_requests_total", {"session_id": "s2", "status": "success"}
+        ) is None
+    
+    def test_stream_not_gzipped(self, client, monkeypatch):
+        """Should send the SSE stream uncompressed even to clients accepting gzip."""
+        async def run_chat_stream(message, session_id):
+            yield {"type": "token", "content": "x" * 2048}
+            yield {"type": "complete"}
+        
+        agent_manager = MagicMock(run_chat_stream=run_chat_stream)
+        monkeypatch.setattr(main, "agent_manager", agent_manager)
+        
+        resp = client.post("/api/chat/stream", json={"message": "hello"}, headers={"Accept-Encoding": "gzip"})
+        
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        assert "content-encoding" not in resp.headers
+        assert "x" * 2048 in resp.text
+    
+    def test_models_are_frozen(self):
+        """Should parse raw JSON directly and reject changes afterwards."""
+        request = ChatRequest.model_validate_json('{"message": "hello"}')
+        
+        assert (request.message, request.session_id) == ("hello", None)
+        with pytest.raises(ValueError):
+            request.message = "changed"
+
+
+class TestCustomerListings:
+    """Test the new and legacy customer listing endpoints."""
+    
+    def test_customers_listing(self, client, customers):
+        """Should list every customer with its MCP servers and no legacy list."""
+        body = client.get("/api/customers").json()
+        
+        assert [c["name"] for c in body["customers"]] == ["Acme", "Globex"]
+        assert body["customers"][0]["mcp_servers"] == [
+            {"type": "grafana", "url": "http://grafana:8888/mcp"},
+            {"type": "alertmanager", "url": "http://am:8080/mcp"},
+        ]
+        assert "servers" not in body
+        assert (body["current"], body["default"]) == ("Globex", "Acme")
+    
+    def test_legacy_listing_only_grafana_customers(self, client, customers):
+        """Should list only customers with a Grafana server, in the legacy shape."""
+        body = client.get("/api/grafana-servers").json()
+        
+        assert body["servers"] == [
+            {"name": "Acme", "url": "http://grafana:8888/mcp", "description": "Acme Corp"}
+        ]
+        assert "customers" not in body
+        assert (body["current"], body["default"]) == ("Globex", "Acme")
+
+
+class TestLegacySwitch:
+    """Test the legacy Grafana switch endpoint."""
+    
+    def test_switch_reports_customer_result(self, client, customers):
+        """Should answer with the same details as the customer switch."""
+        customers.switch_customer.return_value = CustomerSwitchResult(
+            success=True,
+            customer_name="Acme",
+            message="Connected",
+            connected_mcps=["grafana", "alertmanager"],
+            failed_mcps=[],
+            tool_count=12,
+        )
+        
+        body = client.post("/api/grafana-servers/switch", json={"server_name": "Acme"}).json()
+        
+        customers.switch_customer.assert_awaited_once_with("Acme")
+        assert body["success"] is True
+        assert body["server_url"] == "http://grafana:8888/mcp"
+        assert body["mcp_server_count"] == 2
+        assert body["connected_mcps"] == ["grafana", "alertmanager"]
+        assert body["tool_count"] == 12
+    
+    def test_switch_reports_failure(self, client, customers):
+        """Should report a failed switch instead of claiming success."""
+        customers.switch_customer.return_value = CustomerSwitchResult(
+            success=False,
+            customer_name="Acme",
+            message="No MCP servers connected",
+            connected_mcps=[],
+            failed_mcps=["grafana"],
+            tool_count=0,
+        )
+        
+        body = client.post("/api/grafana-servers/switch", json={"server_name": "Acme"}).json()
+        
+        assert body["success"] is False
+        assert body["failed_mcps"] == ["grafana"]
+        assert body["message"] == "No MCP servers connected"
+    
+    def test_unknown_customer(self, client, customers):
+        """Should reject an unknown name without switching."""
+        body = client.post("/api/grafana-servers/switch", json={"server_name": "Initech"}).json()
+        
+        assert body["success"] is False
+        assert body["message"] == "Unknown customer: Initech"
+        customers.switch_customer.assert_not_called()
+
+
+class TestContainerHealthETag:
+    """Test conditional requests against the container health endpoint."""
+    
+    def test_response_carries_weak_etag(self, client, acme_containers):
+        """Should tag the health body with a weak ETag."""
+        resp = client.get("/api/containers/health/Acme")
+        
+        assert resp.status_code == 200
+        assert resp.headers["ETag"].startswith('W/"')
+        assert resp.json()["all_healthy"] is True
+    
+    def test_matching_etag_returns_304(self, client, acme_containers):
+        """Should answer 304 with no body while the states are unchanged."""
+        etag = client.get("/api/containers/health/Acme").headers["ETag"]
+        
+        resp = client.get("/api/containers/health/Acme", headers={"If-None-Match": etag})
+        
+        assert resp.status_code == 304
+        assert resp.content == b""
+        assert resp.headers["ETag"] == etag
+    
+    def test_etag_matched_in_list_and_without_weak_prefix(self, client, acme_containers):
+        """Should compare weakly and accept the tag anywhere in a comma-separated list."""
+        etag = client.get("/api/containers/health/Acme").headers["ETag"]
+        
+        resp = client.get(
+            "/api/containers/health/Acme",
+            headers={"If-None-Match": f'"other", {etag.removeprefix("W/")}'},
+        )
+        
+        assert resp.status_code == 304
+    
+    def test_etag_is_stable_across_processes(self, acme_containers):
+        """Should derive the same ETag from the same states regardless of hash salting."""
+        assert main._container_health_etag(acme_containers) == 'W/"991c0b8d00413bc9"'
+    
+    def test_state_change_invalidates_etag(self, client, acme_containers):
+        """Should send a full response once a container changes state."""
+        etag = client.get("/api/containers/health/Acme").headers["ETag"]
+        acme_containers.containers[MCPType.GRAFANA].state = ContainerState.UNHEALTHY
+        
+        resp = client.get("/api/containers/health/Acme", headers={"If-None-Match": etag})
+        
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] != etag
+        assert resp.json()["all_healthy"] is False
+
+
+class TestShutdown:
+    """Test the shutdown hook."""
+    
+    async def test_failing_step_does_not_skip_the_rest(self, monkeypatch):
+        """Should still stop the cache sweep and close MCP clients when closing webhooks fails."""
+        webhooks = MagicMock(aclose=AsyncMock(side_effect=RuntimeError("boom")))
+        cache = MagicMock(stop_cleanup=AsyncMock())
+        close_clients = AsyncMock()
+        monkeypatch.setattr(main, "get_webhook_manager", lambda: webhooks)
+        monkeypatch.setattr(main, "get_cache", lambda: cache)
+        monkeypatch.setattr(main, "close_mcp_clients", close_clients)
+        
+        await main.shutdown_event()
+        
+        cache.stop_cleanup.assert_awaited_once()
+        close_clients.assert_awaited_once()
@@ -0,0 +1,91 @@
+"""
+Tests for MCP server configuration parsing.
+
+Covers:
+- Customer: Grafana server and server type lookup helpers
+- MCPServerManager._parse_new_format / _parse_legacy_format
+"""
+import pytest
+from pathlib import Path
+
+from backend.app.mcp_servers import (
+    Customer,
+    MCPServer,
+    MCPServerManager,
+)
+
+
+@pytest.fixture
+def server_manager():
+    """MCPServerManager without touching the config files on disk."""
+    return object.__new__(MCPServerManager)
+
+
+class TestCustomer:
+    """Test the Customer dataclass helpers."""
+    
+    def test_grafana_server_resolved_on_construction(self):
+        """Should resolve the first Grafana server when the customer is built."""
+        grafana = MCPServer(type="grafana", url="http://grafana:8888/mcp")
+        customer = Customer(
+            name="Acme",
+            mcp_servers=[MCPServer(type="alertmanager"), grafana],
+        )
+        assert customer._grafana_server is grafana
+    
+    def test_grafana_server_none_without_grafana(self):
+        """Should leave the Grafana server unset for non-Grafana customers."""
+        customer = Customer(name="Acme", mcp_servers=[MCPServer(type="genesys")])
+        assert customer._grafana_server is None
+    
+    def test_server_types_deduplicated_in_config_order(self):
+        """Should list each server type once, in the order configured."""
+        customer = Customer(
+            name="Acme",
+            mcp_servers=[
+                MCPServer(type="grafana"),
+                MCPServer(type="alertmanager"),
+                MCPServer(type="grafana"),
+                MCPServer(type="genesys"),
+            ],
+        )
+        assert customer.get_server_types() == ["grafana", "alertmanager", "genesys"]
+    
+    def test_server_types_copy_is_safe_to_mutate(self):
+        """Should not let callers change the customer's cached server types."""
+        customer = Customer(name="Acme", mcp_servers=[MCPServer(type="grafana")])
+        customer.get_server_types().append("genesys")
+        
+        assert customer.get_server_types() == ["grafana"]
+
+
+class TestParseConfig:
+    """Test parsing of the config file formats."""
+    
+    def test_new_format_resolves_grafana_server(self, server_manager):
+        """Should expose the Grafana server of each parsed customer."""
+        data = {
+            "customers": [
+                {
+                    "name": "Acme",
+                    "mcp_servers": [
+                        {"type": "alertmanager"},
+                        {"type": "grafana", "url": "http://grafana:8888/mcp"},
+                    ],
+                },
+                {"name": "Globex", "mcp_servers": [{"type": "genesys"}]},
+            ],
+            "default": "Acme",
+        }
+        config = server_manager._parse_new_format(data, Path("mcp_servers.json"))
+        
+        acme, globex = config.customers
+        assert acme._grafana_server.url == "http://grafana:8888/mcp"
+        assert globex._grafana_server is None
+    
+    def test_legacy_format_resolves_grafana_server(self, server_manager):
+        """Should convert legacy servers to customers with a Grafana server."""
+        data = {"servers": [{"name": "Acme", "url": "http://grafana:8888/mcp"}]}
+        config = server_manager._parse_legacy_format(data, Path("grafana_servers.json"))
+        
+        assert config.customers[0]._grafana_server.url == "http://grafana:8888/mcp"
@@ -0,0 +1,446 @@
+"""
+Tests for the dynamic MCP container manager.
+
+Docker is replaced with a MagicMock client, and health probes with a fake
+HTTP session, so no daemon or network is needed.
+"""
+import asyncio
+import re
+import threading
+
+import pytest
+from unittest.mock import MagicMock
+
+from backend.containers.manager import (
+    APIError,
+    ImageNotFound,
+    ContainerConfig,
+    ContainerState,
+    ContainerStatus,
+    MCPContainerManager,
+    MCPType,
+    make_container_name,
+)
+
+
+class FakeResponse:
+    """Minimal async context manager standing in for an aiohttp response."""
+    
+    def __init__(self, status: int, gate: asyncio.Event = None):
+        self.status = status
+        self.gate = gate
+    
+    async def __aenter__(self):
+        if self.gate is not None:
+            await self.gate.wait()
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Records health probe requests and answers with a fixed status per method.
+    
+    When a gate event is given, responses are held back until it is set.
+    """
+    
+    def __init__(self, status: int = 200, head_status: int = None, gate: asyncio.Event = None):
+        self.status = status
+        self.head_status = status if head_status is None else head_status
+        self.gate = gate
+        self.requests = []
+        self.closed = False
+    
+    def get(self, url, **kwargs):
+        self.requests.append(("GET", url))
+        return FakeResponse(self.status, self.gate)
+    
+    def head(self, url, **kwargs):
+        self.requests.append(("HEAD", url))
+        return FakeResponse(self.head_status, self.gate)
+    
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def manager():
+    """Fresh container manager (not the global one) with a mocked Docker client."""
+    mgr = MCPContainerManager()
+    mgr._docker = MagicMock()
+    mgr._docker.containers.list.return_value = []
+    mgr._http_session = FakeSession(status=200)
+    return mgr
+
+
+def make_status(customer: str = "Acme", mcp_type: MCPType = MCPType.GRAFANA) -> ContainerStatus:
+    """Build a running container status for a customer."""
+    config = ContainerConfig(
+        customer_name=customer,
+        mcp_type=mcp_type,
+        image="test/image:latest",
+        environment={},
+        port=3100,
+        internal_port=8888,
+    )
+    return ContainerStatus(config=config, state=ContainerState.RUNNING, container_id=f"id-{customer}-{mcp_type.value}")
+
+
+def running_container(container_id: str = "abc123", name: str = "") -> MagicMock:
+    """Docker container mock that reports itself as running."""
+    container = MagicMock()
+    container.status = "running"
+    container.id = container_id
+    container.name = name
+    container.attrs = {}
+    return container
+
+
+def existing_grafana(customer: str, container_id: str) -> MagicMock:
+    """Running Grafana MCP container already present for a customer."""
+    return running_container(container_id, make_container_name(customer, MCPType.GRAFANA))
+
+
+GRAFANA_ONLY = [{"type": "grafana", "config": {"grafana_url": "https://grafana.example.com"}}]
+
+
+class TestPortAllocation:
+    """Test host port allocation per MCP type."""
+    
+    def test_allocates_lowest_free_port_per_type(self, manager):
+        """Should hand out ports from the start of each type's range."""
+        assert manager._allocate_port(MCPType.GRAFANA, "sm3-mcp-grafana-a") == 3100
+        assert manager._allocate_port(MCPType.GRAFANA, "sm3-mcp-grafana-b") == 3101
+        assert manager._allocate_port(MCPType.ALERTMANAGER, "sm3-mcp-alertmanager-a") == 9100
+    
+    def test_same_container_keeps_its_port(self, manager):
+        """Should return the existing allocation for a known container."""
+        port = manager._allocate_port(MCPType.GRAFANA, "sm3-mcp-grafana-a")
+        assert manager._allocate_port(MCPType.GRAFANA, "sm3-mcp-grafana-a") == port
+    
+    def test_released_port_is_reused(self, manager):
+        """Should make a released port the next one allocated."""
+        manager._allocate_port(MCPType.GRAFANA, "sm3-mcp-grafana-a")
+        manager._allocate_port(MCPType.GRAFANA, "sm3-mcp-grafana-b")
+        manager._release_port("sm3-mcp-grafana-a")
+        
+        assert manager._allocate_port(MCPType.GRAFANA, "sm3-mcp-grafana-c") == 3100
+    
+    async def test_skips_ports_of_existing_containers(self, manager):
+        """Should not hand out ports already bound by discovered containers."""
+        existing = running_container()
+        existing.name = "sm3-mcp-grafana-old"
+        existing.attrs = {"NetworkSettings": {"Ports": {"8888/tcp": [{"HostPort": "3100"}]}}}
+        
+        manager._scan_existing_containers([existing])
+        
+        assert manager._allocate_port(MCPType.GRAFANA, "sm3-mcp-grafana-a") == 3101
+    
+    def test_configure_rebuilds_only_moved_ranges(self, manager, mocker):
+        """Should leave the free-port heaps alone when the port ranges are unchanged."""
+        rebuild = mocker.spy(manager, "_rebuild_free_ports")
+        
+        manager.configure(port_ranges={"grafana": {"start": 3100, "internal": 8888}})
+        rebuild.assert_not_called()
+        
+        manager.configure(port_ranges={"grafana": {"start": 4100, "internal": 8888}})
+        rebuild.assert_called_once_with([MCPType.GRAFANA])
+        assert manager._allocate_port(MCPType.GRAFANA, "sm3-mcp-grafana-a") == 4100
+    
+    def test_raises_when_range_exhausted(self, manager):
+        """Should raise once every port in the range is taken."""
+        manager.configure(port_ranges={"grafana": {"start": 3100, "internal": 8888}})
+        for i in range(100):
+            manager._allocate_port(MCPType.GRAFANA, f"sm3-mcp-grafana-{i}")
+        
+        with pytest.raises(RuntimeError):
+            manager._allocate_port(MCPType.GRAFANA, "sm3-mcp-grafana-overflow")
+
+
+class TestContainerStartup:
+    """Test starting customer containers."""
+    
+    async def test_network_checked_once(self, manager):
+        """Should look up the Docker network once, not per container."""
+        await manager.start_customer_containers("Acme", GRAFANA_ONLY)
+        await manager.start_customer_containers("Globex", GRAFANA_ONLY)
+        
+        manager._docker.networks.get.assert_called_once_with("sm3-mcp-network")
+        assert manager._docker.containers.run.call_count == 2
+    
+    async def test_connects_and_scans_off_the_event_loop(self, manager):
+        """Should connect to Docker and scan existing ports in worker threads."""
+        client = manager._docker
+        manager._docker = None
+        loop_thread = threading.get_ident()
+        threads = []
+        
+        def connect():
+            threads.append(threading.get_ident())
+            manager._docker = client
+        
+        def list_containers(**kwargs):
+            threads.append(threading.get_ident())
+            return []
+        
+        manager._connect_docker = connect
+        client.containers.list.side_effect = list_containers
+        
+        await manager.start_customer_containers("Acme", GRAFANA_ONLY, wait_for_healthy=False)
+        
+        assert threads and loop_thread not in threads
+    
+    async def test_run_arguments_built_from_config(self, manager):
+        """Should pass the per-type command and the sm3 labels to Docker."""
+        await manager.start_customer_containers("Acme", GRAFANA_ONLY)
+        
+        kwargs = manager._docker.containers.run.call_args.kwargs
+        assert kwargs["command"] == ["--transport", "streamable-http", "--address", "0.0.0.0:8888"]
+        assert kwargs["labels"] == {"sm3.managed": "true", "sm3.customer": "Acme", "sm3.mcp_type": "grafana"}
+        assert kwargs["restart_policy"] == {"Name": "unless-stopped"}
+    
+    async def test_reuses_running_container_from_single_listing(self, manager):
+        """Should find existing containers with one list call instead of per-container gets."""
+        manager._docker.containers.list.return_value = [existing_grafana("Acme", "existing-id")]
+        
+        customer = await manager.start_customer_containers("Acme", GRAFANA_ONLY)
+        
+        assert customer.containers[MCPType.GRAFANA].container_id == "existing-id"
+        manager._docker.containers.get.assert_not_called()
+        manager._docker.containers.run.assert_not_called()
+    
+    async def test_first_start_lists_containers_once(self, manager):
+        """Should scan ports and find existing containers from the same labelled listing."""
+        existing = existing_grafana("Acme", "existing-id")
+        existing.attrs = {"NetworkSettings": {"Ports": {"8888/tcp": [{"HostPort": "3100"}]}}}
+        manager._docker.containers.list.return_value = [existing]
+        
+        await manager.start_customer_containers("Acme", GRAFANA_ONLY)
+        
+        manager._docker.containers.list.assert_called_once_with(all=True, filters={"label": "sm3.managed=true"})
+        assert manager._port_allocations == {existing.name: 3100}
+    
+    async def test_image_lookup_skipped_once_present(self, manager):
+        """Should only check for an image the first time it is used."""
+        await manager.start_customer_containers("Acme", GRAFANA_ONLY)
+        await manager.start_customer_containers("Globex", GRAFANA_ONLY)
+        
+        manager._docker.images.get.assert_called_once()
+        manager._docker.api.pull.assert_not_called()
+    
+    async def test_missing_image_pulled_with_streamed_progress(self, manager):
+        """Should pull a missing image through the streaming API."""
+        manager._docker.images.get.side_effect = ImageNotFound("missing")
+        manager._docker.api.pull.return_value = iter([{"status": "Downloading"}, {"status": "Done"}])
+        
+        customer = await manager.start_customer_containers("Acme", GRAFANA_ONLY)
+        
+        manager._docker.api.pull.assert_called_once_with("grafana/mcp-grafana:latest", stream=True, decode=True)
+        assert customer.all_healthy()
+    
+    async def test_failed_pull_marks_container_error(self, manager):
+        """Should record a pull error reported in the progress stream."""
+        manager._docker.images.get.side_effect = ImageNotFound("missing")
+        manager._docker.api.pull.return_value = iter([{"error": "manifest unknown"}])
+        
+        customer = await manager.start_customer_containers("Acme", GRAFANA_ONLY)
+        
+        status = customer.containers[MCPType.GRAFANA]
+        assert status.state == ContainerState.ERROR
+        assert "manifest unknown" in status.error_message
+        manager._docker.containers.run.assert_not_called()
+    
+    async def test_falls_back_to_exact_name_lookup(self, manager):
+        """Should look up each container by exact name when the bulk listing fails."""
+        def list_containers(all=False, filters=None):
+            if filters == {"label": "sm3.managed=true"}:
+                raise APIError("daemon busy")
+            return []
+        
+        manager._docker.containers.list.side_effect = list_containers
+        
+        await manager.start_customer_containers("Acme.io (EU)", GRAFANA_ONLY)
+        
+        name = make_container_name("Acme.io (EU)", MCPType.GRAFANA)
+        manager._docker.containers.list.assert_called_with(
+            all=True, filters={"name": f"^/?{re.escape(name)}$"}
+        )
+        manager._docker.containers.get.assert_not_called()
+        manager._docker.containers.run.assert_called_once()
+    
+    async def test_evicts_least_recently_used_customer(self, manager):
+        """Should stop the least recently used customer once over the warm limit."""
+        manager.configure(max_warm=2)
+        
+        for name in ("Acme", "Globex", "Initech"):
+            await manager.start_customer_containers(name, GRAFANA_ONLY)
+            if name == "Globex":
+                # Touch Acme again so Globex becomes the oldest
+                await manager.start_customer_containers("Acme", GRAFANA_ONLY)
+        
+        assert manager.get_active_customers() == ["Acme", "Initech"]
+
+
+class TestOrphanCleanup:
+    """Test removal of SM3 containers no customer owns."""
+    
+    async def test_removes_only_unmanaged_containers(self, manager):
+        """Should keep containers of tracked customers and remove the rest."""
+        manager._docker.containers.list.return_value = [existing_grafana("Acme", "managed-id")]
+        await manager.start_customer_containers("Acme", GRAFANA_ONLY)
+        
+        orphan = running_container("orphan-id")
+        manager._docker.containers.list.return_value = [running_container("managed-id"), orphan]
+        
+        assert await manager.cleanup_orphaned_containers() == 1
+        orphan.remove.assert_called_once_with(force=True)
+    
+    async def test_failed_removal_not_counted(self, manager):
+        """Should keep removing other orphans when one removal fails."""
+        broken = running_container("broken-id")
+        broken.remove.side_effect = APIError("conflict")
+        orphan = running_container("orphan-id")
+        manager._docker.containers.list.return_value = [broken, orphan]
+        
+        assert await manager.cleanup_orphaned_containers() == 1
+        orphan.remove.assert_called_once_with(force=True)
+    
+    async def test_stopped_customer_containers_become_unmanaged(self, manager):
+        """Should forget container IDs once their customer is stopped."""
+        manager._docker.containers.list.return_value = [existing_grafana("Acme", "managed-id")]
+        await manager.start_customer_containers("Acme", GRAFANA_ONLY)
+        await manager.stop_customer_containers("Acme")
+        
+        assert "managed-id" not in manager._managed_ids
+
+
+class TestHealthChecks:
+    """Test container health probing."""
+    
+    async def test_probes_share_one_http_session(self, manager):
+        """Should reuse the manager's HTTP session across containers."""
+        session = FakeSession(status=200)
+        manager._http_session = session
+        
+        first = await manager._wait_for_healthy(make_status("Acme"), timeout=1)
+        second = await manager._wait_for_healthy(make_status("Globex"), timeout=1)
+        
+        assert first.state == ContainerState.HEALTHY
+        assert second.state == ContainerState.HEALTHY
+        assert len(session.requests) == 2
+        assert manager._http_session is session
+    
+    async def test_probes_with_head(self, manager):
+        """Should probe the health endpoint with HEAD."""
+        status = await manager._wait_for_healthy(make_status(), timeout=1)
+        
+        assert status.state == ContainerState.HEALTHY
+        assert manager._http_session.requests == [("HEAD", status.config.health_url)]
+    
+    @pytest.mark.parametrize("head_status", [404, 405, 501])
+    async def test_falls_back_to_get_when_head_unsupported(self, manager, head_status):
+        """Should retry with GET, and keep using it, when HEAD isn't allowed or routed."""
+        manager._http_session = FakeSession(status=200, head_status=head_status)
+        
+        first = await manager._wait_for_healthy(make_status(), timeout=1)
+        second = await manager._wait_for_healthy(make_status(), timeout=1)
+        
+        url = first.config.health_url
+        assert first.state == ContainerState.HEALTHY
+        assert second.state == ContainerState.HEALTHY
+        assert manager._http_session.requests == [("HEAD", url), ("GET", url), ("GET", url)]
+    
+    async def test_get_405_counts_as_healthy(self, manager):
+        """Should treat 405 to the fallback GET as an endpoint that exists."""
+        manager._http_session = FakeSession(status=405)
+        
+        status = await manager._wait_for_healthy(make_status(), timeout=1)
+        
+        url = status.config.health_url
+        assert status.state == ContainerState.HEALTHY
+        assert manager._http_session.requests == [("HEAD", url), ("GET", url)]
+    
+    async def test_retry_delay_backs_off_to_interval(self, manager, monkeypatch):
+        """Should retry fast after start and back off to the configured interval."""
+        manager._http_session = FakeSession(status=503)
+        manager._health_interval = 2
+        delays = []
+        
+        async def fake_sleep(delay):
+            delays.append(delay)
+            if len(delays) >= 6:
+                raise asyncio.CancelledError
+        
+        monkeypatch.setattr("backend.containers.manager.asyncio.sleep", fake_sleep)
+        with pytest.raises(asyncio.CancelledError):
+            await manager._wait_for_healthy(make_status(), timeout=60)
+        
+        assert delays == pytest.approx([0.2, 0.4, 0.8, 1.6, 2, 2])
+    
+    async def test_stop_all_closes_http_session(self, manager):
+        """Should close the shared HTTP session on shutdown."""
+        session = FakeSession()
+        manager._http_session = session
+        
+        await manager.stop_all_containers()
+        
+        assert session.closed
+        assert manager._http_session is None
+    
+    async def test_health_checks_run_in_background(self, manager):
+        """Should return before health checks finish and update the state afterwards."""
+        probes = asyncio.Event()
+        manager._http_session = FakeSession(status=200, gate=probes)
+        
+        customer = await manager.start_customer_containers("Acme", GRAFANA_ONLY, wait_for_healthy=False)
+        status = customer.containers[MCPType.GRAFANA]
+        assert status.state == ContainerState.RUNNING
+        assert status.config.container_name in manager._health_tasks
+        
+        probes.set()
+        await asyncio.gather(*manager._health_tasks.values())
+        
+        assert status.state == ContainerState.HEALTHY
+        assert manager.get_container_urls("Acme") == {"grafana": status.config.url}
+    
+    async def test_health_check_starts_before_slower_siblings(self, manager):
+        """Should begin probing a started container while other containers are still starting."""
+        release = asyncio.Event()
+        probes = asyncio.Event()
+        session = FakeSession(status=200, gate=probes)
+        manager._http_session = session
+        start_container = manager._start_container
+        
+        async def start(config, existing_containers=None):
+            if config.mcp_type == MCPType.ALERTMANAGER:
+                await release.wait()
+            return await start_container(config, existing_containers)
+        
+        manager._start_container = start
+        servers = GRAFANA_ONLY + [{"type": "alertmanager", "config": {"url": "https://am.example.com"}}]
+        startup = asyncio.create_task(
+            manager.start_customer_containers("Acme", servers, wait_for_healthy=False)
+        )
+        for _ in range(100):
+            if session.requests:
+                break
+            await asyncio.sleep(0.01)
+        
+        grafana_name = make_container_name("Acme", MCPType.GRAFANA)
+        assert [url for _, url in session.requests] == [f"http://{grafana_name}:8888/mcp"]
+        assert not startup.done()
+        
+        release.set()
+        customer = await startup
+        assert set(customer.containers) == {MCPType.GRAFANA, MCPType.ALERTMANAGER}
+        probes.set()
+        await asyncio.gather(*manager._health_tasks.values())
+    
+    async def test_wait_for_healthy_awaits_background_checks(self, manager):
+        """Should only return once the background health checks have settled."""
+        
+        customer = await manager.start_customer_containers("Acme", GRAFANA_ONLY, wait_for_healthy=True)
+        
+        assert customer.all_healthy()
+        assert not manager._health_tasks
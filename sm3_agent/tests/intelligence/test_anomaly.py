@@ -0,0 +1,337 @@
+"""
+Tests for the anomaly detection engine.
+
+Covers:
+- AnomalyDetector: Z-score, IQR, MAD and rate-of-change detectors
+- AnomalyDetector.detect_anomalies: combining and deduplicating methods
+- AnomalyDetector.detect_anomalies_batch: Z-scoring many metrics at once
+- PatternDetector: trend and seasonality detection
+- TimeSeries: parallel-array form of a series, time zone aware timestamps
+- _anomaly_kernels: compiled kernels agree with their NumPy fallback
+"""
+import statistics
+import warnings
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from backend.intelligence import _anomaly_kernels as kernels
+from backend.intelligence.anomaly import (
+    Anomaly,
+    AnomalyDetector,
+    PatternDetector,
+    TimeSeries,
+    TimeSeriesPoint,
+)
+
+
+START = datetime(2026, 1, 1)
+
+
+def make_series(values):
+    """Build a one-minute resolution series from raw values."""
+    return [TimeSeriesPoint(timestamp=START + timedelta(minutes=i), value=v) for i, v in enumerate(values)]
+
+
+def make_anomaly(minute, confidence, severity, method="zscore"):
+    """Build an anomaly at the given minute of the series."""
+    return Anomaly(
+        timestamp=START + timedelta(minutes=minute),
+        metric_name="cpu",
+        value=1.0,
+        expected_value=0.0,
+        deviation=1.0,
+        severity=severity,
+        method=method,
+        context={},
+        confidence=confidence,
+    )
+
+
+def make_arrays(values):
+    """Build the same series in its parallel-array form."""
+    return TimeSeries.from_points(make_series(values))
+
+
+# Flat series with a single spike at index 15
+SPIKE = [10.0, 11.0, 9.0, 10.0, 10.5, 9.5, 10.0, 11.0, 9.0, 10.0,
+         10.5, 9.5, 10.0, 11.0, 9.0, 100.0, 10.0, 10.5, 9.5, 10.0]
+
+
+@pytest.fixture
+def detector():
+    """Fresh anomaly detector (not the global one)."""
+    return AnomalyDetector()
+
+
+class TestDetectors:
+    """Test the individual statistical detectors."""
+    
+    def test_zscore_flags_spike(self, detector):
+        """Should flag only the spike, with the sample mean and stdev in its context."""
+        anomalies = detector._detect_zscore(make_arrays(SPIKE), "cpu")
+        
+        assert [a.timestamp for a in anomalies] == [START + timedelta(minutes=15)]
+        spike = anomalies[0]
+        assert spike.value == 100.0
+        assert spike.context["mean"] == pytest.approx(14.5)
+        stdev = statistics.stdev(SPIKE)
+        assert spike.context["stdev"] == pytest.approx(stdev)
+        assert spike.context["z_score"] == pytest.approx((100.0 - 14.5) / stdev)
+        assert type(spike.context["z_score"]) is float
+    
+    def test_zscore_ignores_constant_series(self, detector):
+        """Should find nothing when the series has no spread."""
+        assert detector._detect_zscore(make_arrays([5.0] * 10), "cpu") == []
+    
+    def test_iqr_flags_spike(self, detector):
+        """Should flag values outside the IQR fences and report the bound as expected."""
+        anomalies = detector._detect_iqr(make_arrays(SPIKE), "cpu")
+        
+        assert [a.value for a in anomalies] == [100.0]
+        spike = anomalies[0]
+        assert spike.expected_value == spike.context["upper_bound"]
+        assert spike.context["q1"] < spike.context["q3"]
+    
+    def test_iqr_uses_interpolated_quartiles(self, detector):
+        """Should interpolate between ranks rather than pick the nearest index."""
+        anomalies = detector._detect_iqr(make_arrays([1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 40.0]), "cpu")
+        
+        assert [a.value for a in anomalies] == [40.0]
+        assert (anomalies[0].context["q1"], anomalies[0].context["q3"]) == (2.5, 5.5)
+        assert anomalies[0].context["upper_bound"] == 10.0
+    
+    def test_mad_flags_spike(self, detector):
+        """Should flag the spike using the median absolute deviation."""
+        anomalies = detector._detect_mad(make_arrays(SPIKE), "cpu")
+        
+        assert [a.value for a in anomalies] == [100.0]
+        assert anomalies[0].context["median"] == 10.0
+        assert anomalies[0].context["mad"] == 0.5
+    
+    def test_mad_falls_back_to_mean_deviation(self, detector):
+        """Should use the mean absolute deviation when the MAD is zero."""
+        anomalies = detector._detect_mad(make_arrays([10.0] * 9 + [50.0]), "cpu")
+        
+        assert [a.value for a in anomalies] == [50.0]
+        assert anomalies[0].context["mad"] == pytest.approx(4.0)
+    
+    def test_rate_change_flags_jumps_and_skips_zero_base(self, detector):
+        """Should flag sudden relative changes, skipping points after a zero."""
+        anomalies = detector._detect_rate_change(make_arrays([10.0, 10.5, 30.0, 0.0, 50.0, 51.0]), "cpu")
+        
+        assert [(a.value, a.expected_value) for a in anomalies] == [(30.0, 10.5), (0.0, 30.0)]
+        assert anomalies[0].context["percent_change"] == pytest.approx(185.714, rel=1e-4)
+    
+    def test_rate_change_relative_to_negative_base(self, detector):
+        """Should measure the change against the magnitude of a negative predecessor."""
+        anomalies = detector._detect_rate_change(make_arrays([-10.0, -10.2, -2.0]), "temp")
+        
+        assert [a.value for a in anomalies] == [-2.0]
+        assert anomalies[0].context["percent_change"] == pytest.approx(80.392, rel=1e-4)
+
+
+class TestDetectAnomalies:
+    """Test combining the detectors."""
+    
+    def test_one_anomaly_per_timestamp(self, detector):
+        """Should keep a single, most confident anomaly per timestamp."""
+        anomalies = detector.detect_anomalies(make_series(SPIKE), "cpu", methods=["zscore", "iqr", "mad"])
+        
+        assert len(anomalies) == 1
+        assert anomalies[0].timestamp == START + timedelta(minutes=15)
+        assert anomalies[0].confidence == 1.0
+    
+    def test_sorted_by_severity(self, detector):
+        """Should list more severe anomalies first."""
+        anomalies = detector.detect_anomalies(make_series(SPIKE), "cpu")
+        
+        ranks = [["critical", "high", "medium", "low"].index(a.severity) for a in anomalies]
+        assert ranks == sorted(ranks)
+    
+    def test_list_and_array_forms_agree(self, detector):
+        """Should find the same anomalies from points and from parallel arrays."""
+        methods = ["zscore", "iqr", "mad", "rate_change"]
+        
+        from_points = detector.detect_anomalies(make_series(SPIKE), "cpu", methods=methods)
+        from_arrays = detector.detect_anomalies_soa(make_arrays(SPIKE), "cpu", methods=methods)
+        
+        assert from_points == from_arrays
+        assert all(isinstance(a.timestamp, datetime) for a in from_arrays)
+    
+    def test_reported_numbers_keep_double_precision(self, detector):
+        """Should report values and statistics from the float64 values, not the float32 scan copy."""
+        counter = [123456789.123 + i for i in range(19)] + [987654321.123]
+        
+        anomalies = detector.detect_anomalies(make_series(counter), "bytes", methods=["zscore"])
+        
+        assert anomalies[0].value == 987654321.123
+        assert anomalies[0].expected_value == pytest.approx(statistics.fmean(counter), rel=1e-15)
+        
+        small = detector._detect_zscore(make_arrays([0.105] * 19 + [5.0]), "ratio", threshold=3.0)
+        assert small[0].expected_value == pytest.approx((0.105 * 19 + 5.0) / 20, rel=1e-15)
+    
+    def test_aware_timestamps_reported_in_their_zone(self, detector):
+        """Should convert aware timestamps without warnings and report them with their zone."""
+        zone = timezone(timedelta(hours=2))
+        points = [
+            TimeSeriesPoint(timestamp=(START + timedelta(minutes=i)).replace(tzinfo=zone), value=v)
+            for i, v in enumerate(SPIKE)
+        ]
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            anomalies = detector.detect_anomalies(points, "cpu", methods=["zscore"])
+        
+        assert [a.timestamp for a in anomalies] == [points[15].timestamp]
+        assert anomalies[0].timestamp.utcoffset() == timedelta(hours=2)
+    
+    def test_scans_values_once(self, detector, mocker):
+        """Should compute every method's statistics in a single kernel call."""
+        scan = mocker.spy(detector, "_scan")
+        
+        detector.detect_anomalies(make_series(SPIKE), "cpu", methods=["zscore", "iqr", "mad", "rate_change"])
+        
+        scan.assert_called_once()
+    
+    def test_deduplicate_prefers_confidence_then_severity(self, detector):
+        """Should keep the most confident anomaly per timestamp, breaking ties on severity."""
+        anomalies = [
+            make_anomaly(2, 0.5, "critical", "iqr"),
+            make_anomaly(1, 0.8, "low", "iqr"),
+            make_anomaly(2, 0.9, "low", "zscore"),
+            make_anomaly(1, 0.8, "high", "mad"),
+        ]
+        
+        kept = detector._deduplicate_anomalies(anomalies)
+        
+        assert [(a.timestamp.minute, a.method) for a in kept] == [(1, "mad"), (2, "zscore")]
+    
+    def test_too_few_points(self, detector):
+        """Should skip detection for fewer than three points."""
+        assert detector.detect_anomalies(make_series([1.0, 50.0]), "cpu") == []
+
+
+class TestDetectAnomaliesBatch:
+    """Test scanning many metrics at once."""
+    
+    def test_matches_single_metric_zscore(self, detector):
+        """Should find the same anomalies per metric as the single-series detector."""
+        series = {
+            "cpu": make_arrays(SPIKE),
+            "mem": make_arrays([10.0] * 9 + [50.0]),
+            "disk": make_arrays([5.0] * 12),
+        }
+        
+        results = detector.detect_anomalies_batch(series)
+        
+        assert list(results) == ["cpu", "mem", "disk"]
+        for name, data in series.items():
+            assert results[name] == detector._detect_zscore(data, name)
+        assert [a.value for a in results["cpu"]] == [100.0]
+        assert results["disk"] == []
+    
+    def test_skips_short_series(self, detector):
+        """Should skip metrics with fewer than three points."""
+        results = detector.detect_anomalies_batch({"cpu": make_arrays(SPIKE), "new": make_arrays([1.0, 90.0])})
+        
+        assert results["new"] == []
+        assert len(results["cpu"]) == 1
+    
+    def test_empty_batch(self, detector):
+        """Should return no results for no metrics."""
+        assert detector.detect_anomalies_batch({}) == {}
+
+
+class TestPatternDetector:
+    """Test trend and seasonality detection."""
+    
+    def test_increasing_trend(self):
+        """Should fit the slope and report a perfect line with full confidence."""
+        result = PatternDetector().detect_trends(make_series([1.0, 3.0, 5.0, 7.0, 9.0]))
+        
+        assert result["trend"] == "increasing"
+        assert result["slope"] == pytest.approx(2.0)
+        assert result["confidence"] == pytest.approx(1.0)
+        assert type(result["slope"]) is float
+    
+    def test_noisy_decreasing_trend(self):
+        """Should match an ordinary least-squares fit on noisy data."""
+        values = [10.0, 9.5, 8.0, 8.5, 6.0, 5.5]
+        slope, intercept = np.polyfit(np.arange(len(values)), values, 1)
+        predicted = slope * np.arange(len(values)) + intercept
+        r_squared = 1 - np.sum((values - predicted) ** 2) / np.sum((values - np.mean(values)) ** 2)
+        
+        result = PatternDetector().detect_trends(make_series(values))
+        
+        assert result["trend"] == "decreasing"
+        assert result["slope"] == pytest.approx(slope)
+        assert result["confidence"] == pytest.approx(r_squared)
+    
+    def test_flat_series_is_stable(self):
+        """Should report a stable trend with no confidence for a constant series."""
+        result = PatternDetector().detect_trends(make_series([4.0] * 6))
+        
+        assert result["trend"] == "stable"
+        assert result["confidence"] == 0
+    
+    def test_seasonality_finds_dominant_period(self):
+        """Should report the period of a repeating signal, in points."""
+        values = (50 + 10 * np.sin(2 * np.pi * np.arange(96) / 12)).tolist()
+        
+        result = PatternDetector().detect_seasonality(make_series(values))
+        
+        assert result["has_seasonality"] is True
+        assert result["period"] == pytest.approx(12.0)
+        assert result["confidence"] > 0.5
+    
+    def test_constant_series_has_no_seasonality(self):
+        """Should not report seasonality without any variation."""
+        result = PatternDetector().detect_seasonality(make_series([3.0] * 48))
+        
+        assert result["has_seasonality"] is False
+        assert result["period"] is None
+    
+    def test_seasonality_needs_enough_points(self):
+        """Should skip series shorter than 24 points."""
+        assert PatternDetector().detect_seasonality(make_series([1.0, 2.0] * 6))["has_seasonality"] is False
+
+
+@pytest.mark.skipif(not kernels.NUMBA_AVAILABLE, reason="numba not installed")
+class TestKernels:
+    """Test the compiled kernels against their uncompiled NumPy versions."""
+    
+    @pytest.mark.parametrize("values", [SPIKE, [10.0] * 9 + [50.0], [0.0, 1.0, 0.0, 5.0]])
+    def test_compiled_scan_matches_numpy(self, values):
+        """Should return the same statistics and scores with and without Numba."""
+        values = np.array(values)
+        scan_values = values.astype(np.float32)
+        
+        compiled = kernels.scan_kernel(values, scan_values, True, True, True, True)
+        fallback = kernels.scan_kernel.py_func(values, scan_values, True, True, True, True)
+        
+        for got, expected in zip(compiled, fallback):
+            np.testing.assert_allclose(got, expected, rtol=1e-6)
+    
+    def test_compiled_batch_matches_numpy(self):
+        """Should flag the same points and statistics in parallel as the serial loop."""
+        values = np.zeros((3, len(SPIKE)), dtype=np.float32)
+        values[0] = SPIKE
+        values[1, :10] = [10.0] * 9 + [50.0]
+        lengths = np.array([len(SPIKE), 10, 2])
+        
+        compiled = kernels.zscore_batch(values, lengths, 2.5)
+        fallback = kernels.zscore_batch.py_func(values, lengths, 2.5)
+        
+        for got, expected in zip(compiled, fallback):
+            np.testing.assert_allclose(got, expected, rtol=1e-6)
+    
+    def test_welford_is_stable_for_large_offsets(self):
+        """Should keep the variance of small changes on a huge baseline."""
+        values = 1e9 + np.array([4.0, 7.0, 13.0, 16.0])
+        
+        mean, stdev = kernels.mean_stdev(values)
+        
+        assert mean == pytest.approx(1e9 + 10.0)
+        assert stdev == pytest.approx(np.std(values - 1e9, ddof=1))
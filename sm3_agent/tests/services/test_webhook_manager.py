@@ -0,0 +1,178 @@
+"""
+Tests for the webhook manager service.
+
+Covers:
+- WebhookManager.record_alert_received: alert reception tracking
+- WebhookManager.iter_webhooks: live view of the webhooks
+- WebhookManager.get_status_summary: status counts
+- WebhookManager._build_config_instructions: cached instructions
+- WebhookManager.validate_alertmanager: shared HTTP client
+- WebhookManager.validate_all: concurrent AlertManager validation
+"""
+import asyncio
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+import respx
+
+from backend.services.webhook_manager import (
+    CustomerWebhook,
+    WebhookManager,
+    WebhookValidationResult,
+)
+
+
+@pytest.fixture
+def manager():
+    """Webhook manager with two registered customers (not the singleton)."""
+    manager = WebhookManager()
+    for name in ("Acme", "Globex"):
+        manager._webhooks[name] = CustomerWebhook(
+            customer_name=name,
+            webhook_url=f"http://localhost:8000/api/alerts/ingest/{name}",
+            alertmanager_url=f"http://am-{name.lower()}:9093",
+        )
+    return manager
+
+
+class TestRecordAlertReceived:
+    """Test tracking alerts received from AlertManager."""
+    
+    def test_records_alert_with_aware_timestamp(self, manager):
+        """Should count the alert, clear errors and stamp the time in UTC."""
+        manager.record_error("Acme", "unreachable")
+        before = datetime.now(timezone.utc)
+        
+        manager.record_alert_received("Acme")
+        manager.record_alert_received("Acme")
+        
+        webhook = manager.get_webhook("Acme")
+        assert webhook.total_alerts_received == 2
+        assert (webhook.status.value, webhook.last_error) == ("configured", None)
+        assert webhook.last_alert_received.tzinfo is timezone.utc
+        assert webhook.last_alert_received >= before
+    
+    def test_unknown_customer_ignored(self, manager):
+        """Should ignore alerts for customers without a webhook."""
+        manager.record_alert_received("Initech")
+        
+        assert manager.get_webhook("Initech") is None
+
+
+class TestIterWebhooks:
+    """Test listing webhook configurations."""
+    
+    def test_view_tracks_registrations(self, manager):
+        """Should return a live view rather than a snapshot copy."""
+        view = manager.iter_webhooks()
+        manager._webhooks.pop("Globex")
+        
+        assert [w.customer_name for w in view] == ["Acme"]
+        assert [w.customer_name for w in manager.get_all_webhooks()] == ["Acme"]
+
+
+class TestStatusSummary:
+    """Test the webhook status summary."""
+    
+    def test_counts_statuses_and_customers_with_alerts(self, manager):
+        """Should count webhooks per status and those that have received alerts."""
+        manager.record_alert_received("Acme")
+        
+        summary = manager.get_status_summary()
+        
+        assert summary["total_customers"] == 2
+        assert summary["by_status"] == {"configured": 1, "unknown": 1}
+        assert type(summary["by_status"]) is dict
+        assert summary["customers_with_alerts"] == 1
+
+
+class TestConfigInstructions:
+    """Test the AlertManager configuration instructions."""
+    
+    def test_instructions_cached_per_customer_and_url(self):
+        """Should build the instructions once and return the same string afterwards."""
+        url = "http://localhost:8000/api/alerts/ingest/Initech"
+        
+        first = WebhookManager._build_config_instructions("Initech", url)
+        
+        assert f"url: '{url}'" in first
+        assert WebhookManager()._build_config_instructions("Initech", url) is first
+        assert WebhookManager._build_config_instructions("Initech", url + "/v2") is not first
+
+
+class TestValidateAlertmanager:
+    """Test validating a single customer's AlertManager."""
+    
+    @respx.mock
+    async def test_reachable_alertmanager_is_pending(self, manager):
+        """Should mark a reachable AlertManager as waiting for its first alert."""
+        respx.get("http://am-acme:9093/api/v2/status").respond(200, json={})
+        
+        result = await manager.validate_alertmanager("Acme")
+        
+        assert (result.is_valid, result.webhook_configured) == (True, False)
+        assert manager.get_webhook("Acme").status.value == "pending"
+    
+    @respx.mock
+    async def test_reuses_one_client(self, manager):
+        """Should send every validation through the same client until closed."""
+        respx.get(url__regex=r".*/api/v2/status").respond(200, json={})
+        
+        await manager.validate_all()
+        client = manager._http
+        await manager.validate_alertmanager("Acme")
+        
+        assert isinstance(client, httpx.AsyncClient)
+        assert manager._http is client
+        
+        await manager.aclose()
+        assert client.is_closed
+        assert manager._http is None
+    
+    @respx.mock
+    async def test_unreachable_alertmanager(self, manager):
+        """Should report a connection error as an invalid result."""
+        respx.get("http://am-acme:9093/api/v2/status").mock(side_effect=httpx.ConnectError("refused"))
+        
+        result = await manager.validate_alertmanager("Acme")
+        
+        assert (result.is_valid, result.error) == (False, "refused")
+        assert manager.get_webhook("Acme").status.value == "error"
+
+
+class TestValidateAll:
+    """Test validating every customer's AlertManager."""
+    
+    async def test_validations_run_concurrently(self, manager, monkeypatch):
+        """Should start every validation before any of them finishes."""
+        started = []
+        release = asyncio.Event()
+        
+        async def validate(customer_name):
+            started.append(customer_name)
+            if len(started) == 2:
+                release.set()
+            await release.wait()
+            return WebhookValidationResult(customer_name, True, True, False)
+        
+        monkeypatch.setattr(manager, "validate_alertmanager", validate)
+        
+        results = await asyncio.wait_for(manager.validate_all(), timeout=1)
+        
+        assert [r.customer_name for r in results] == ["Acme", "Globex"]
+        assert all(r.is_valid for r in results)
+    
+    async def test_failed_validation_becomes_invalid_result(self, manager, monkeypatch):
+        """Should report a validation that raised as invalid, keeping the others."""
+        async def validate(customer_name):
+            if customer_name == "Acme":
+                raise RuntimeError("boom")
+            return WebhookValidationResult(customer_name, True, True, False)
+        
+        monkeypatch.setattr(manager, "validate_alertmanager", validate)
+        
+        acme, globex = await manager.validate_all()
+        
+        assert (acme.customer_name, acme.is_valid, acme.error) == ("Acme", False, "boom")
+        assert globex.is_valid is True
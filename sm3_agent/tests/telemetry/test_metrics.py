@@ -0,0 +1,83 @@
+"""
+Tests for the Prometheus metrics helpers.
+
+Covers:
+- update_cache_metrics: cache gauges and the eviction counter
+- get_metrics: scrape output reused between scrapes
+"""
+import pytest
+from prometheus_client import REGISTRY
+
+from backend.telemetry import metrics
+
+
+def sample(name, labels=None):
+    """Current value of a metric sample in the default registry."""
+    return REGISTRY.get_sample_value(name, labels or {})
+
+
+class TestCacheMetrics:
+    """Test copying cache statistics into metrics."""
+    
+    @pytest.fixture(autouse=True)
+    def reset_evictions(self, monkeypatch):
+        """Start each test as if no evictions had been seen."""
+        monkeypatch.setattr(metrics, "_last_cache_evictions", 0)
+    
+    def test_sets_size_and_hit_rate(self):
+        """Should mirror the cache size and hit rate into gauges."""
+        metrics.update_cache_metrics({"size": 12, "hit_rate_percent": 75.0, "evictions": 0})
+        
+        assert sample("agent_cache_size") == 12
+        assert sample("agent_cache_hit_rate") == 0.75
+    
+    def test_adds_eviction_delta_once(self):
+        """Should add only the evictions since the previous update."""
+        before = sample("agent_cache_evictions_total")
+        
+        metrics.update_cache_metrics({"evictions": 5})
+        metrics.update_cache_metrics({"evictions": 8})
+        metrics.update_cache_metrics({"evictions": 8})
+        
+        assert sample("agent_cache_evictions_total") == before + 8
+    
+    def test_eviction_count_reset(self):
+        """Should not go backwards when the cache's own count restarts."""
+        metrics.update_cache_metrics({"evictions": 5})
+        before = sample("agent_cache_evictions_total")
+        
+        metrics.update_cache_metrics({"evictions": 2})
+        metrics.update_cache_metrics({"evictions": 3})
+        
+        assert sample("agent_cache_evictions_total") == before + 1
+
+
+class TestGetMetrics:
+    """Test rendering the scrape output."""
+    
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        """Controllable clock and a fresh scrape cache."""
+        now = [1000.0]
+        monkeypatch.setattr(metrics.time, "monotonic", lambda: now[0])
+        monkeypatch.setattr(metrics, "_metrics_cache", (float("-inf"), b""))
+        return now
+    
+    def test_reuses_output_within_ttl(self, clock):
+        """Should serve the same payload until the TTL passes, then render again."""
+        first = metrics.get_metrics()
+        metrics.sessions_total.inc()
+        
+        assert metrics.get_metrics() is first
+        
+        clock[0] += metrics.METRICS_CACHE_TTL
+        assert metrics.get_metrics() != first
+    
+    def test_session_messages_unlabelled(self):
+        """Should expose one aggregate session message count."""
+        before = sample("agent_session_messages_total")
+        
+        metrics.session_messages_total.inc()
+        
+        assert sample("agent_session_messages_total") == before + 1
+        assert metrics.session_messages_total._labelnames == ()
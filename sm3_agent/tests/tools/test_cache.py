@@ -0,0 +1,384 @@
+"""
+Tests for the tool result cache.
+
+Covers:
+- get_cache: global cache instance
+- _hash_key: key hashing with and without xxhash
+- ToolResultCache: LRU eviction, TTL expiry, background sweeping, invalidation, sharding and statistics
+"""
+import asyncio
+import threading
+
+import pytest
+
+from backend.app.config import get_settings
+from backend.tools import cache as cache_module
+from backend.tools.cache import ToolResultCache, get_cache
+
+
+@pytest.fixture
+def cache():
+    """Small single-shard cache (not the global one), so LRU order is global."""
+    return ToolResultCache(max_size=3, default_ttl=60, shards=1)
+
+
+def test_global_cache_is_shared():
+    """Should hand out the same instance, created on first use and sized from settings."""
+    assert isinstance(get_cache(), ToolResultCache)
+    assert get_cache() is get_cache()
+    assert get_cache().max_size == get_settings().tool_cache_max_size
+    assert get_cache().default_ttl == get_settings().tool_cache_default_ttl
+
+
+def test_global_cache_created_on_first_use(monkeypatch):
+    """Should leave the cache unbuilt until it is first asked for."""
+    monkeypatch.setattr(cache_module, "_cache_instance", None)
+    
+    created = get_cache()
+    
+    assert cache_module._cache_instance is created
+    assert get_cache() is created
+
+
+class TestKeys:
+    """Test cache key generation."""
+    
+    def test_by_key_matches_by_arguments(self, cache):
+        """Should read and write the same entry through a prebuilt key."""
+        key = cache.make_key("get_dashboard_by_uid", {"uid": "a"})
+        
+        cache.set_by_key(key, "a")
+        
+        assert cache.get("get_dashboard_by_uid", {"uid": "a"}) == "a"
+        assert cache.get_by_key(key) == "a"
+        cache.set_by_key(cache.make_key("query_prometheus", {}), "fresh")
+        assert cache.get_stats()["size"] == 1
+    
+    def test_key_ignores_argument_order(self, cache):
+        """Should give the same key for the same arguments in any order."""
+        assert cache.make_key("t", {"a": 1, "b": 2}) == cache.make_key("t", {"b": 2, "a": 1})
+        assert cache.make_key("t", {"a": 1}) != cache.make_key("u", {"a": 1})
+    
+    def test_primitive_arguments_keyed_without_hashing(self, cache):
+        """Should key flat arguments directly, keeping values of different types apart."""
+        key = cache.make_key("t", {"b": "x", "a": 1})
+        
+        assert key == ("t", (("a", int, 1), ("b", str, "x")))
+        assert cache.make_key("t", {"a": True}) != cache.make_key("t", {"a": 1})
+        assert cache.make_key("t", {"a": 1.0}) != cache.make_key("t", {"a": 1})
+    
+    def test_nested_arguments_hashed(self, cache):
+        """Should hash nested arguments regardless of their key order."""
+        key = cache.make_key("t", {"labels": {"a": 1, "b": 2}})
+        
+        assert key == cache.make_key("t", {"labels": {"b": 2, "a": 1}})
+        assert key[0] == "t" and isinstance(key[1], str)
+        assert key != cache.make_key("t", {"labels": {"a": 1, "b": 3}})
+        assert cache.make_key("t", {"ids": {1: "x"}}) == cache.make_key("t", {"ids": {1: "x"}})
+    
+    @pytest.mark.parametrize("xxhash_available", [True, False])
+    def test_hash_is_128_bit_hex(self, monkeypatch, xxhash_available):
+        """Should produce 32 hex digits whichever hash backs it."""
+        if xxhash_available and not cache_module.XXHASH_AVAILABLE:
+            pytest.skip("xxhash not installed")
+        monkeypatch.setattr(cache_module, "XXHASH_AVAILABLE", xxhash_available)
+        
+        digest = cache_module._hash_key(b"list_datasources:{}")
+        
+        assert len(digest) == 32
+        int(digest, 16)
+
+
+class TestEviction:
+    """Test capacity-based eviction."""
+    
+    def test_evicts_least_recently_used(self, cache):
+        """Should evict the entry that was read least recently, not the oldest write."""
+        for uid in ("a", "b", "c"):
+            cache.set("get_dashboard_by_uid", {"uid": uid}, uid)
+        cache.get("get_dashboard_by_uid", {"uid": "a"})
+        
+        cache.set("get_dashboard_by_uid", {"uid": "d"}, "d")
+        cache.set("get_dashboard_by_uid", {"uid": "d"}, "d")
+        
+        assert cache.get("get_dashboard_by_uid", {"uid": "b"}) is None
+        assert cache.get("get_dashboard_by_uid", {"uid": "a"}) == "a"
+        assert cache.evictions == 1
+    
+    def test_overwrite_at_capacity_keeps_other_entries(self, cache):
+        """Should replace an existing key in place without evicting anything."""
+        for uid in ("a", "b", "c"):
+            cache.set("get_dashboard_by_uid", {"uid": uid}, uid)
+        
+        cache.set("get_dashboard_by_uid", {"uid": "a"}, "a2")
+        
+        assert (cache.evictions, cache.rejections) == (0, 0)
+        assert [cache.get("get_dashboard_by_uid", {"uid": uid}) for uid in ("a", "b", "c")] == ["a2", "b", "c"]
+    
+    def test_first_sighting_not_admitted_when_full(self, cache):
+        """Should keep the current entries when a new key shows up once at capacity."""
+        for uid in ("a", "b", "c"):
+            cache.set("get_dashboard_by_uid", {"uid": uid}, uid)
+        
+        cache.set("get_dashboard_by_uid", {"uid": "once"}, "once")
+        
+        assert cache.get("get_dashboard_by_uid", {"uid": "once"}) is None
+        assert [cache.get("get_dashboard_by_uid", {"uid": uid}) for uid in ("a", "b", "c")] == ["a", "b", "c"]
+        assert cache.get_stats()["rejections"] == 1
+        assert cache.evictions == 0
+    
+    def test_doorkeeper_forgets_after_many_sightings(self, cache):
+        """Should clear the doorkeeper once half its bits are set."""
+        shard = cache._shards[0]
+        for i in range(shard.DOORKEEPER_BITS):
+            shard._admit(("t", i << 20))
+        
+        assert shard.doorkeeper_marks < shard.DOORKEEPER_BITS // 2
+    
+    def test_uncached_tools_are_skipped(self, cache):
+        """Should not store results of tools with a zero TTL."""
+        cache.set("query_prometheus", {"expr": "up"}, "result")
+        
+        assert cache.get("query_prometheus", {"expr": "up"}) is None
+        assert cache.get_stats()["size"] == 0
+
+
+class TestExpiry:
+    """Test TTL expiry."""
+    
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        """Controllable clock for the cache module."""
+        now = [1000.0]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+        return now
+    
+    def test_namespaced_tools_use_their_own_ttl(self, cache):
+        """Should apply a tool's TTL under a server namespace too."""
+        assert cache._get_ttl("grafana::list_datasources") == 600
+        assert not cache.should_cache("grafana::query_prometheus")
+        assert cache._get_ttl("grafana::list_teams") == cache.default_ttl
+    
+    def test_expired_entry_is_a_miss(self, cache, clock):
+        """Should stop returning an entry once its TTL has passed."""
+        cache.set("list_alert_rules", {}, "rules")
+        clock[0] += 181
+        
+        assert cache.get("list_alert_rules", {}) is None
+        assert cache.get_stats()["misses"] == 1
+    
+    def test_cleanup_removes_only_due_entries(self, cache, clock):
+        """Should drop expired entries and keep those still live."""
+        cache.set("search_dashboards", {}, "short")  # 120s TTL
+        cache.set("list_datasources", {}, "long")  # 600s TTL
+        clock[0] += 200
+        
+        cache._cleanup_expired()
+        
+        assert cache.get_stats()["size"] == 1
+        assert cache.get("list_datasources", {}) == "long"
+    
+    def test_cleanup_keeps_rewritten_entry(self, cache, clock):
+        """Should ignore the stale expiry of an entry that was written again."""
+        cache.set("search_dashboards", {}, "old")
+        clock[0] += 100
+        cache.set("search_dashboards", {}, "new")
+        clock[0] += 50
+        
+        cache._cleanup_expired()
+        
+        assert cache.get("search_dashboards", {}) == "new"
+    
+    def test_cleanup_throttled(self, cache, clock):
+        """Should sweep at most once per resolution interval."""
+        cache.set("search_dashboards", {}, "short")
+        cache._cleanup_expired()
+        clock[0] += 121
+        cache._shards[0].last_cleanup = clock[0] - 0.5
+        
+        cache._cleanup_expired()
+        
+        assert cache.get_stats()["size"] == 1
+    
+    def test_same_expiry_for_different_key_shapes(self, cache, clock):
+        """Should order equal expiry times without comparing keys."""
+        cache.set("search_dashboards", {"query": "cpu"}, "flat")
+        cache.set("search_dashboards", {"query": {"nested": True}}, "nested")
+        clock[0] += 121
+        
+        cache._cleanup_expired()
+        
+        assert cache.get_stats()["size"] == 0
+    
+    def test_set_leaves_expired_entries_to_the_sweep(self, cache, clock):
+        """Should not sweep inline when writing to a nearly full cache."""
+        cache.set("search_dashboards", {}, "short")
+        clock[0] += 121
+        
+        cache.set("list_datasources", {"a": 1}, "a")
+        cache.set("list_datasources", {"b": 1}, "b")
+        
+        assert cache.get_stats()["size"] == 3
+    
+    def test_next_cleanup_delay_follows_earliest_expiry(self, cache, clock):
+        """Should sleep until the earliest expiry, within the resolution and interval."""
+        assert cache._next_cleanup_delay() == cache.CLEANUP_INTERVAL
+        
+        cache.set("search_dashboards", {}, "short")  # 120s TTL
+        clock[0] += 115
+        assert cache._next_cleanup_delay() == 5
+        
+        clock[0] += 10
+        assert cache._next_cleanup_delay() == cache.CLEANUP_RESOLUTION
+    
+    async def test_background_sweep_removes_expired(self, cache, monkeypatch):
+        """Should sweep from a task on the running loop and stop on request."""
+        monkeypatch.setattr(cache, "CLEANUP_RESOLUTION", 0.01)
+        monkeypatch.setattr(cache, "CLEANUP_INTERVAL", 0.01)
+        monkeypatch.setattr(cache, "DEFAULT_TTLS", {"search_dashboards": -1})
+        monkeypatch.setattr(cache, "should_cache", lambda tool_name: True)
+        cache.set("search_dashboards", {}, "stale")
+        
+        cache.start_cleanup()
+        task = cache._cleanup_task
+        await asyncio.sleep(0.05)
+        
+        assert cache.get_stats()["size"] == 0
+        await cache.stop_cleanup()
+        assert task.cancelled()
+    
+    def test_start_cleanup_without_loop_is_deferred(self, cache):
+        """Should not fail, nor start anything, outside async code."""
+        cache.start_cleanup()
+        
+        assert cache._cleanup_task is None
+    
+    async def test_start_cleanup_replaces_sweep_on_other_loop(self, cache):
+        """Should start a new sweep when the old one belongs to another loop."""
+        other_loop = asyncio.new_event_loop()
+        stale = other_loop.create_future()  # Never done, like a task on a loop that stopped
+        cache._cleanup_task = stale
+        
+        cache.start_cleanup()
+        
+        assert cache._cleanup_task is not stale
+        assert cache._cleanup_task.get_loop() is asyncio.get_running_loop()
+        await cache.stop_cleanup()
+        other_loop.close()
+    
+    async def test_get_cache_does_not_start_sweep(self, monkeypatch):
+        """Should leave starting the sweep to the app."""
+        monkeypatch.setattr(cache_module, "_cache_instance", None)
+        
+        assert get_cache()._cleanup_task is None
+    
+    def test_expiry_heap_stays_bounded(self, cache):
+        """Should rebuild the heap from live entries when rewrites pile up."""
+        for i in range(20):
+            cache.set("get_dashboard_by_uid", {"uid": str(i % 5)}, i)
+        
+        assert len(cache._shards[0].expiry_heap) <= 2 * cache.max_size
+
+
+class TestInvalidate:
+    """Test invalidating cached results."""
+    
+    def test_invalidate_specific_arguments(self, cache):
+        """Should drop only the entry for the given arguments."""
+        cache.set("get_dashboard_by_uid", {"uid": "a"}, "a")
+        cache.set("get_dashboard_by_uid", {"uid": "b"}, "b")
+        
+        cache.invalidate("get_dashboard_by_uid", {"uid": "a"})
+        
+        assert cache.get("get_dashboard_by_uid", {"uid": "a"}) is None
+        assert cache.get("get_dashboard_by_uid", {"uid": "b"}) == "b"
+    
+    def test_invalidate_whole_tool(self, cache):
+        """Should drop every entry of the tool and leave other tools alone."""
+        cache.set("get_dashboard_by_uid", {"uid": "a"}, "a")
+        cache.set("get_dashboard_by_uid", {"uid": "b"}, "b")
+        cache.set("list_datasources", {}, "ds")
+        
+        cache.invalidate("get_dashboard_by_uid")
+        
+        assert cache.get_stats()["size"] == 1
+        assert cache.get("list_datasources", {}) == "ds"
+        assert "get_dashboard_by_uid" not in cache._shards[0].by_tool
+    
+    def test_invalidate_by_predicate(self, cache):
+        """Should drop only the tool's entries whose arguments match."""
+        cache.set("get_dashboard_by_uid", {"uid": "a", "opts": {"full": True}}, "a")
+        cache.set("get_dashboard_by_uid", {"uid": "b"}, "b")
+        cache.set("get_dashboard_summary", {"uid": "a"}, "summary")
+        
+        cache.invalidate("get_dashboard_by_uid", predicate=lambda args: args["uid"] == "a")
+        
+        assert cache.get("get_dashboard_by_uid", {"uid": "a", "opts": {"full": True}}) is None
+        assert cache.get("get_dashboard_by_uid", {"uid": "b"}) == "b"
+        assert cache.get("get_dashboard_summary", {"uid": "a"}) == "summary"
+        assert len(cache._shards[0].by_tool["get_dashboard_by_uid"]) == 1
+    
+    def test_predicate_drops_entries_without_arguments(self, cache):
+        """Should treat entries stored without arguments as matching."""
+        key = cache.make_key("get_dashboard_by_uid", {"uid": "a"})
+        cache.set_by_key(key, "a")
+        
+        cache.invalidate("get_dashboard_by_uid", predicate=lambda args: False)
+        
+        assert cache.get_by_key(key) is None
+    
+    def test_index_follows_eviction(self, cache):
+        """Should forget evicted keys so invalidation only touches live entries."""
+        for uid in ("a", "b", "c", "d", "d"):
+            cache.set("get_dashboard_by_uid", {"uid": uid}, uid)
+        
+        assert len(cache._shards[0].by_tool["get_dashboard_by_uid"]) == 3
+        cache.invalidate("get_dashboard_by_uid")
+        assert cache.get_stats()["size"] == 0
+
+
+class TestSharding:
+    """Test the partitioned cache."""
+    
+    def test_entries_spread_over_shards(self):
+        """Should place keys in several shards and still find each one."""
+        cache = ToolResultCache(max_size=64, shards=4)
+        for i in range(32):
+            cache.set("get_dashboard_by_uid", {"uid": str(i)}, i)
+        
+        assert sum(1 for shard in cache._shards if shard.entries) > 1
+        assert [cache.get("get_dashboard_by_uid", {"uid": str(i)}) for i in range(32)] == list(range(32))
+        assert cache.get_stats()["hits"] == 32
+    
+    def test_whole_tool_invalidation_spans_shards(self):
+        """Should invalidate a tool's entries in every shard."""
+        cache = ToolResultCache(max_size=64, shards=4)
+        for i in range(16):
+            cache.set("get_dashboard_by_uid", {"uid": str(i)}, i)
+        
+        cache.invalidate("get_dashboard_by_uid")
+        
+        assert cache.get_stats()["size"] == 0
+    
+    def test_shards_capped_by_size(self):
+        """Should not create more shards than entries allowed."""
+        assert len(ToolResultCache(max_size=3)._shards) == 3
+    
+    def test_concurrent_access_keeps_counts(self):
+        """Should count every lookup when many threads share the cache."""
+        cache = ToolResultCache(max_size=1000)
+        
+        def worker(n):
+            for i in range(200):
+                cache.set("get_dashboard_by_uid", {"uid": f"{n}-{i % 20}"}, i)
+                cache.get("get_dashboard_by_uid", {"uid": f"{n}-{i % 20}"})
+        
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        stats = cache.get_stats()
+        assert stats["hits"] + stats["misses"] == 1600
+        assert stats["size"] == 160
@@ -0,0 +1,447 @@
+"""
+Tests for the MCP client and its session pool.
+
+Covers:
+- MCPConnectionPool: concurrent start, reuse, growth, replacing failed sessions, waking
+  waiters, acquire timeouts, idle reaping
+- MCPClient.connect: backoff with jitter between attempts, no retry on refusals
+- MCPClient.invoke_tool: pooled calls, retry on a fresh session, timeouts, result caching,
+  joining identical in-flight calls, and calling again when the joined call is cancelled
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from backend.tools import mcp_client as mcp_client_module
+from backend.tools.cache import ToolResultCache
+from backend.tools.mcp_client import MCPClient, MCPConnectionPool
+
+
+class FakeServer:
+    """Stands in for the transport: records sessions opened and closed."""
+    
+    def __init__(self):
+        self.opened = []
+        self.closed = []
+        self.open_delay = 0
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self.fail_opens = 0
+        self.open_error = ConnectionError("refused")
+    
+    @asynccontextmanager
+    async def open_session(self):
+        self.concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        try:
+            await asyncio.sleep(self.open_delay)
+            if self.fail_opens:
+                self.fail_opens -= 1
+                raise self.open_error
+        finally:
+            self.concurrent -= 1
+        
+        session = MagicMock(name=f"session{len(self.opened)}")
+        session.call_tool = AsyncMock(return_value=MagicMock(content=[f"result from {len(self.opened)}"], isError=False))
+        self.opened.append(session)
+        try:
+            yield session
+        finally:
+            self.closed.append(session)
+
+
+async def hang(**kwargs):
+    """Tool call that never answers in time."""
+    await asyncio.sleep(1)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Fake MCP server behind every pool."""
+    fake = FakeServer()
+    monkeypatch.setattr(MCPConnectionPool, "_open_session", lambda pool: fake.open_session())
+    return fake
+
+
+class TestConnectionPool:
+    """Test borrowing and returning pooled sessions."""
+    
+    async def test_start_opens_min_size_concurrently(self, server):
+        """Should open the minimum number of sessions at once, not one after another."""
+        server.open_delay = 0.01
+        pool = MCPConnectionPool("http://mcp", min_size=3, max_size=5)
+        
+        await pool.start()
+        
+        assert (len(server.opened), server.max_concurrent, pool.size) == (3, 3, 3)
+        await pool.close()
+    
+    async def test_failed_start_closes_opened_sessions(self, server):
+        """Should close the sessions that did open when another one fails."""
+        server.fail_opens = 1
+        pool = MCPConnectionPool("http://mcp", min_size=2, max_size=2)
+        
+        with pytest.raises(ConnectionError):
+            await pool.start()
+        
+        assert server.closed == server.opened
+        assert pool.size == 0
+    
+    async def test_idle_session_reused(self, server):
+        """Should hand the same session to sequential callers."""
+        pool = MCPConnectionPool("http://mcp", min_size=1, max_size=4)
+        await pool.start()
+        
+        async with pool.acquire() as first:
+            pass
+        async with pool.acquire() as second:
+            pass
+        
+        assert first is second
+        assert len(server.opened) == 1
+        await pool.close()
+    
+    async def test_grows_to_max_size_then_waits(self, server):
+        """Should open sessions for concurrent callers up to max_size, then queue."""
+        pool = MCPConnectionPool("http://mcp", min_size=1, max_size=2)
+        await pool.start()
+        release = asyncio.Event()
+        used = []
+        
+        async def borrow():
+            async with pool.acquire() as session:
+                used.append(session)
+                await release.wait()
+        
+        tasks = [asyncio.create_task(borrow()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        
+        assert (len(used), pool.size) == (2, 2)
+        release.set()
+        await asyncio.gather(*tasks)
+        assert len(used) == 3
+        assert len(server.opened) == 2
+        await pool.close()
+    
+    async def test_failed_session_replaced(self, server):
+        """Should close a session whose call raised and open a new one next time."""
+        pool = MCPConnectionPool("http://mcp", min_size=1, max_size=1)
+        await pool.start()
+        
+        with pytest.raises(RuntimeError):
+            async with pool.acquire() as stale:
+                raise RuntimeError("stream closed")
+        async with pool.acquire() as fresh:
+            pass
+        
+        assert fresh is not stale
+        assert server.closed == [stale]
+        await pool.close()
+    
+    async def test_waiter_woken_when_session_discarded(self, server):
+        """Should open a new session for a waiter once a failed session frees its slot."""
+        pool = MCPConnectionPool("http://mcp", min_size=1, max_size=1)
+        await pool.start()
+        fail = asyncio.Event()
+        
+        async def failing_call():
+            async with pool.acquire():
+                await fail.wait()
+                raise RuntimeError("stream closed")
+        
+        async def waiting_call():
+            async with pool.acquire(timeout=1) as session:
+                return session
+        
+        holder = asyncio.create_task(failing_call())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(waiting_call())
+        await asyncio.sleep(0)
+        fail.set()
+        
+        with pytest.raises(RuntimeError):
+            await holder
+        assert await waiter is server.opened[1]
+        assert pool.size == 1
+        await pool.close()
+    
+    async def test_acquire_times_out_on_full_pool(self, server):
+        """Should give up waiting for a session after the timeout."""
+        pool = MCPConnectionPool("http://mcp", min_size=1, max_size=1)
+        await pool.start()
+        
+        async with pool.acquire():
+            with pytest.raises(asyncio.TimeoutError):
+                async with pool.acquire(timeout=0.01):
+                    pass
+        
+        async with pool.acquire(timeout=0.01):
+            pass
+        await pool.close()
+    
+    async def test_close_closes_every_session(self, server):
+        """Should close idle sessions at once and borrowed ones when released."""
+        pool = MCPConnectionPool("http://mcp", min_size=2, max_size=2)
+        await pool.start()
+        
+        async with pool.acquire() as borrowed:
+            await pool.close()
+            assert len(server.closed) == 1
+        
+        assert borrowed in server.closed
+        assert len(server.closed) == 2
+        with pytest.raises(RuntimeError):
+            async with pool.acquire():
+                pass
+    
+    async def test_reaper_closes_idle_sessions_above_min(self, server):
+        """Should close sessions idle past the timeout, keeping min_size open."""
+        pool = MCPConnectionPool("http://mcp", min_size=1, max_size=3, idle_timeout=0.02)
+        await pool.start()
+        release = asyncio.Event()
+        
+        async def borrow():
+            async with pool.acquire():
+                await release.wait()
+        
+        tasks = [asyncio.create_task(borrow()) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*tasks)
+        assert pool.size == 3
+        
+        await asyncio.sleep(0.1)
+        
+        assert pool.size == 1
+        assert len(server.closed) == 2
+        await pool.close()
+
+
+class TestInvokeTool:
+    """Test tool calls through the pooled client."""
+    
+    @pytest.fixture
+    def client(self, server):
+        """Client with a private cache and a small pool."""
+        settings = MagicMock(
+            mcp_server_url="http://mcp",
+            mcp_pool_min_size=1,
+            mcp_pool_max_size=2,
+            mcp_pool_idle_timeout=0,
+            mcp_connect_max_retries=3,
+            mcp_retry_backoff_base=0,
+            mcp_retry_backoff_cap=30,
+            mcp_connect_timeout=10,
+            mcp_call_timeout=60,
+            mcp_call_budget=90,
+        )
+        client = MCPClient(settings=settings, cache_namespace="grafana")
+        client._cache = ToolResultCache(max_size=10, shards=1)
+        return client
+    
+    async def test_result_cached_after_first_call(self, client, server):
+        """Should call the server once and answer the repeat from the cache."""
+        first = await client.invoke_tool("list_datasources", {})
+        second = await client.invoke_tool("list_datasources", {})
+        
+        assert first == second == ["result from 0"]
+        server.opened[0].call_tool.assert_awaited_once()
+        await client.disconnect()
+    
+    async def test_cache_key_built_once(self, client, server, monkeypatch):
+        """Should build one cache key for the lookup and the store."""
+        make_key = MagicMock(wraps=client._cache.make_key)
+        monkeypatch.setattr(client._cache, "make_key", make_key)
+        
+        await client.invoke_tool("list_datasources", {"type": "prometheus"})
+        
+        make_key.assert_called_once_with("grafana::list_datasources", {"type": "prometheus"})
+        await client.disconnect()
+    
+    async def test_identical_concurrent_calls_share_one_request(self, client, server):
+        """Should call the server once for identical calls made while the first runs."""
+        await client.connect()
+        session = server.opened[0]
+        
+        async def slow(**kwargs):
+            await asyncio.sleep(0.01)
+            return MagicMock(content=["shared"], isError=False)
+        
+        session.call_tool.side_effect = slow
+        
+        results = await asyncio.gather(*(client.invoke_tool("list_datasources", {}) for _ in range(3)))
+        
+        assert results == [["shared"]] * 3
+        session.call_tool.assert_awaited_once()
+        assert MCPClient._inflight == {}
+        await client.disconnect()
+    
+    async def test_joined_call_shares_failure(self, client, server):
+        """Should raise the first call's error in every caller that joined it."""
+        await client.connect()
+        client._call_timeout = 0.01
+        for session in server.opened:
+            session.call_tool.side_effect = hang
+        server.fail_opens = 1
+        
+        results = await asyncio.gather(
+            *(client.invoke_tool("list_datasources", {}) for _ in range(2)),
+            return_exceptions=True
+        )
+        
+        assert all(isinstance(r, Exception) for r in results)
+        assert results[0] is results[1]
+        assert MCPClient._inflight == {}
+        await client.disconnect()
+    
+    async def test_followers_call_again_when_leader_cancelled(self, client, server):
+        """Should let callers that joined a cancelled call make the call themselves."""
+        await client.connect()
+        server.opened[0].call_tool.side_effect = hang
+        leader = asyncio.create_task(client.invoke_tool("list_datasources", {}))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(client.invoke_tool("list_datasources", {}))
+        await asyncio.sleep(0)
+        
+        leader.cancel()
+        
+        # The cancelled call's session is dropped, so the follower calls on a new one
+        assert await follower == ["result from 1"]
+        assert leader.cancelled()
+        server.opened[1].call_tool.assert_awaited_once()
+        assert MCPClient._inflight == {}
+        await client.disconnect()
+    
+    async def test_uncacheable_calls_not_joined(self, client, server):
+        """Should send each uncacheable call, such as a query, to the server."""
+        client.cache_namespace = None
+        await client.connect()
+        
+        await asyncio.gather(*(client.invoke_tool("query_prometheus", {"expr": "up"}) for _ in range(2)))
+        
+        assert sum(s.call_tool.await_count for s in server.opened) == 2
+        await client.disconnect()
+    
+    async def test_invalidate_by_predicate_in_namespace(self, client, server):
+        """Should drop the namespaced entries whose arguments match."""
+        await client.invoke_tool("get_dashboard_by_uid", {"uid": "a"})
+        await client.invoke_tool("get_dashboard_by_uid", {"uid": "b"})
+        
+        client.invalidate_cache("get_dashboard_by_uid", predicate=lambda args: args["uid"] == "a")
+        
+        assert client._cache.get("grafana::get_dashboard_by_uid", {"uid": "a"}) is None
+        assert client._cache.get("grafana::get_dashboard_by_uid", {"uid": "b"}) is not None
+        await client.disconnect()
+    
+    async def test_error_result_not_cached(self, client, server):
+        """Should return a tool's error result without caching it."""
+        await client.connect()
+        server.opened[0].call_tool.return_value = MagicMock(content=["dashboard not found"], isError=True)
+        
+        assert await client.invoke_tool("get_dashboard_by_uid", {"uid": "x"}) == ["dashboard not found"]
+        await client.invoke_tool("get_dashboard_by_uid", {"uid": "x"})
+        
+        assert server.opened[0].call_tool.await_count == 2
+        await client.disconnect()
+    
+    async def test_retries_on_fresh_session(self, client, server):
+        """Should drop a failing session and retry the call on a new one."""
+        await client.connect()
+        server.opened[0].call_tool.side_effect = ConnectionError("stale")
+        
+        result = await client.invoke_tool("query_prometheus", {"expr": "up"})
+        
+        assert result == ["result from 1"]
+        assert server.closed == [server.opened[0]]
+        assert client.connected
+        await client.disconnect()
+        assert not client.connected
+    
+    async def test_hung_call_times_out_and_retries(self, client, server):
+        """Should abandon a call past the call timeout and retry on a fresh session."""
+        await client.connect()
+        client._call_timeout = 0.01
+        hung = server.opened[0]
+        hung.call_tool.side_effect = hang
+        
+        result = await client.invoke_tool("query_prometheus", {"expr": "up"})
+        
+        assert result == ["result from 1"]
+        assert server.closed == [hung]
+        await client.disconnect()
+    
+    async def test_budget_bounds_retries(self, client, server):
+        """Should stop retrying once the budget is spent."""
+        await client.connect()
+        client._call_budget = 0.02
+        for session in server.opened:
+            session.call_tool.side_effect = hang
+        server.open_delay = 0.05
+        
+        with pytest.raises(Exception, match="Failed to invoke tool 'query_prometheus'"):
+            await client.invoke_tool("query_prometheus", {"expr": "up"})
+        
+        assert len(server.opened) == 1
+        await client.disconnect()
+    
+    async def test_connect_retries_then_gives_up(self, client, server):
+        """Should try max_retries times and report the last error."""
+        server.fail_opens = 3
+        
+        with pytest.raises(Exception, match="after 3 attempts"):
+            await client.connect()
+        
+        assert not client.connected
+    
+    async def test_backoff_doubles_with_full_jitter(self, client, server, monkeypatch):
+        """Should wait a random time up to base * 2**n between attempts."""
+        bounds = []
+        monkeypatch.setattr(mcp_client_module.random, "uniform", lambda lo, hi: bounds.append((lo, hi)) or 0)
+        client._backoff_base = 0.5
+        server.fail_opens = 2
+        
+        await client.connect()
+        
+        assert bounds == [(0, 0.5), (0, 1.0)]
+        assert client.connected
+        await client.disconnect()
+    
+    async def test_backoff_capped(self, client, server, monkeypatch):
+        """Should never wait longer than the cap."""
+        bounds = []
+        monkeypatch.setattr(mcp_client_module.random, "uniform", lambda lo, hi: bounds.append((lo, hi)) or 0)
+        client._backoff_base, client._backoff_cap = 20, 30
+        server.fail_opens = 2
+        
+        await client.connect()
+        
+        assert bounds == [(0, 20), (0, 30)]
+        await client.disconnect()
+    
+    async def test_auth_error_not_retried(self, client, server):
+        """Should give up at once when the server refuses the client."""
+        response = httpx.Response(401, request=httpx.Request("POST", "http://mcp"))
+        server.open_error = ExceptionGroup(
+            "transport", [httpx.HTTPStatusError("unauthorized", request=response.request, response=response)]
+        )
+        server.fail_opens = 3
+        
+        with pytest.raises(Exception, match="refused the connection"):
+            await client.connect()
+        
+        assert server.fail_opens == 2
+    
+    def test_retryable_errors(self):
+        """Should retry timeouts, dropped connections, 5xx and 429, but not other 4xx."""
+        def status_error(code):
+            response = httpx.Response(code, request=httpx.Request("POST", "http://mcp"))
+            return httpx.HTTPStatusError("status", request=response.request, response=response)
+        
+        assert mcp_client_module._is_retryable(TimeoutError())
+        assert mcp_client_module._is_retryable(ConnectionError())
+        assert mcp_client_module._is_retryable(status_error(503))
+        assert mcp_client_module._is_retryable(status_error(429))
+        assert not mcp_client_module._is_retryable(status_error(403))
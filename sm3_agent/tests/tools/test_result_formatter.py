@@ -0,0 +1,191 @@
+"""
+Tests for the MCP tool result formatter.
+
+Covers:
+- ToolResultFormatter.format: routing by tool name and error results
+- MCP content items: joining TextContent objects and text dicts
+- _format_dashboard_search: dashboard listings and their links
+- Prometheus and Loki: range series and log stream summaries
+- Generic results: JSON output and truncation
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from backend.tools import result_formatter
+from backend.tools.result_formatter import ToolResultFormatter, _dumps, _dumps_truncated, _formatter_for
+
+
+class TestDispatch:
+    """Test choosing a formatter from the tool name."""
+    
+    @pytest.mark.parametrize("tool_name, formatter", [
+        ("search_dashboards", ToolResultFormatter._format_dashboard_search),
+        ("query_prometheus", ToolResultFormatter._format_prometheus),
+        ("Query_Loki_Logs", ToolResultFormatter._format_loki),
+        ("get_dashboard_by_uid", ToolResultFormatter._format_dashboard),
+        ("list_alert_rules", ToolResultFormatter._format_alert),
+        ("list_datasources", ToolResultFormatter._format_datasource),
+        ("search_folders", ToolResultFormatter._format_search),
+        ("list_oncall_schedules", ToolResultFormatter._format_generic),
+    ])
+    def test_routes_by_tool_name(self, tool_name, formatter):
+        """Should pick the formatter for the first matching name, case-insensitively."""
+        assert _formatter_for(tool_name) is formatter
+    
+    def test_earlier_substring_wins(self):
+        """Should prefer Prometheus over dashboard when a name has both."""
+        assert _formatter_for("prometheus_dashboard_panels") is ToolResultFormatter._format_prometheus
+    
+    def test_error_result(self):
+        """Should report an error result whatever the tool."""
+        assert ToolResultFormatter.format("query_prometheus", {"error": "boom"}) == "❌ Error: boom"
+    
+    def test_formats_through_chosen_formatter(self):
+        """Should pass the result to the chosen formatter."""
+        result = {"data": {"resultType": "scalar", "result": 42}}
+        
+        assert ToolResultFormatter.format("query_prometheus", result) == "Scalar value: 42"
+
+
+class TestTextItems:
+    """Test formatting lists of MCP content items."""
+    
+    @pytest.mark.parametrize("tool_name", [
+        "query_prometheus", "query_loki_logs", "get_dashboard_by_uid",
+        "list_alert_rules", "list_datasources", "search_folders", "list_oncall_schedules",
+    ])
+    def test_joins_text_items_for_every_tool(self, tool_name):
+        """Should join content objects and text dicts, one per line."""
+        result = [SimpleNamespace(text="first"), {"text": "second"}]
+        
+        assert ToolResultFormatter.format(tool_name, result) == "first\nsecond"
+    
+    def test_other_items_as_strings(self):
+        """Should fall back to str() for items without text."""
+        assert ToolResultFormatter._join_text_items([{"text": "a"}, 3]) == "a\n3"
+    
+    def test_plain_list_not_text_items(self):
+        """Should format a list of plain records as records."""
+        result = [{"name": "Prometheus", "type": "prometheus", "uid": "p1"}]
+        
+        assert "Prometheus (prometheus) - UID: p1" in ToolResultFormatter.format("list_datasources", result)
+
+
+class TestDashboardSearch:
+    """Test formatting dashboard search results."""
+    
+    def test_relative_url_joined_to_grafana_base(self, monkeypatch):
+        """Should link relative dashboard URLs under the configured Grafana base."""
+        monkeypatch.setattr(result_formatter, "_GRAFANA_BASE", "https://grafana.example.com")
+        result = [{"title": "CPU", "uid": "cpu1", "url": "/d/cpu1", "folderTitle": "Infra"}]
+        
+        text = ToolResultFormatter.format("search_dashboards", result)
+        
+        assert "1. **CPU**" in text
+        assert "   - Folder: Infra" in text
+        assert "[View Dashboard](https://grafana.example.com/d/cpu1)" in text
+    
+    def test_absolute_url_kept(self):
+        """Should keep dashboard URLs that are already absolute."""
+        result = {"dashboards": [{"title": "CPU", "url": "https://other/d/cpu1"}]}
+        
+        assert "[View Dashboard](https://other/d/cpu1)" in ToolResultFormatter.format("search_dashboards", result)
+    
+    def test_parses_text_content(self):
+        """Should read the dashboards from the JSON in a TextContent item."""
+        result = [SimpleNamespace(text='{"dashboards": [{"title": "Memory", "uid": "mem"}]}')]
+        
+        text = ToolResultFormatter.format("search_dashboards", result)
+        
+        assert "1. **Memory**" in text
+        assert "   - UID: `mem`" in text
+    
+    def test_unparseable_text_content(self):
+        """Should not fail on text that isn't JSON."""
+        result = [SimpleNamespace(text="not json")]
+        
+        assert ToolResultFormatter.format("search_dashboards", result).startswith("## Available Dashboards")
+    
+    def test_no_dashboards(self):
+        """Should say so when the search found nothing."""
+        assert ToolResultFormatter.format("search_dashboards", []) == "No dashboards found."
+
+
+class TestQueryResults:
+    """Test formatting Prometheus and Loki query results."""
+    
+    def test_prometheus_matrix(self):
+        """Should summarize up to five series by their first and last points."""
+        series = [{"metric": {"job": f"j{i}"}, "values": [[1, "0"], [2, str(i)]]} for i in range(6)]
+        result = {"data": {"resultType": "matrix", "result": series}}
+        
+        text = ToolResultFormatter.format("query_prometheus", result)
+        
+        assert text.startswith('\n📊 Series 1: {"job":"j0"}\n   Data points: 2\n   First: [1] = 0\n   Last:  [2] = 0')
+        assert "Series 6" not in text
+        assert text.endswith("\n\n... and 1 more series")
+    
+    def test_prometheus_vector(self):
+        """Should list series with a sample by their labels, skipping those without one."""
+        series = [
+            {"metric": {"job": "api", "instance": "a:9090"}, "value": [1, "1"]},
+            {"metric": {"job": "empty"}, "value": []},
+            {"metric": {}, "value": [1, "0"]},
+        ]
+        result = {"data": {"resultType": "vector", "result": series}}
+        
+        text = ToolResultFormatter.format("query_prometheus", result)
+        
+        assert text == "📈 Instant Query Results:\n\n  • job=api, instance=a:9090: 1\n  • : 0"
+    
+    def test_loki_streams(self):
+        """Should list up to three lines per stream, truncating long ones, and count entries."""
+        values = [["1", "x" * 120], ["2", "b"], ["3", "c"], ["4", "d"]]
+        result = {"data": {"resultType": "streams", "result": [{"stream": {"app": "api"}, "values": values}]}}
+        
+        text = ToolResultFormatter.format("query_loki_logs", result)
+        
+        assert text == "\n".join([
+            "📋 Log Entries:\n",
+            "\nStream: {app=api}",
+            f"  [1] {'x' * 100}...",
+            "  [2] b",
+            "  [3] c",
+            "  ... and 1 more log lines",
+            "\nTotal log entries: 4",
+        ])
+
+
+class TestGeneric:
+    """Test the fallback formatting of other results."""
+    
+    def test_dict_as_indented_json(self):
+        """Should render dicts as indented JSON, keeping non-ASCII text and non-string keys."""
+        text = ToolResultFormatter.format("list_oncall_schedules", {"name": "Zoë", 1: [True]})
+        
+        assert text == '{\n  "name": "Zoë",\n  "1": [\n    true\n  ]\n}'
+    
+    def test_large_result_truncated(self):
+        """Should cut large results short, keeping the start of the full JSON, and say so."""
+        result = {"items": ["x" * 50] * 100}
+        
+        text = ToolResultFormatter.format("list_oncall_schedules", result)
+        
+        assert text == _dumps(result)[:2000] + "\n\n... (truncated, result too large)"
+    
+    def test_stops_serializing_past_the_limit(self):
+        """Should not serialize the part of a result that won't be shown."""
+        result = ["x" * 3000, object()]
+        
+        assert _dumps_truncated(result, 2000) == (_dumps(result[:1])[:2000], True)
+    
+    @pytest.mark.parametrize("result", [
+        {},
+        [[], {}, ()],
+        {"a": {"b": [1, 2.5, None, True]}, 3: "é\n\"q\""},
+        [{"nested": [{"deep": (1, "two")}]}],
+    ])
+    def test_bounded_output_matches_full_json(self, result):
+        """Should produce exactly the full indented JSON when it fits."""
+        assert _dumps_truncated(result, 2000) == (_dumps(result), False)